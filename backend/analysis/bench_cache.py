@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+
+# Directories never considered part of the benchmarked source tree
+EXCLUDE_DIRS = {'.git', '.hg', '.svn', '.venv', 'venv', 'node_modules', '__pycache__',
+                '.pytest_cache', '.mypy_cache', '.ruff_cache', '.tox', '.nox'}
+MAX_ENTRIES = 200
+# Bumped when the cached payload shape or keying changes
+CACHE_VERSION = 1
+_CHUNK = 1 << 20
+
+
+def _project_id(project_path: str) -> str:
+    return hashlib.sha256(project_path.encode("utf-8")).hexdigest()[:16]
+
+
+def _dir(data_dir: Path, sub: str) -> Path:
+    p = Path(data_dir) / "bench_cache" / sub
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def _write_json(path: Path, obj: Dict[str, Any]) -> bool:
+    """
+    Atomically replace `path` via a uniquely named temp file, so concurrent writers
+    never share one. Entries are rebuildable, so a failed write is reported, not raised.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps(obj))
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        return False
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def _file_sha(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _walk(root: str, skip: Iterable[str]):
+    skip_abs = {os.path.abspath(s) for s in skip}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames
+                             if d not in EXCLUDE_DIRS and os.path.join(dirpath, d) not in skip_abs)
+        for name in sorted(filenames):
+            yield os.path.join(dirpath, name)
+
+
+def tree_hash(data_dir: Path, project_path: str, skip: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Content hash of the project tree. Per-file SHA-256s are kept in an index keyed by
+    (size, mtime_ns), so only files touched since the last call are re-read.
+    """
+    root = os.path.abspath(project_path)
+    index_path = _dir(data_dir, "filehash") / f"{_project_id(root)}.json"
+    try:
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+    except Exception:
+        index = {}
+    fresh: Dict[str, list] = {}
+    h = hashlib.sha256()
+    rehashed = 0
+    for path in _walk(root, skip):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        rel = os.path.relpath(path, root)
+        known = index.get(rel)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            sha = known[2]
+        else:
+            try:
+                sha = _file_sha(path)
+            except OSError:
+                continue
+            rehashed += 1
+        fresh[rel] = [st.st_size, st.st_mtime_ns, sha]
+        h.update(rel.encode("utf-8", "surrogateescape") + b"\0" + sha.encode("ascii") + b"\n")
+    if rehashed or len(fresh) != len(index):
+        _write_json(index_path, fresh)
+    return {"tree_hash": h.hexdigest(), "files": len(fresh), "rehashed": rehashed}
+
+
+def cache_key(tree: str, domain: str, config: Optional[Dict[str, Any]]) -> str:
+    blob = json.dumps({"v": CACHE_VERSION, "tree": tree, "domain": domain, "config": config},
+                      sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def lookup(data_dir: Path, key: str) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((_dir(data_dir, "results") / f"{key}.json").read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
+def store(data_dir: Path, key: str, tree_hash: str, output: Dict[str, Any]) -> Dict[str, Any]:
+    d = _dir(data_dir, "results")
+    entry = {"key": key, "tree_hash": tree_hash, "created": time.time(), "output": output}
+    _write_json(d / f"{key}.json", entry)
+    entries = sorted(d.glob("*.json"), key=_mtime)
+    for old in entries[:-MAX_ENTRIES] if len(entries) > MAX_ENTRIES else []:
+        old.unlink(missing_ok=True)
+    return entry
+
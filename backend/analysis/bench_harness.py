@@ -0,0 +1,308 @@
+import importlib
+import json
+import math
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    from . import sandbox
+    from . import proc_sampler
+except Exception:
+    sandbox = None
+    proc_sampler = None
+
+# Project-declared benchmarks live in <project>/.softpatent/benchmark.json:
+#   {"default": {...}, "<domain>": {...}}
+# Each entry declares either "command" (str or argv list) or "callable" ("pkg.mod:fn"),
+# plus optional metric, unit, lower_is_better, parse (regex, 1 group), warmup,
+# repetitions, timeout, cpus (list of CPU ids), env, mem_mb, sample_interval (seconds
+# between /proc resource samples; 0 disables sampling). A callable's return value is
+# the metric only when `metric` or `parse` is declared (numbers directly, strings and
+# dicts through `parse`/the metric key); otherwise wall time is measured.
+CONFIG_PATH = Path(".softpatent") / "benchmark.json"
+DEFAULT_WARMUP = 1
+DEFAULT_REPETITIONS = 5
+DEFAULT_TIMEOUT_SEC = 120.0
+WALL_TIME_METRIC = "runtime_sec"
+DEFAULT_SAMPLE_INTERVAL = 0.05
+
+
+def load_config(project_path: str, domain: str) -> Optional[Dict[str, Any]]:
+    """Benchmark declaration for `domain` (or "default") from the project, if any."""
+    f = Path(project_path) / CONFIG_PATH
+    if not f.exists():
+        return None
+    try:
+        data = json.loads(f.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    cfg = data.get(domain) or data.get("default")
+    return dict(cfg) if isinstance(cfg, dict) and (cfg.get("command") or cfg.get("callable")) else None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile (numpy's default method)."""
+    xs = sorted(values)
+    if not xs:
+        return float("nan")
+    k = (len(xs) - 1) * pct / 100.0
+    lo, hi = math.floor(k), math.ceil(k)
+    return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    n = len(samples)
+    if not n:
+        return {"n": 0}
+    mean = sum(samples) / n
+    var = sum((x - mean) ** 2 for x in samples) / (n - 1) if n > 1 else 0.0
+    return {
+        "n": n,
+        "mean": mean,
+        "median": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "stddev": math.sqrt(var),
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+
+def _metric_pattern(cfg: Dict[str, Any]) -> re.Pattern:
+    if cfg.get("parse"):
+        return re.compile(cfg["parse"], re.MULTILINE)
+    name = re.escape(cfg.get("metric") or "value")
+    return re.compile(rf"\b{name}\b\s*[:=]\s*([-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)")
+
+
+def parse_metric(cfg: Dict[str, Any], output: str) -> Optional[float]:
+    """
+    Metric value from benchmark output: the last match of `parse` (or `<metric>: <number>`),
+    falling back to the last JSON object line carrying the metric key.
+    """
+    matches = _metric_pattern(cfg).findall(output or "")
+    if matches:
+        last = matches[-1]
+        return float(last[0] if isinstance(last, tuple) else last)
+    key = cfg.get("metric") or "value"
+    for line in reversed((output or "").splitlines()):
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                obj = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(obj, dict) and isinstance(obj.get(key), (int, float)):
+                return float(obj[key])
+    return None
+
+
+def _affinity(cpus: Optional[List[int]]) -> Optional[List[int]]:
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return None
+    allowed = os.sched_getaffinity(0)
+    pinned = [c for c in cpus if c in allowed]
+    return pinned or None
+
+
+def _preexec(cpus: Optional[List[int]], mem_mb: Optional[int]):
+    limits = sandbox._limits(mem_mb, None) if sandbox is not None else None
+    if not cpus and limits is None:
+        return None
+
+    def apply():
+        if cpus:
+            os.sched_setaffinity(0, cpus)
+        if limits is not None:
+            limits()
+    return apply
+
+
+def _run_sampled(argv: List[str], cwd: str, timeout: float, env=None, preexec=None, stdin_text: Optional[str] = None,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL) -> Dict[str, Any]:
+    """
+    Run argv to completion with output captured to temp files, sampling its process
+    tree from /proc while it runs. Returns returncode, stdout, stderr, wall_sec and
+    `resources` (None when sampling is off or unsupported).
+    """
+    sample = interval and proc_sampler is not None and proc_sampler.available()
+    with tempfile.TemporaryFile("w+") as out, tempfile.TemporaryFile("w+") as err:
+        t0 = time.perf_counter()
+        try:
+            proc = subprocess.Popen(argv, cwd=cwd, env=env, stdout=out, stderr=err,
+                                    stdin=subprocess.PIPE if stdin_text is not None else subprocess.DEVNULL,
+                                    text=True, preexec_fn=preexec if os.name == "posix" else None)
+        except Exception as e:
+            return {"error": f"spawn failed: {e}"}
+        sampler = proc_sampler.ProcTreeSampler(proc.pid, interval) if sample else None
+        if sampler is not None:
+            sampler.start()
+        if stdin_text is not None:
+            try:
+                proc.stdin.write(stdin_text)
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        try:
+            # The sampler observes exit without reaping, so its last sample sees the final counters
+            if sampler is not None and not sampler.wait_exit(timeout):
+                raise subprocess.TimeoutExpired(argv, timeout)
+            proc.wait(timeout=max(0.0, timeout - (time.perf_counter() - t0)))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            if sampler is not None:
+                sampler.stop()
+            return {"error": f"timeout after {timeout}s"}
+        wall = time.perf_counter() - t0
+        resources = sampler.stop() if sampler is not None else None
+        out.seek(0)
+        err.seek(0)
+        return {"returncode": proc.returncode, "stdout": out.read(), "stderr": err.read(),
+                "wall_sec": wall, "resources": resources}
+
+
+def _run_command(cfg: Dict[str, Any], project_path: str, cpus, timeout: float) -> Dict[str, Any]:
+    cmd = cfg["command"]
+    argv = shlex.split(cmd) if isinstance(cmd, str) else [str(a) for a in cmd]
+    env = dict(os.environ, **{k: str(v) for k, v in (cfg.get("env") or {}).items()})
+    run = _run_sampled(argv, project_path, timeout, env=env, preexec=_preexec(cpus, cfg.get("mem_mb")),
+                       interval=float(cfg.get("sample_interval", DEFAULT_SAMPLE_INTERVAL)))
+    if run.get("error"):
+        return run
+    if run["returncode"] != 0:
+        return {"error": f"exit {run['returncode']}", "stderr": (run["stderr"] or "")[-2000:]}
+    return {"wall_sec": run["wall_sec"], "output": run["stdout"] or "", "resources": run["resources"]}
+
+
+def _run_callable(cfg: Dict[str, Any], project_path: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    run = _run_sampled(sandbox.child_command(Path(__file__)), project_path, timeout,
+                       preexec=sandbox._limits(cfg.get("mem_mb"), None), stdin_text=json.dumps(payload),
+                       interval=float(cfg.get("sample_interval", DEFAULT_SAMPLE_INTERVAL)))
+    if run.get("error"):
+        return run
+    lines = [ln for ln in (run["stdout"] or "").splitlines() if ln.strip()]
+    try:
+        res = json.loads(lines[-1]) if lines else {"error": f"child exited with {run['returncode']}"}
+    except Exception:
+        res = {"error": "unparseable child output"}
+    if res.get("error"):
+        res["stderr"] = (run["stderr"] or "")[-2000:]
+    res["resources"] = run["resources"]
+    return res
+
+
+def run_harness(cfg: Dict[str, Any], project_path: str) -> Dict[str, Any]:
+    """
+    Run a declared benchmark: `warmup` discarded iterations, then `repetitions`
+    measured ones, each under the timeout and pinned to `cpus`. Returns the
+    sample vector plus summary stats; metric defaults to wall time when no
+    metric can be parsed.
+    """
+    warmup = int(cfg.get("warmup", DEFAULT_WARMUP))
+    reps = max(1, int(cfg.get("repetitions", DEFAULT_REPETITIONS)))
+    timeout = float(cfg.get("timeout", DEFAULT_TIMEOUT_SEC))
+    cpus = _affinity(cfg.get("cpus"))
+    metric = cfg.get("metric") or WALL_TIME_METRIC
+    meta = {"warmup": warmup, "repetitions": reps, "timeout": timeout, "cpus": cpus,
+            "kind": "command" if cfg.get("command") else "callable"}
+
+    if cfg.get("callable"):
+        if sandbox is None:
+            return {"error": "sandbox unavailable", "harness": meta}
+        payload = {"callable": cfg["callable"], "project_path": project_path, "warmup": warmup,
+                   "repetitions": reps, "cpus": cpus}
+        res = _run_callable(cfg, project_path, payload, timeout * (warmup + reps))
+        if res.get("error"):
+            return {"error": res["error"], "stderr": res.get("stderr"), "harness": meta}
+        # One child runs warm-up and measured iterations, so its sample covers both
+        runs = [res["resources"]] if res.get("resources") else []
+        values, walls = res.get("values") or [], res.get("wall_sec") or []
+        samples = walls
+        # Return values are the metric only when one is declared, as for commands' output
+        if cfg.get("metric") or cfg.get("parse"):
+            samples = []
+            for i, v in enumerate(values):
+                value = float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else \
+                    parse_metric(cfg, v if isinstance(v, str) else json.dumps(v))
+                if value is None:
+                    return {"error": f"metric '{metric}' not found in callable return value", "iteration": i,
+                            "output": repr(v)[-2000:], "harness": meta}
+                samples.append(value)
+    else:
+        samples, walls, runs = [], [], []
+        for i in range(warmup + reps):
+            run = _run_command(cfg, project_path, cpus, timeout)
+            if run.get("error"):
+                return {"error": run["error"], "stderr": run.get("stderr"), "iteration": i, "harness": meta}
+            if i < warmup:
+                continue
+            walls.append(run["wall_sec"])
+            if run.get("resources"):
+                runs.append(run["resources"])
+            value = parse_metric(cfg, run["output"]) if cfg.get("metric") or cfg.get("parse") else None
+            if value is None and (cfg.get("metric") or cfg.get("parse")):
+                return {"error": f"metric '{metric}' not found in output", "iteration": i,
+                        "output": run["output"][-2000:], "harness": meta}
+            samples.append(value if value is not None else run["wall_sec"])
+
+    return {
+        "metric": metric,
+        "unit": cfg.get("unit") or ("s" if metric == WALL_TIME_METRIC else None),
+        "lower_is_better": bool(cfg.get("lower_is_better", metric == WALL_TIME_METRIC)),
+        "samples": samples,
+        "wall_sec": walls,
+        "stats": summarize(samples),
+        "resources": _resources(runs),
+        "harness": meta,
+    }
+
+
+def _resources(runs: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not runs:
+        return None
+    return {
+        "interval_sec": runs[0]["interval_sec"],
+        "summary": proc_sampler.aggregate(runs),
+        "runs": [{"summary": r["summary"], "series": r["series"]} for r in runs],
+    }
+
+
+def _child_main() -> None:
+    """Subprocess entry point for callable benchmarks; reads JSON from stdin."""
+    payload = json.loads(sys.stdin.read() or "{}")
+    real_stdout = sys.stdout
+    result: Dict[str, Any] = {}
+    sys.stdout = sys.stderr
+    try:
+        if payload.get("cpus") and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, payload["cpus"])
+        sys.path.insert(0, payload.get("project_path") or os.getcwd())
+        mod_name, _, fn_name = payload["callable"].partition(":")
+        fn = getattr(importlib.import_module(mod_name), fn_name)
+        values, walls = [], []
+        for i in range(int(payload.get("warmup", 0)) + int(payload.get("repetitions", 1))):
+            t0 = time.perf_counter()
+            value = fn()
+            wall = time.perf_counter() - t0
+            if i >= int(payload.get("warmup", 0)):
+                walls.append(wall)
+                # Numbers, strings and dicts go back as-is; the parent decides whether they are the metric
+                values.append(value if isinstance(value, (int, float, str, dict)) else None)
+        result = {"values": values, "wall_sec": walls}
+    except BaseException as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        sys.stdout = real_stdout
+    real_stdout.write(json.dumps(result) + "\n")
+    real_stdout.flush()
+
+
+if __name__ == "__main__":
+    _child_main()
@@ -0,0 +1,127 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    from . import benchmark
+    from . import bench_harness
+except Exception:
+    benchmark = None
+    bench_harness = None
+
+# CPUs left unpinned for the API server and samplers when the machine has enough cores
+RESERVED_CPUS = 1
+MIN_CPUS_TO_RESERVE = 3
+
+
+def available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan(runs: List[Dict[str, Any]], cpus: List[int], max_parallel: Optional[int] = None,
+         cpus_per_run: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Split `cpus` into disjoint, equally sized sets for the non-exclusive runs.
+    Concurrency is capped by `max_parallel` and by how many whole sets fit.
+    """
+    pool = list(cpus)
+    reserved: List[int] = []
+    if len(pool) >= MIN_CPUS_TO_RESERVE:
+        reserved, pool = pool[:RESERVED_CPUS], pool[RESERVED_CPUS:]
+    shared = [r for r in runs if not r.get("exclusive")]
+    want = max(1, min(len(shared) or 1, int(max_parallel) if max_parallel else len(pool)))
+    per = max(1, int(cpus_per_run) if cpus_per_run else len(pool) // want)
+    slots = max(1, min(want, len(pool) // per))
+    sets = [pool[i * per:(i + 1) * per] for i in range(slots)]
+    return {"cpus": list(cpus), "reserved": reserved, "cpus_per_run": per, "concurrency": slots, "sets": sets}
+
+
+def _run_one(spec: Dict[str, Any], project_path: str, data_dir: Optional[Path], cpus: Optional[List[int]],
+             force: bool) -> Dict[str, Any]:
+    domain = (spec.get("domain") or "").lower().strip()
+    config = spec.get("config")
+    if config is None and bench_harness is not None:
+        config = bench_harness.load_config(project_path, domain)
+    # Only harness subprocesses can be isolated (children inherit the set via preexec).
+    # Simulated runners execute in-process on pool threads sharing the GIL, so they
+    # are left unpinned and reported as such.
+    pinned = bool(cpus) and bool(config) and hasattr(os, "sched_setaffinity")
+    if pinned:
+        config = dict(config, cpus=list(cpus))
+    t0 = time.time()
+    try:
+        out = benchmark.run_benchmark(domain, project_path, spec.get("baselinePath"), config=config or None,
+                                      data_dir=data_dir, force=force)
+        res = {"domain": domain, "status": "ok", "benchmark": out}
+    except Exception as e:
+        res = {"domain": domain, "status": "error", "detail": str(e)}
+    t1 = time.time()
+    res["isolation"] = {
+        "cpus": list(cpus) if pinned else None,
+        "pinned": pinned,
+        "pin_scope": "subprocess" if pinned else None,
+        "simulated": not config,
+        "exclusive": bool(spec.get("exclusive")),
+        "started": t0,
+        "finished": t1,
+        "wall_sec": round(t1 - t0, 4),
+    }
+    return res
+
+
+def run_scheduled(runs: List[Dict[str, Any]], project_path: str, data_dir: Optional[Path] = None,
+                  max_parallel: Optional[int] = None, cpus_per_run: Optional[int] = None,
+                  force: bool = False) -> Dict[str, Any]:
+    """
+    Run several domain benchmarks: shared runs concurrently on disjoint CPU sets,
+    then `exclusive` runs one at a time with every CPU. Returns one combined report
+    in request order with per-run isolation metadata.
+    """
+    cpus = available_cpus()
+    layout = plan(runs, cpus, max_parallel, cpus_per_run)
+    slots: "queue.Queue[List[int]]" = queue.Queue()
+    for s in layout["sets"]:
+        slots.put(s)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(runs)
+    lock = threading.Lock()
+    t0 = time.time()
+
+    def shared(idx: int) -> None:
+        cpu_set = slots.get()
+        try:
+            res = _run_one(runs[idx], project_path, data_dir, cpu_set, force)
+        finally:
+            slots.put(cpu_set)
+        res["isolation"]["phase"] = "parallel"
+        with lock:
+            results[idx] = res
+
+    shared_idx = [i for i, r in enumerate(runs) if not r.get("exclusive")]
+    with ThreadPoolExecutor(max_workers=layout["concurrency"], thread_name_prefix="bench-sched") as ex:
+        for f in [ex.submit(shared, i) for i in shared_idx]:
+            f.result()
+    for i, r in enumerate(runs):
+        if r.get("exclusive"):
+            res = _run_one(r, project_path, data_dir, None, force)
+            res["isolation"]["phase"] = "serial"
+            results[i] = res
+    wall = time.time() - t0
+
+    done = [r for r in results if r is not None]
+    for r in done:
+        iso = r["isolation"]
+        iso["overlapped_with"] = [o["domain"] for o in done if o is not r
+                                  and o["isolation"]["started"] < iso["finished"]
+                                  and iso["started"] < o["isolation"]["finished"]]
+    return {
+        "project_path": project_path,
+        "schedule": {**layout, "wall_sec": round(wall, 4),
+                     "serial_sec": round(sum(r["isolation"]["wall_sec"] for r in done), 4)},
+        "runs": done,
+    }
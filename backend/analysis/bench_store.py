@@ -0,0 +1,379 @@
+import json
+import math
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+DB_NAME = "benchmarks.sqlite"
+# Raw rows older than this are rolled up into daily buckets and deleted
+RAW_RETENTION_DAYS = 180
+DAY_SEC = 86400
+RETENTION_EVERY = 500
+IMPORT_BATCH = 5000
+DEFAULT_WINDOW = 500
+MAX_HISTORY_POINTS = 5000
+# Change-point detection: minimum points per segment and relative step size
+MIN_SEGMENT = 5
+DEFAULT_MIN_STEP = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    project TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    unit TEXT,
+    lower_is_better INTEGER,
+    simulated INTEGER NOT NULL DEFAULT 0,
+    n_samples INTEGER,
+    record TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_series ON runs (project, domain, metric, ts);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    project TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (project, domain, metric, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series (
+    project TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    PRIMARY KEY (project, domain, metric)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def db_path(data_dir: Path) -> Path:
+    return Path(data_dir) / DB_NAME
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _row(record: Dict[str, Any]) -> Optional[tuple]:
+    """(ts, project, domain, metric, value, ...) for a /benchmark record, or None if it has no metric value."""
+    bench = record.get("result") or {}
+    res = bench.get("result") or {}
+    value = res.get("value")
+    if not isinstance(value, (int, float)) or not res.get("metric"):
+        return None
+    lib = res.get("lower_is_better")
+    return (
+        float(record.get("timestamp") or bench.get("finished") or time.time()),
+        str(record.get("path") or bench.get("project_path") or ""),
+        str(record.get("domain") or bench.get("domain") or res.get("domain") or ""),
+        res["metric"],
+        float(value),
+        res.get("unit"),
+        None if lib is None else int(bool(lib)),
+        int(bool((res.get("details") or {}).get("simulated"))),
+        len(res["samples"]) if isinstance(res.get("samples"), list) else None,
+        json.dumps(record),
+    )
+
+
+_INSERT = ("INSERT INTO runs (ts, project, domain, metric, value, unit, lower_is_better, simulated, n_samples, record) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+# Distinct series are tracked separately so listing them never scans runs
+_INSERT_SERIES = "INSERT OR IGNORE INTO series (project, domain, metric) VALUES (?, ?, ?)"
+
+
+def _insert(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    conn.executemany(_INSERT, rows)
+    conn.executemany(_INSERT_SERIES, {r[1:4] for r in rows})
+
+
+def record(data_dir: Path, rec: Dict[str, Any]) -> Optional[int]:
+    """Store one /benchmark record; periodically applies retention. Returns the row id."""
+    row = _row(rec)
+    if row is None:
+        return None
+    with closing(connect(db_path(data_dir))) as conn, conn:
+        rid = conn.execute(_INSERT, row).lastrowid
+        conn.execute(_INSERT_SERIES, row[1:4])
+        if rid % RETENTION_EVERY == 0:
+            _apply_retention(conn, time.time())
+    return rid
+
+
+def import_jsonl(data_dir: Path, jsonl: Path) -> Dict[str, Any]:
+    """Bulk-load a legacy benchmarks.jsonl; remembers how far it got so re-imports only add new lines."""
+    jsonl = Path(jsonl)
+    if not jsonl.exists():
+        return {"imported": 0, "skipped": 0, "reason": "no such file"}
+    imported = skipped = 0
+    with closing(connect(db_path(data_dir))) as conn:
+        key = f"import_offset:{jsonl.resolve()}"
+        got = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        offset = int(got[0]) if got else 0
+        if offset > jsonl.stat().st_size:
+            offset = 0
+        batch: List[tuple] = []
+        with jsonl.open("rb") as fh, conn:
+            fh.seek(offset)
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                try:
+                    row = _row(json.loads(line))
+                except Exception:
+                    row = None
+                if row is None:
+                    skipped += 1
+                    continue
+                batch.append(row)
+                if len(batch) >= IMPORT_BATCH:
+                    _insert(conn, batch)
+                    imported += len(batch)
+                    batch = []
+            if batch:
+                _insert(conn, batch)
+                imported += len(batch)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(offset)))
+    return {"imported": imported, "skipped": skipped}
+
+
+def _apply_retention(conn: sqlite3.Connection, now: float) -> int:
+    """Fold raw rows older than the retention horizon into daily rollups and delete them."""
+    cutoff = (int(now - RAW_RETENTION_DAYS * DAY_SEC) // DAY_SEC) * DAY_SEC
+    rows = conn.execute(
+        "SELECT project, domain, metric, CAST(ts / ? AS INTEGER) AS day, COUNT(*), AVG(value), MIN(value), MAX(value) "
+        "FROM runs WHERE ts < ? GROUP BY project, domain, metric, day", (DAY_SEC, cutoff)).fetchall()
+    for project, domain, metric, day, n, mean, lo, hi in rows:
+        old = conn.execute("SELECT n, mean, min, max FROM rollups WHERE project=? AND domain=? AND metric=? AND day=?",
+                           (project, domain, metric, day)).fetchone()
+        if old:
+            total = old[0] + n
+            mean = (old[1] * old[0] + mean * n) / total
+            n, lo, hi = total, min(lo, old[2]), max(hi, old[3])
+        conn.execute("INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     (project, domain, metric, day, n, mean, lo, hi))
+    return conn.execute("DELETE FROM runs WHERE ts < ?", (cutoff,)).rowcount
+
+
+def apply_retention(data_dir: Path, now: Optional[float] = None) -> Dict[str, Any]:
+    with closing(connect(db_path(data_dir))) as conn, conn:
+        return {"rolled_up": _apply_retention(conn, time.time() if now is None else now)}
+
+
+def _where(project: str, domain: Optional[str], metric: Optional[str]):
+    clauses, args = ["project = ?"], [project]
+    if domain:
+        clauses.append("domain = ?")
+        args.append(domain)
+    if metric:
+        clauses.append("metric = ?")
+        args.append(metric)
+    return " AND ".join(clauses), args
+
+
+def series_keys(data_dir: Path, project: str, domain: Optional[str] = None,
+                metric: Optional[str] = None) -> List[Dict[str, str]]:
+    where, args = _where(project, domain, metric)
+    with closing(connect(db_path(data_dir))) as conn:
+        rows = conn.execute(f"SELECT domain, metric FROM series WHERE {where}", args).fetchall()
+    return [{"domain": d, "metric": m} for d, m in rows]
+
+
+def history(data_dir: Path, project: str, domain: Optional[str] = None, metric: Optional[str] = None,
+            since: Optional[float] = None, until: Optional[float] = None, bucket_sec: Optional[float] = None,
+            limit: int = MAX_HISTORY_POINTS, include_simulated: bool = True) -> Dict[str, Any]:
+    """
+    Windowed series per (domain, metric): the latest `limit` raw points of each, or
+    avg/min/max per `bucket_sec` when given. Days already rolled up by retention are
+    returned as daily buckets.
+    """
+    where, args = _where(project, domain, metric)
+    raw_where, raw_args = "project = ? AND domain = ? AND metric = ?", []
+    if since is not None:
+        raw_where += " AND ts >= ?"
+        raw_args.append(float(since))
+    if until is not None:
+        raw_where += " AND ts < ?"
+        raw_args.append(float(until))
+    if not include_simulated:
+        raw_where += " AND simulated = 0"
+    limit = max(1, min(int(limit), MAX_HISTORY_POINTS))
+    out: Dict[str, Dict[str, Any]] = {}
+
+    def series(d, m):
+        return out.setdefault(f"{d}/{m}", {"domain": d, "metric": m, "points": [], "rollups": []})
+
+    with closing(connect(db_path(data_dir))) as conn:
+        # `limit` applies per series, each query walking the (project, domain, metric, ts) index
+        keys = conn.execute(f"SELECT domain, metric FROM series WHERE {where} ORDER BY domain, metric",
+                            args).fetchall()
+        for d, m in keys:
+            key_args = [project, d, m] + raw_args + [limit]
+            if bucket_sec:
+                b = float(bucket_sec)
+                rows = conn.execute(
+                    f"SELECT CAST(ts / ? AS INTEGER) AS bucket, COUNT(*), AVG(value), MIN(value), MAX(value) "
+                    f"FROM runs WHERE {raw_where} GROUP BY bucket ORDER BY bucket DESC LIMIT ?",
+                    [b] + key_args).fetchall()
+                for bucket, n, mean, lo, hi in reversed(rows):
+                    series(d, m)["points"].append({"ts": bucket * b, "n": n, "mean": mean, "min": lo, "max": hi})
+            else:
+                rows = conn.execute(
+                    f"SELECT ts, value, simulated FROM runs WHERE {raw_where} ORDER BY ts DESC LIMIT ?",
+                    key_args).fetchall()
+                for ts, value, sim in reversed(rows):
+                    series(d, m)["points"].append({"ts": ts, "value": value, "simulated": bool(sim)})
+        roll_where, roll_args = where, list(args)
+        if since is not None:
+            roll_where += " AND day >= ?"
+            roll_args.append(int(float(since) // DAY_SEC))
+        if until is not None:
+            roll_where += " AND day < ?"
+            roll_args.append(int(math.ceil(float(until) / DAY_SEC)))
+        for d, m, day, n, mean, lo, hi in conn.execute(
+                f"SELECT domain, metric, day, n, mean, min, max FROM rollups WHERE {roll_where} ORDER BY day",
+                roll_args).fetchall():
+            series(d, m)["rollups"].append({"ts": day * DAY_SEC, "n": n, "mean": mean, "min": lo, "max": hi})
+    return {"project": project, "bucket_sec": bucket_sec, "series": list(out.values())}
+
+
+def _segment_cost(s1, s2, i: int, j: int) -> float:
+    """Sum of squared deviations of x[i:j] from its mean, from prefix sums."""
+    n = j - i
+    tot = s1[j] - s1[i]
+    return (s2[j] - s2[i]) - tot * tot / n
+
+
+def change_points(values: List[float], min_size: int = MIN_SEGMENT, penalty: Optional[float] = None) -> List[int]:
+    """
+    Binary segmentation for mean shifts: split where the squared-error reduction is
+    largest while it beats a BIC-style penalty scaled by a robust noise estimate
+    (MAD of first differences). Each split is O(n) via prefix sums.
+    """
+    n = len(values)
+    if n < 2 * min_size:
+        return []
+    if np is not None:
+        x = np.asarray(values, dtype=float)
+        s1 = np.concatenate([[0.0], np.cumsum(x)])
+        s2 = np.concatenate([[0.0], np.cumsum(x * x)])
+        diffs = np.abs(np.diff(x))
+        sigma = 1.4826 * float(np.median(diffs)) / math.sqrt(2.0)
+    else:
+        s1, s2 = [0.0], [0.0]
+        for v in values:
+            s1.append(s1[-1] + v)
+            s2.append(s2[-1] + v * v)
+        diffs = sorted(abs(values[k + 1] - values[k]) for k in range(n - 1))
+        sigma = 1.4826 * diffs[len(diffs) // 2] / math.sqrt(2.0)
+    if sigma <= 0:
+        sigma = 1e-12
+    if penalty is None:
+        penalty = 2.0 * math.log(n) * sigma * sigma
+
+    found: List[int] = []
+    stack = [(0, n)]
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2 * min_size:
+            continue
+        whole = _segment_cost(s1, s2, i, j)
+        if np is not None:
+            ks = np.arange(i + min_size, j - min_size + 1)
+            left_n, right_n = ks - i, j - ks
+            lt, rt = s1[ks] - s1[i], s1[j] - s1[ks]
+            cost = (s2[ks] - s2[i]) - lt * lt / left_n + (s2[j] - s2[ks]) - rt * rt / right_n
+            best = int(np.argmin(cost))
+            k, split = int(ks[best]), float(cost[best])
+        else:
+            k, split = min(((k, _segment_cost(s1, s2, i, k) + _segment_cost(s1, s2, k, j))
+                            for k in range(i + min_size, j - min_size + 1)), key=lambda t: t[1])
+        if whole - split > penalty:
+            found.append(k)
+            stack.extend([(i, k), (k, j)])
+    return sorted(found)
+
+
+def _fetch_window(conn: sqlite3.Connection, project: str, domain: str, metric: str, window: int,
+                  include_simulated: bool) -> List[tuple]:
+    sim = "" if include_simulated else " AND simulated = 0"
+    rows = conn.execute(
+        f"SELECT ts, value, lower_is_better FROM runs WHERE project = ? AND domain = ? AND metric = ?{sim} "
+        f"ORDER BY ts DESC LIMIT ?", (project, domain, metric, int(window))).fetchall()
+    rows.reverse()
+    return rows
+
+
+def regressions(data_dir: Path, project: str, domain: Optional[str] = None, metric: Optional[str] = None,
+                window: int = DEFAULT_WINDOW, min_step: float = DEFAULT_MIN_STEP,
+                include_simulated: bool = False, lower_is_better: Optional[Dict[str, bool]] = None) -> Dict[str, Any]:
+    """
+    Step changes in the latest `window` runs of each series. Each change point reports
+    the segment means on either side, the relative step and whether it is a regression
+    given the metric direction; steps smaller than `min_step` are dropped.
+    """
+    directions = lower_is_better or {}
+    keys = series_keys(data_dir, project, domain, metric)
+    out = []
+    with closing(connect(db_path(data_dir))) as conn:
+        for key in keys:
+            rows = _fetch_window(conn, project, key["domain"], key["metric"], window, include_simulated)
+            if not rows:
+                continue
+            values = [r[1] for r in rows]
+            stored = [r[2] for r in rows if r[2] is not None]
+            lib = bool(stored[-1]) if stored else bool(directions.get(key["metric"], False))
+            cps = change_points(values)
+            bounds = [0] + cps + [len(values)]
+            steps = []
+            for idx, cp in enumerate(cps):
+                before = values[bounds[idx]:cp]
+                after = values[cp:bounds[idx + 2]]
+                mb, ma = sum(before) / len(before), sum(after) / len(after)
+                if ma == mb:
+                    continue
+                # Relative change is undefined against a zero baseline; report None, keep the step
+                rel = (ma - mb) / abs(mb) if mb else None
+                if rel is not None and abs(rel) < min_step:
+                    continue
+                worse = ma > mb if lib else ma < mb
+                steps.append({
+                    "index": cp,
+                    "ts": rows[cp][0],
+                    "before_mean": mb,
+                    "after_mean": ma,
+                    "relative_change": rel,
+                    "kind": "regression" if worse else "improvement",
+                })
+            out.append({
+                "domain": key["domain"],
+                "metric": key["metric"],
+                "lower_is_better": lib,
+                "n": len(values),
+                "from_ts": rows[0][0],
+                "to_ts": rows[-1][0],
+                "change_points": steps,
+                "regressed": any(s["kind"] == "regression" for s in steps[-1:]),
+            })
+    return {"project": project, "window": window, "min_step": min_step, "series": out}
+
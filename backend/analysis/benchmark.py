@@ -1,8 +1,24 @@
 import json
+import math
 import time
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    from . import bench_harness
+except Exception:
+    bench_harness = None
+
+try:
+    from . import bench_cache
+except Exception:
+    bench_cache = None
+
 
 def _now_ts() -> float:
     return time.time()
@@ -102,6 +118,26 @@ def _medical_throughput(project_path: str) -> Dict[str, Any]:
     }
 
 
+# Metric metadata; harness results may override lower_is_better per run
+METRIC_META = {
+    "fps": {"unit": "fps", "lower_is_better": False},
+    "linpack_gflops": {"unit": "GFLOPS", "lower_is_better": False},
+    "slam_ate_m": {"unit": "m", "lower_is_better": True},
+    "control_loop_jitter_ms": {"unit": "ms", "lower_is_better": True},
+    "pipeline_throughput_mb_s": {"unit": "MB/s", "lower_is_better": False},
+    "inference_latency_ms": {"unit": "ms", "lower_is_better": True},
+    "samples_per_min": {"unit": "samples/min", "lower_is_better": False},
+    "runtime_sec": {"unit": "s", "lower_is_better": True},
+}
+
+# compare_results defaults
+DEFAULT_MIN_EFFECT = 0.02
+DEFAULT_ALPHA = 0.05
+DEFAULT_BOOTSTRAP = 2000
+# Cap on bootstrap matrix cells resampled at once (rows x samples)
+BOOTSTRAP_CHUNK_CELLS = 4_000_000
+
+
 DOMAIN_RUNNERS = {
     "gaming": _gaming_fps,
     "hpc": _hpc_linpack,
@@ -113,14 +149,79 @@ DOMAIN_RUNNERS = {
 }
 
 
-def run_benchmark(domain: str, project_path: str, baseline_path: Optional[str] = None) -> Dict[str, Any]:
+def _harness_result(domain: str, project_path: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    run = bench_harness.run_harness(config, project_path)
+    if run.get("error"):
+        tail = (run.get("stderr") or run.get("output") or "").strip()[-500:]
+        raise ValueError(f"benchmark harness failed: {run['error']}" + (f" ({tail})" if tail else ""))
+    return {
+        "domain": domain,
+        "metric": run["metric"],
+        "value": run["stats"]["median"],
+        "unit": run.get("unit"),
+        "lower_is_better": run["lower_is_better"],
+        "samples": run["samples"],
+        "stats": run["stats"],
+        "details": _harness_details(run),
+    }
+
+
+def _harness_details(run: Dict[str, Any]) -> Dict[str, Any]:
+    details = {"harness": run["harness"], "wall_sec": run["wall_sec"], "simulated": False}
+    res = run.get("resources")
+    if res:
+        summary = res["summary"]
+        details["cpu_util"] = summary.get("mean_cpu_pct")
+        details["mem_mb"] = summary.get("peak_rss_mb")
+        details["resources"] = res
+    return details
+
+
+def run_benchmark(domain: str, project_path: str, baseline_path: Optional[str] = None,
+                  config: Optional[Dict[str, Any]] = None, data_dir: Optional[Path] = None,
+                  force: bool = False) -> Dict[str, Any]:
+    """
+    Run the project's declared benchmark for `domain` (explicit `config`, else
+    <project>/.softpatent/benchmark.json) through the subprocess harness. Projects
+    without a declaration fall back to the simulated domain runner.
+
+    With `data_dir`, declared-benchmark results are cached under a hash of the project
+    tree, domain and config, and reused until one of them changes (`force` re-runs and
+    refreshes). The output carries a `cache` block describing the hit/miss; simulated
+    results are never cached.
+    """
     domain = (domain or "").lower().strip()
-    if domain not in DOMAIN_RUNNERS:
+    if config is None and bench_harness is not None and project_path:
+        config = bench_harness.load_config(project_path, domain)
+    if not config and domain not in DOMAIN_RUNNERS:
         raise ValueError(f"Unsupported domain: {domain}")
 
+    cache_meta = None
+    # Simulated runners draw random numbers rather than measuring, so only declared benchmarks are cached
+    if config and data_dir is not None and bench_cache is not None and project_path and Path(project_path).is_dir():
+        t0 = time.perf_counter()
+        tree = bench_cache.tree_hash(data_dir, project_path, skip=[str(data_dir)])
+        key = bench_cache.cache_key(tree["tree_hash"], domain, config or None)
+        cache_meta = {"key": key, "tree_hash": tree["tree_hash"], "files": tree["files"],
+                      "rehashed": tree["rehashed"], "hash_sec": round(time.perf_counter() - t0, 4),
+                      "forced": bool(force)}
+        hit = None if force else bench_cache.lookup(data_dir, key)
+        if hit is not None:
+            output = dict(hit["output"])
+            output["cache"] = dict(cache_meta, hit=True, created=hit["created"],
+                                   age_sec=round(time.time() - hit["created"], 3))
+            output["baseline_path"] = baseline_path
+            return output
+
     started = _now_ts()
-    runner = DOMAIN_RUNNERS[domain]
-    result = runner(project_path)
+    if config:
+        if bench_harness is None:
+            raise ValueError("benchmark harness unavailable")
+        result = _harness_result(domain, project_path, config)
+    else:
+        runner = DOMAIN_RUNNERS[domain]
+        result = runner(project_path)
+        result["details"]["simulated"] = True
     finished = _now_ts()
 
     output = {
@@ -132,10 +233,71 @@ def run_benchmark(domain: str, project_path: str, baseline_path: Optional[str] =
         "finished": finished,
         "duration_sec": round(finished - started, 3),
     }
+    if cache_meta is not None:
+        entry = bench_cache.store(data_dir, cache_meta["key"], cache_meta["tree_hash"], output)
+        output = dict(output, cache=dict(cache_meta, hit=False, created=entry["created"], age_sec=0.0))
     return output
 
 
-def compare_results(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+def _lower_is_better(metric: str, result: Dict[str, Any]) -> bool:
+    if isinstance(result.get("lower_is_better"), bool):
+        return result["lower_is_better"]
+    return bool(METRIC_META.get(metric, {}).get("lower_is_better", False))
+
+
+def _samples(result: Dict[str, Any]):
+    vals = result.get("samples")
+    if not isinstance(vals, list) or not vals:
+        vals = [result.get("value")]
+    return np.asarray([v for v in vals if isinstance(v, (int, float))], dtype=float)
+
+
+def _bootstrap_rel_change(b, a, n_boot: int, seed: int):
+    """Bootstrap distribution of (median(a) - median(b)) / |median(b)|, resampled in bounded chunks."""
+    rng = np.random.default_rng(seed)
+    per_chunk = max(1, BOOTSTRAP_CHUNK_CELLS // max(len(a), len(b)))
+    out = []
+    done = 0
+    while done < n_boot:
+        k = min(per_chunk, n_boot - done)
+        mb = np.median(b[rng.integers(0, len(b), size=(k, len(b)))], axis=1)
+        ma = np.median(a[rng.integers(0, len(a), size=(k, len(a)))], axis=1)
+        out.append((ma - mb) / np.where(mb == 0, np.nan, np.abs(mb)))
+        done += k
+    return np.concatenate(out)
+
+
+def _mann_whitney_u(b, a) -> Dict[str, float]:
+    """Two-sided Mann-Whitney U (normal approximation, tie- and continuity-corrected)."""
+    n1, n2 = len(a), len(b)
+    x = np.concatenate([a, b])
+    order = np.argsort(x, kind="mergesort")
+    xs = x[order]
+    group = np.cumsum(np.r_[True, xs[1:] != xs[:-1]]) - 1
+    counts = np.bincount(group)
+    ends = np.cumsum(counts)
+    avg_rank = ends - (counts - 1) / 2.0
+    ranks = np.empty(len(x))
+    ranks[order] = avg_rank[group]
+    u = float(ranks[:n1].sum() - n1 * (n1 + 1) / 2.0)
+    n = n1 + n2
+    ties = float((counts ** 3 - counts).sum())
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - ties / (n * (n - 1)))) if n > 1 else 0.0
+    if sigma == 0:
+        return {"u": u, "z": 0.0, "p_value": 1.0}
+    mu = n1 * n2 / 2.0
+    z = (u - mu - math.copysign(0.5, u - mu)) / sigma if u != mu else 0.0
+    return {"u": u, "z": z, "p_value": math.erfc(abs(z) / math.sqrt(2.0))}
+
+
+def compare_results(before: Dict[str, Any], after: Dict[str, Any], min_effect: float = DEFAULT_MIN_EFFECT,
+                    alpha: float = DEFAULT_ALPHA, n_boot: int = DEFAULT_BOOTSTRAP, seed: int = 0) -> Dict[str, Any]:
+    """
+    Compare two benchmark runs. With sample vectors, reports the relative change of
+    medians with a bootstrap 95% CI and a Mann-Whitney U p-value, and classifies the
+    run as improved/regressed only when the change is significant (p < alpha, CI
+    excluding 0) and at least `min_effect` in size; otherwise inconclusive.
+    """
     if not before or not after:
         return {"error": "missing before/after results"}
     if before.get("result", {}).get("metric") != after.get("result", {}).get("metric"):
@@ -145,22 +307,49 @@ def compare_results(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str,
     before_v = before["result"]["value"]
     after_v = after["result"]["value"]
     delta = after_v - before_v
-
-    # Define which metrics are lower-is-better
-    lower_is_better = {
-        "slam_ate_m",
-        "control_loop_jitter_ms",
-        "inference_latency_ms",
-    }
-    improved = (delta < 0) if metric in lower_is_better else (delta > 0)
-
-    return {
+    lower_better = _lower_is_better(metric, after["result"])
+    out = {
         "metric": metric,
         "before": before_v,
         "after": after_v,
         "delta": delta,
-        "improved": improved,
+        "lower_is_better": lower_better,
+        "min_effect": min_effect,
+        "alpha": alpha,
     }
+    if np is None:
+        out.update({"verdict": "inconclusive", "improved": False, "reason": "numpy not installed"})
+        return out
+
+    b, a = _samples(before["result"]), _samples(after["result"])
+    out["n_before"], out["n_after"] = int(len(b)), int(len(a))
+    if len(b) < 2 or len(a) < 2:
+        out.update({"verdict": "inconclusive", "improved": False, "reason": "need at least 2 samples per run"})
+        return out
+
+    med_b, med_a = float(np.median(b)), float(np.median(a))
+    rel = (med_a - med_b) / abs(med_b) if med_b else float("nan")
+    boot = _bootstrap_rel_change(b, a, n_boot, seed)
+    boot = boot[np.isfinite(boot)]
+    ci = [float(np.percentile(boot, 2.5)), float(np.percentile(boot, 97.5))] if len(boot) else [float("nan")] * 2
+    test = _mann_whitney_u(b, a)
+    # Signed so that positive means "better" regardless of metric direction
+    gain = -rel if lower_better else rel
+    significant = test["p_value"] < alpha and (ci[0] > 0 or ci[1] < 0)
+    if not math.isfinite(rel) or not significant or abs(rel) < min_effect:
+        verdict = "inconclusive"
+    else:
+        verdict = "improved" if gain > 0 else "regressed"
+    out.update({
+        "median_before": med_b,
+        "median_after": med_a,
+        "relative_change": rel,
+        "ci95": ci,
+        "mann_whitney": test,
+        "verdict": verdict,
+        "improved": verdict == "improved",
+    })
+    return out
 
 
 def record_result(out_path: Path, payload: Dict[str, Any]) -> None:
@@ -0,0 +1,208 @@
+import ast
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Order matters: coefficients are persisted positionally (after the intercept).
+FEATURES = ["stmts", "loops", "calls", "max_loop_depth", "loop_calls", "comprehensions", "branches"]
+MIN_SAMPLES = len(FEATURES) + 3
+MAX_SAMPLES = 5000
+# Most recent samples kept per distinct feature vector; more only re-weight the fit
+MAX_PER_VECTOR = 20
+# samples.jsonl is compacted on every fit, and on append once it grows past this
+COMPACT_BYTES = 2 << 20
+# maybe_fit refits once this many samples arrived since the last fit (or no model exists)
+REFIT_EVERY = 50
+Z_95 = 1.96
+
+_LOOPS = (ast.For, ast.AsyncFor, ast.While)
+_COMPREHENSIONS = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+_samples_lock = threading.Lock()
+# Samples recorded per project since its last fit in this process
+_pending: Dict[str, int] = {}
+
+
+def project_id(project_path: str) -> str:
+    return hashlib.sha256(project_path.encode("utf-8")).hexdigest()[:16]
+
+
+def _dir(data_dir: Path) -> Path:
+    p = data_dir / "costmodel"
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def extract_features(fn_node: ast.AST) -> Dict[str, int]:
+    """AST feature vector for a function: sizes plus loop nesting and calls made inside loops."""
+    feats = {k: 0 for k in FEATURES}
+
+    def visit(node: ast.AST, loop_depth: int) -> None:
+        for child in ast.iter_child_nodes(node):
+            depth = loop_depth
+            if isinstance(child, ast.stmt):
+                feats["stmts"] += 1
+            if isinstance(child, _LOOPS):
+                feats["loops"] += 1
+                depth += 1
+                feats["max_loop_depth"] = max(feats["max_loop_depth"], depth)
+            elif isinstance(child, _COMPREHENSIONS):
+                feats["comprehensions"] += 1
+                depth += 1
+                feats["max_loop_depth"] = max(feats["max_loop_depth"], depth)
+            elif isinstance(child, (ast.If, ast.IfExp)):
+                feats["branches"] += 1
+            elif isinstance(child, ast.Call):
+                feats["calls"] += 1
+                if loop_depth:
+                    feats["loop_calls"] += 1
+            visit(child, depth)
+
+    visit(fn_node, 0)
+    return feats
+
+
+def _vector(features: Dict[str, Any]) -> List[float]:
+    return [1.0] + [float(features.get(k, 0)) for k in FEATURES]
+
+
+def record_samples(data_dir: Path, pid: str, profile: Dict[str, Any], source: str = "microprofiler") -> int:
+    """
+    Append (features, measured runtime_ms) pairs from a profile whose targets carry
+    `features` and `measured: True`. Returns the number of samples recorded.
+    """
+    rows = []
+    for name, m in (profile.get("targets") or {}).items():
+        if not m.get("measured") or not m.get("features"):
+            continue
+        rows.append({"ts": time.time(), "source": source, "target": name,
+                     "features": m["features"], "runtime_ms": m.get("runtime_ms")})
+    if rows:
+        f = _dir(data_dir) / f"{pid}.samples.jsonl"
+        with _samples_lock:
+            with f.open("a", encoding="utf-8") as fh:
+                for r in rows:
+                    fh.write(json.dumps(r) + "\n")
+            if f.stat().st_size > COMPACT_BYTES:
+                _compact(f)
+            _pending[pid] = _pending.get(pid, 0) + len(rows)
+    return len(rows)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _compact(f: Path) -> List[Dict[str, Any]]:
+    """
+    Keep the newest MAX_PER_VECTOR samples per feature vector (MAX_SAMPLES overall),
+    rewriting the file when anything was dropped. Caller holds _samples_lock.
+    """
+    if not f.exists():
+        return []
+    lines = f.read_text(encoding="utf-8").splitlines()
+    kept: List[Dict[str, Any]] = []
+    per_vector: Dict[str, int] = {}
+    for line in reversed(lines):
+        try:
+            row = json.loads(line)
+        except Exception:
+            continue
+        if not isinstance(row.get("runtime_ms"), (int, float)) or not isinstance(row.get("features"), dict):
+            continue
+        vec = json.dumps([row["features"].get(k, 0) for k in FEATURES])
+        if per_vector.get(vec, 0) >= MAX_PER_VECTOR:
+            continue
+        per_vector[vec] = per_vector.get(vec, 0) + 1
+        kept.append(row)
+        if len(kept) >= MAX_SAMPLES:
+            break
+    kept.reverse()
+    if len(kept) < len(lines):
+        _write_atomic(f, "".join(json.dumps(r) + "\n" for r in kept))
+    return kept
+
+
+def _load_samples(data_dir: Path, pid: str) -> List[Dict[str, Any]]:
+    with _samples_lock:
+        return _compact(_dir(data_dir) / f"{pid}.samples.jsonl")
+
+
+def fit(data_dir: Path, pid: str) -> Dict[str, Any]:
+    """
+    Least-squares fit of runtime_ms over FEATURES for one project and persist it.
+    Stores the coefficient covariance so predictions can carry a 95% interval.
+    """
+    if np is None:
+        return {"error": "numpy not installed"}
+    samples = _load_samples(data_dir, pid)
+    if len(samples) < MIN_SAMPLES:
+        return {"error": f"need at least {MIN_SAMPLES} samples, have {len(samples)}"}
+    X = np.array([_vector(s["features"]) for s in samples], dtype=float)
+    y = np.array([s["runtime_ms"] for s in samples], dtype=float)
+    coef, _, rank, _ = np.linalg.lstsq(X, y, rcond=None)
+    resid = y - X @ coef
+    dof = max(1, len(y) - int(rank))
+    sigma2 = float(resid @ resid) / dof
+    model = {
+        "features": FEATURES,
+        "coef": coef.tolist(),
+        "sigma": sigma2 ** 0.5,
+        "xtx_inv": np.linalg.pinv(X.T @ X).tolist(),
+        "n": int(len(y)),
+        "r2": float(1.0 - (resid @ resid) / max(1e-12, float(((y - y.mean()) ** 2).sum()))),
+        "fitted_at": time.time(),
+    }
+    # Replaced atomically: load_model may read it concurrently
+    _write_atomic(_dir(data_dir) / f"{pid}.json", json.dumps(model, indent=2))
+    return model
+
+
+def maybe_fit(data_dir: Path, pid: str, model: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Refit when the project has no model yet or REFIT_EVERY samples arrived since the
+    last fit; otherwise None. `model` is the caller's already-loaded current model.
+    """
+    with _samples_lock:
+        pending = _pending.get(pid, 0)
+        if not pending or (model is not None and pending < REFIT_EVERY):
+            return None
+        _pending[pid] = 0
+    return fit(data_dir, pid)
+
+
+def load_model(data_dir: Path, pid: str) -> Optional[Dict[str, Any]]:
+    f = _dir(data_dir) / f"{pid}.json"
+    if f.exists():
+        try:
+            model = json.loads(f.read_text(encoding="utf-8"))
+            if model.get("features") == FEATURES:
+                return model
+        except Exception:
+            pass
+    return None
+
+
+def predict(model: Dict[str, Any], features: Dict[str, Any]) -> Dict[str, float]:
+    """Predicted runtime_ms with a 95% prediction interval; the lower bound is clamped at 0."""
+    x = _vector(features)
+    coef = model["coef"]
+    est = sum(c * v for c, v in zip(coef, x))
+    cov = model.get("xtx_inv") or []
+    leverage = sum(x[i] * cov[i][j] * x[j] for i in range(len(x)) for j in range(len(x))) if cov else 0.0
+    half = Z_95 * model.get("sigma", 0.0) * (1.0 + max(0.0, leverage)) ** 0.5
+    return {
+        "runtime_ms": max(0.0, est),
+        "ci_low": max(0.0, est - half),
+        "ci_high": max(0.0, est + half),
+    }
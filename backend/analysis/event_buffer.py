@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional
+
+RING_MAX_EVENTS = int(os.getenv("EVENT_BUFFER_MAX_EVENTS", "5000"))
+RING_MAX_BYTES = int(float(os.getenv("EVENT_BUFFER_MAX_MB", "8")) * (1 << 20))
+STATE_MAX_URIS = int(os.getenv("EVENT_STATE_MAX_URIS", "256"))
+STATE_MAX_BYTES = int(float(os.getenv("EVENT_STATE_MAX_MB", "64")) * (1 << 20))
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+# Heavy fields kept once per URI in the latest state rather than in every ring entry
+STATE_FIELDS = ("text",)
+# Edit deltas: applied to the URI's document, summarized in the ring, never merged into state
+DELTA_FIELDS = ("changes",)
+# Per-delta bookkeeping that would go stale if merged into the URI's state
+DELTA_META = ("baseVersion", "length")
+# Documents are mirrored as UTF-16-LE, the unit of VS Code's rangeOffset/rangeLength
+DOC_ENCODING = "utf-16-le"
+
+
+def _size(obj: Any) -> int:
+    return len(json.dumps(obj, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+class EventBuffer:
+    """
+    Recent editor events in memory, bounded by count and bytes. Ring entries are
+    slim (full-document fields are replaced by their size, deltas by a change
+    count); the latest state of each URI, including its reconstructed document,
+    is kept separately, LRU-evicted past its own URI/byte budget.
+    """
+
+    def __init__(self, max_events: int = RING_MAX_EVENTS, max_bytes: int = RING_MAX_BYTES,
+                 max_uris: int = STATE_MAX_URIS, max_state_bytes: int = STATE_MAX_BYTES):
+        self.max_events = max(1, int(max_events))
+        self.max_bytes = max(1, int(max_bytes))
+        self.max_uris = max(1, int(max_uris))
+        self.max_state_bytes = max(1, int(max_state_bytes))
+        self._ring: deque = deque()
+        self._ring_bytes = 0
+        self._state: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._state_bytes = 0
+        self._docs: Dict[str, bytearray] = {}
+        self._seq = 0
+        self._resyncs = 0
+        self._evicted = {"events": 0, "uris": 0}
+        self._lock = threading.Lock()
+
+    def add(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Record one event. Edits carrying `text` replace the URI's document; edits
+        carrying `changes` (VS Code contentChanges: rangeOffset, rangeLength, text)
+        are applied to it when `baseVersion` matches the mirrored version. Returns
+        {"seq", "resync"}; a non-null `resync` reason means the delta was dropped
+        and the client should send the full text.
+        """
+        uri = payload.get("uri") if isinstance(payload.get("uri"), str) and payload.get("uri") else None
+        slim = {k: v for k, v in payload.items() if k not in STATE_FIELDS and k not in DELTA_FIELDS}
+        for k in STATE_FIELDS:
+            if isinstance(payload.get(k), str):
+                slim[f"{k}_bytes"] = len(payload[k].encode("utf-8"))
+        changes = payload.get("changes")
+        if isinstance(changes, list):
+            slim["changes"] = len(changes)
+            slim["delta_chars"] = sum(len(str(c.get("text", ""))) for c in changes if isinstance(c, dict))
+        size = _size(slim)
+        with self._lock:
+            doc = None
+            if isinstance(payload.get("text"), str):
+                doc = bytearray(payload["text"].encode(DOC_ENCODING, "surrogatepass"))
+            elif uri is not None and isinstance(changes, list):
+                doc, reason = self._apply_delta(uri, payload, changes)
+                if reason:
+                    self._resyncs += 1
+                    return {"seq": None, "resync": reason}
+            self._seq += 1
+            slim["seq"] = self._seq
+            self._ring.append((self._seq, slim, size))
+            self._ring_bytes += size
+            while len(self._ring) > self.max_events or (self._ring_bytes > self.max_bytes and len(self._ring) > 1):
+                _, _, old = self._ring.popleft()
+                self._ring_bytes -= old
+                self._evicted["events"] += 1
+            if uri is not None:
+                self._update_state(uri, payload, self._seq, doc)
+            return {"seq": self._seq, "resync": None}
+
+    def _apply_delta(self, uri: str, payload: Dict[str, Any], changes: List[Any]):
+        """(new document, None) or (None, resync reason). Changes apply in order, as VS Code reports them."""
+        entry = self._state.get(uri)
+        doc = self._docs.get(uri)
+        if entry is None or doc is None:
+            return None, "unknown document"
+        base = payload.get("baseVersion")
+        if base is None or entry.get("version") != base:
+            return None, f"version gap: have {entry.get('version')}, delta based on {base}"
+        doc = bytearray(doc)
+        for c in changes:
+            try:
+                start, length = int(c["rangeOffset"]) * 2, int(c["rangeLength"]) * 2
+                text = str(c.get("text", "")).encode(DOC_ENCODING, "surrogatepass")
+            except (KeyError, TypeError, ValueError):
+                return None, "malformed change"
+            if start < 0 or length < 0 or start + length > len(doc):
+                return None, "change out of range"
+            doc[start:start + length] = text
+        if payload.get("length") is not None and payload["length"] != len(doc) // 2:
+            return None, f"length mismatch: have {len(doc) // 2}, client has {payload['length']}"
+        return doc, None
+
+    def _update_state(self, uri: str, payload: Dict[str, Any], seq: int, doc: Optional[bytearray]) -> None:
+        prev = self._state.pop(uri, None)
+        entry = dict(prev) if prev else {"uri": uri}
+        if prev:
+            self._state_bytes -= prev["bytes"]
+        entry.update({k: v for k, v in payload.items()
+                      if k not in ("uri", "bytes") and k not in STATE_FIELDS + DELTA_FIELDS + DELTA_META})
+        if doc is not None:
+            self._docs[uri] = doc
+            entry["doc_chars"] = len(doc) // 2
+        entry["seq"] = seq
+        entry["updated"] = payload.get("_received_at", time.time())
+        entry["bytes"] = _size(entry) + len(self._docs.get(uri, b""))
+        self._state[uri] = entry
+        self._state_bytes += entry["bytes"]
+        while len(self._state) > 1 and (len(self._state) > self.max_uris or self._state_bytes > self.max_state_bytes):
+            old_uri, old = self._state.popitem(last=False)
+            self._docs.pop(old_uri, None)
+            self._state_bytes -= old["bytes"]
+            self._evicted["uris"] += 1
+
+    def query(self, since: Optional[int] = None, limit: int = DEFAULT_LIMIT, type: Optional[str] = None,
+              uri: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Events in sequence order. With `since`, the first `limit` events after
+        that seq (for polling; continue from `last_seq`); otherwise the latest
+        `limit` events.
+        """
+        limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+        with self._lock:
+            ring = list(self._ring)
+            oldest = ring[0][0] if ring else None
+        match = [ev for seq, ev, _ in ring
+                 if (since is None or seq > since)
+                 and (type is None or ev.get("type") == type)
+                 and (uri is None or ev.get("uri") == uri)]
+        page = match[:limit] if since is not None else match[-limit:]
+        return {
+            "events": page,
+            "last_seq": page[-1]["seq"] if page else since,
+            "oldest_seq": oldest,
+            # Events between `since` and the oldest retained one were evicted
+            "gap": since is not None and oldest is not None and since + 1 < oldest,
+        }
+
+    def state(self, uri: Optional[str] = None, with_text: bool = False) -> Dict[str, Any]:
+        """Latest state per URI (LRU order, most recent last); document text only for one `uri` or `with_text`."""
+        with self._lock:
+            uris = [uri] if uri is not None else list(self._state)
+            items = [(k, dict(self._state[k]), bytes(self._docs[k]) if k in self._docs else None)
+                     for k in uris if k in self._state]
+        out = {}
+        for k, v, doc in items:
+            if doc is not None and (with_text or uri is not None):
+                v["text"] = doc.decode(DOC_ENCODING, "surrogatepass")
+            out[k] = v
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "events": len(self._ring),
+                "ring_bytes": self._ring_bytes,
+                "uris": len(self._state),
+                "state_bytes": self._state_bytes,
+                "total_bytes": self._ring_bytes + self._state_bytes,
+                "documents": len(self._docs),
+                "last_seq": self._seq,
+                "resyncs": self._resyncs,
+                "evicted": dict(self._evicted),
+                "limits": {"max_events": self.max_events, "max_bytes": self.max_bytes,
+                           "max_uris": self.max_uris, "max_state_bytes": self.max_state_bytes},
+            }
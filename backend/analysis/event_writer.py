@@ -0,0 +1,168 @@
+import asyncio
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+# Durability per flushed batch:
+#   "buffered" - write into the process buffer; the OS sees it when the buffer fills or on shutdown
+#   "flush"    - write + flush to the OS page cache (survives a process crash)
+#   "fsync"    - flush + fsync, and submitters wait for it (survives power loss)
+DURABILITY_MODES = ("buffered", "flush", "fsync")
+DEFAULT_DURABILITY = os.getenv("EVENT_DURABILITY", "flush")
+DEFAULT_QUEUE_MAX = int(os.getenv("EVENT_QUEUE_MAX", "10000"))
+DEFAULT_BATCH_MAX = int(os.getenv("EVENT_BATCH_MAX", "512"))
+DEFAULT_FLUSH_MS = float(os.getenv("EVENT_FLUSH_MS", "50"))
+LATENCY_WINDOW = 1024
+
+
+def _pct(values, p: float) -> Optional[float]:
+    if not values:
+        return None
+    s = sorted(values)
+    return round(s[min(len(s) - 1, int(len(s) * p))] * 1000.0, 3)
+
+
+class EventWriter:
+    """
+    Group-commit appender for an event log. Handlers `submit()` lines onto a
+    bounded queue (awaiting when it is full, which back-pressures clients); one
+    writer task drains up to `batch_max` lines or `flush_ms` worth, and writes
+    and flushes them in a worker thread so the event loop never blocks on disk.
+    """
+
+    def __init__(self, path: Path, durability: str = DEFAULT_DURABILITY, queue_max: int = DEFAULT_QUEUE_MAX,
+                 batch_max: int = DEFAULT_BATCH_MAX, flush_ms: float = DEFAULT_FLUSH_MS):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}")
+        self.path = Path(path)
+        self.durability = durability
+        self.queue_max = max(1, int(queue_max))
+        self.batch_max = max(1, int(batch_max))
+        self.flush_sec = max(0.0, float(flush_ms)) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._fh = None
+        self._flush_lat = deque(maxlen=LATENCY_WINDOW)
+        self._commit_lat = deque(maxlen=LATENCY_WINDOW)
+        self._stats = {"events": 0, "batches": 0, "bytes": 0, "errors": 0, "queue_full_waits": 0,
+                       "max_queue_depth": 0, "max_batch": 0, "last_error": None}
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.queue_max)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._queue
+
+    async def submit(self, lines: Union[str, List[str]], wait: Optional[bool] = None) -> None:
+        """
+        Queue one log line, or a list of them (without trailing newlines). Each line
+        is its own queue item, so batching and metrics count events. With `wait`
+        (default: only in "fsync" mode) return once the batches holding them are committed.
+        """
+        queue = self._ensure_started()
+        wait = self.durability == "fsync" if wait is None else wait
+        loop = asyncio.get_running_loop()
+        futs = []
+        for line in [lines] if isinstance(lines, str) else lines:
+            fut = loop.create_future() if wait else None
+            if queue.full():
+                self._stats["queue_full_waits"] += 1
+            await queue.put((line, time.perf_counter(), fut))
+            if fut is not None:
+                futs.append(fut)
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], queue.qsize())
+        if futs:
+            await asyncio.gather(*futs)
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = time.perf_counter() + self.flush_sec
+            while len(batch) < self.batch_max:
+                try:
+                    batch.append(queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._commit(batch)
+            for _ in batch:
+                queue.task_done()
+
+    async def _commit(self, batch: List[Tuple[str, float, Optional[asyncio.Future]]]) -> None:
+        data = "".join(line + "\n" for line, _, _ in batch)
+        t0 = time.perf_counter()
+        err = None
+        try:
+            await asyncio.to_thread(self._write, data)
+        except Exception as e:
+            err = e
+            self._stats["errors"] += 1
+            self._stats["last_error"] = str(e)
+        done = time.perf_counter()
+        self._flush_lat.append(done - t0)
+        self._stats["batches"] += 1
+        self._stats["events"] += len(batch)
+        self._stats["bytes"] += len(data)
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+        for _, queued_at, fut in batch:
+            self._commit_lat.append(done - queued_at)
+            if fut is not None and not fut.done():
+                if err is None:
+                    fut.set_result(None)
+                else:
+                    fut.set_exception(err)
+
+    def _write(self, data: str) -> None:
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(data)
+        if self.durability != "buffered":
+            self._fh.flush()
+        if self.durability == "fsync":
+            os.fsync(self._fh.fileno())
+
+    async def drain(self) -> None:
+        """Wait until everything queued so far is written."""
+        if self._queue is not None and self._task is not None and not self._task.done():
+            await self._queue.join()
+
+    async def close(self) -> None:
+        await self.drain()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        if self._fh is not None:
+            fh, self._fh = self._fh, None
+            await asyncio.to_thread(fh.close)
+
+    def metrics(self) -> Dict[str, Any]:
+        depth = self._queue.qsize() if self._queue is not None else 0
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "running": self._task is not None and not self._task.done(),
+            "durability": self.durability,
+            "queue_depth": depth,
+            "queue_max": self.queue_max,
+            "batch_max": self.batch_max,
+            "flush_ms": round(self.flush_sec * 1000.0, 3),
+            "mean_batch": round(self._stats["events"] / batches, 2) if batches else None,
+            "flush_latency_ms": {"p50": _pct(self._flush_lat, 0.5), "p99": _pct(self._flush_lat, 0.99),
+                                 "max": _pct(self._flush_lat, 1.0)},
+            "commit_latency_ms": {"p50": _pct(self._commit_lat, 0.5), "p99": _pct(self._commit_lat, 0.99),
+                                  "max": _pct(self._commit_lat, 1.0)},
+        }
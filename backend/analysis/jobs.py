@@ -0,0 +1,102 @@
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, Any, Callable, List, Optional
+
+MAX_EVENTS = 500
+MAX_FINISHED_JOBS = 100
+
+
+class Job:
+    """A background task with a bounded progress log, cancellation flag and final result."""
+
+    def __init__(self, kind: str, meta: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.meta = dict(meta or {})
+        self.status = "pending"
+        self.result: Optional[Dict[str, Any]] = None
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self._seq = 0
+        self._events: deque = deque(maxlen=MAX_EVENTS)
+        self._lock = threading.Lock()
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._seq += 1
+            self._events.append((self._seq, event))
+
+    def events_since(self, seq: int) -> List[tuple]:
+        with self._lock:
+            return [(s, e) for s, e in self._events if s > seq]
+
+    def to_dict(self, with_events: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            latest = self._events[-1][1] if self._events else None
+            out = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "meta": self.meta,
+                "started": self.started,
+                "finished": self.finished,
+                "progress": latest,
+                "result": self.result,
+            }
+            if with_events:
+                out["events"] = [e for _, e in self._events]
+        return out
+
+
+_jobs: Dict[str, Job] = {}
+_jobs_lock = threading.Lock()
+
+
+def _prune() -> None:
+    finished = sorted((j for j in _jobs.values() if j.done.is_set()), key=lambda j: j.finished or 0)
+    for j in finished[:-MAX_FINISHED_JOBS] if len(finished) > MAX_FINISHED_JOBS else []:
+        _jobs.pop(j.id, None)
+
+
+def start(kind: str, work: Callable[[Job], Dict[str, Any]], meta: Optional[Dict[str, Any]] = None) -> Job:
+    """Run `work(job)` on a daemon thread; its return value becomes job.result."""
+    job = Job(kind, meta)
+    with _jobs_lock:
+        _prune()
+        _jobs[job.id] = job
+
+    def runner():
+        job.status = "running"
+        try:
+            job.result = work(job)
+            if job.cancelled.is_set():
+                job.status = "cancelled"
+            elif isinstance(job.result, dict) and job.result.get("error"):
+                job.status = "error"
+            else:
+                job.status = "done"
+        except Exception as e:
+            job.result = {"error": str(e)}
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+            job.done.set()
+
+    threading.Thread(target=runner, name=f"job-{kind}-{job.id}", daemon=True).start()
+    return job
+
+
+def get(job_id: str) -> Optional[Job]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def cancel(job_id: str) -> Optional[Job]:
+    job = get(job_id)
+    if job is not None and not job.done.is_set():
+        job.cancelled.set()
+    return job
@@ -1,7 +1,29 @@
 import ast
+import contextlib
+import inspect
+import json
+import statistics
+import sys
 import time
+import timeit
 import tracemalloc
-from typing import Dict, Any, List
+import types
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    from . import sandbox
+except Exception:
+    sandbox = None
+try:
+    from . import costmodel
+except Exception:
+    costmodel = None
+
+# Per-call repetition settings for execution mode
+DEFAULT_REPEAT = 7
+DEFAULT_TIMEOUT_SEC = 20.0
+DEFAULT_MEM_MB = 512
 
 
 def _estimate_complexity(fn_node: ast.FunctionDef) -> int:
@@ -12,13 +34,33 @@ def _estimate_complexity(fn_node: ast.FunctionDef) -> int:
     return stmts + 3 * loops + calls
 
 
-def profile_code_regions(filename: str, code: str, targets: List[str]) -> Dict[str, Any]:
+def profile_code_regions(filename: str, code: str, targets: List[str], execute: bool = False,
+                         samples: Optional[Dict[str, Any]] = None, repeat: int = DEFAULT_REPEAT,
+                         timeout: float = DEFAULT_TIMEOUT_SEC, model: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
-    Lightweight micro-profiler. For safety and portability, we don't execute user code.
-    Instead, we parse and estimate runtime/memory impact based on AST structure.
-    Returns per-target metrics with estimated runtime_ms and mem_kb.
+    Lightweight micro-profiler. By default we don't execute user code and instead
+    estimate runtime/memory impact from AST structure. When a fitted per-project
+    cost `model` (see costmodel.fit) is given, runtime_ms comes from it together
+    with a 95% interval (runtime_ci_ms).
+    With execute=True the module is imported in an isolated subprocess and each target
+    is timed for real (see measure_code_regions); targets that cannot be measured fall
+    back to the AST estimate.
+    Returns per-target metrics with runtime_ms and mem_kb.
     """
-    out: Dict[str, Any] = {"targets": {}, "method": "ast-heuristic"}
+    if execute:
+        measured = measure_code_regions(filename, code, targets, samples=samples, repeat=repeat, timeout=timeout)
+        estimated = profile_code_regions(filename, code, targets, model=model)
+        for name, m in estimated.get("targets", {}).items():
+            if name in measured.get("targets", {}):
+                measured["targets"][name]["complexity"] = m["complexity"]
+                if "features" in m:
+                    measured["targets"][name]["features"] = m["features"]
+            else:
+                measured["targets"][name] = dict(m, measured=False)
+        return measured
+
+    calibrated = bool(model) and costmodel is not None
+    out: Dict[str, Any] = {"targets": {}, "method": "calibrated" if calibrated else "ast-heuristic"}
     try:
         tree = ast.parse(code, filename=filename)
     except SyntaxError as e:
@@ -39,6 +81,13 @@ def profile_code_regions(filename: str, code: str, targets: List[str]) -> Dict[s
             "runtime_ms": round(runtime_ms, 2),
             "mem_kb": round(mem_kb, 2)
         }
+        if costmodel is not None:
+            feats = costmodel.extract_features(node)
+            out["targets"][t]["features"] = feats
+            if calibrated:
+                pred = costmodel.predict(model, feats)
+                out["targets"][t]["runtime_ms"] = round(pred["runtime_ms"], 4)
+                out["targets"][t]["runtime_ci_ms"] = [round(pred["ci_low"], 4), round(pred["ci_high"], 4)]
     return out
 
 
@@ -49,11 +98,171 @@ def expected_impact_from_profile(before: Dict[str, Any]) -> Dict[str, Any]:
     """
     targets = before.get("targets", {})
     impacts: Dict[str, Any] = {}
+    measured = [m for m in targets.values() if m.get("measured")]
+    total_ms = sum(m.get("runtime_ms", 0.0) for m in measured) or 1.0
+    total_kb = sum(m.get("mem_kb", 0.0) for m in measured) or 1.0
+    calibrated_ms = sum(m.get("runtime_ms", 0.0) for m in targets.values()
+                        if not m.get("measured") and "runtime_ci_ms" in m) or 1.0
     for name, m in targets.items():
-        runtime_pct = -min(30.0, 0.5 * m.get("complexity", 0))  # higher complexity -> larger potential win
-        mem_pct = -min(20.0, 0.3 * m.get("complexity", 0))
+        if m.get("measured"):
+            # Scale potential win by the target's share of measured cost; noisy
+            # timings (high relative spread) are discounted.
+            rt_share = m.get("runtime_ms", 0.0) / total_ms
+            mem_share = m.get("mem_kb", 0.0) / total_kb
+            cv = m.get("runtime_cv", 0.0) or 0.0
+            confidence = max(0.2, 1.0 - cv)
+            runtime_pct = -min(30.0, 30.0 * rt_share * confidence)
+            mem_pct = -min(20.0, 20.0 * mem_share)
+            basis = "measured"
+        elif "runtime_ci_ms" in m:
+            # Calibrated estimate: same share-of-cost scaling, discounted by the
+            # relative width of the prediction interval.
+            est = m.get("runtime_ms", 0.0)
+            lo, hi = m["runtime_ci_ms"]
+            rel_width = ((hi - lo) / (2.0 * est)) if est > 0 else 1.0
+            confidence = max(0.2, 1.0 - rel_width)
+            runtime_pct = -min(30.0, 30.0 * (est / calibrated_ms) * confidence)
+            mem_pct = -min(20.0, 0.3 * m.get("complexity", 0))
+            basis = "calibrated"
+        else:
+            runtime_pct = -min(30.0, 0.5 * m.get("complexity", 0))  # higher complexity -> larger potential win
+            mem_pct = -min(20.0, 0.3 * m.get("complexity", 0))
+            basis = "ast-heuristic"
         impacts[name] = {
             "runtime_pct": round(runtime_pct, 1),
-            "mem_pct": round(mem_pct, 1)
+            "mem_pct": round(mem_pct, 1),
+            "basis": basis
         }
     return impacts
+
+
+def measure_code_regions(filename: str, code: str, targets: List[str], samples: Optional[Dict[str, Any]] = None,
+                         repeat: int = DEFAULT_REPEAT, timeout: float = DEFAULT_TIMEOUT_SEC,
+                         mem_mb: int = DEFAULT_MEM_MB) -> Dict[str, Any]:
+    """
+    Execution-based micro-benchmark. Imports `code` as a module (not as __main__) in a
+    child interpreter under rlimits and a wall-clock timeout, then times each target
+    with timeit-style repetition and records peak allocation with tracemalloc.
+    `samples` maps target name -> {"args": [...], "kwargs": {...}} (or a bare args list);
+    missing samples are auto-generated from defaults/annotations.
+    """
+    out: Dict[str, Any] = {"targets": {}, "method": "execution"}
+    if sandbox is None:
+        out["error"] = "sandbox unavailable"
+        return out
+    payload = {
+        "filename": filename,
+        "code": code,
+        "targets": list(targets or []),
+        "samples": samples or {},
+        "repeat": max(1, int(repeat)),
+    }
+    res = sandbox.run_json_child(Path(__file__), payload, timeout=timeout, mem_mb=mem_mb, cpu_sec=int(timeout) + 1)
+    if "error" in res and "targets" not in res:
+        out["error"] = res["error"]
+        if res.get("stderr"):
+            out["stderr"] = res["stderr"]
+        return out
+    out["targets"] = res.get("targets", {})
+    if res.get("errors"):
+        out["errors"] = res["errors"]
+    return out
+
+
+_AUTO_BY_ANNOTATION = {
+    int: lambda: 100,
+    float: lambda: 1.5,
+    str: lambda: "x" * 100,
+    bytes: lambda: b"x" * 100,
+    bool: lambda: True,
+    list: lambda: list(range(100)),
+    tuple: lambda: tuple(range(100)),
+    dict: lambda: {i: i for i in range(100)},
+    set: lambda: set(range(100)),
+}
+
+
+def _auto_args(fn) -> tuple:
+    """Build sample (args, kwargs) from parameter defaults, then annotations, else a small int."""
+    args: List[Any] = []
+    kwargs: Dict[str, Any] = {}
+    for p in inspect.signature(fn).parameters.values():
+        if p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD):
+            continue
+        if p.default is not p.empty:
+            continue
+        make = _AUTO_BY_ANNOTATION.get(p.annotation) if isinstance(p.annotation, type) else None
+        value = make() if make else 100
+        if p.kind == p.KEYWORD_ONLY:
+            kwargs[p.name] = value
+        else:
+            args.append(value)
+    return args, kwargs
+
+
+def _sample_args(fn, sample: Any) -> tuple:
+    if sample is None:
+        return _auto_args(fn)
+    if isinstance(sample, dict):
+        return list(sample.get("args", [])), dict(sample.get("kwargs", {}))
+    if isinstance(sample, (list, tuple)):
+        return list(sample), {}
+    return [sample], {}
+
+
+def _measure_callable(fn, args: List[Any], kwargs: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    call = lambda: fn(*args, **kwargs)  # noqa: E731
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    per_call_ms = [t / number * 1000.0 for t in timer.repeat(repeat=repeat, number=number)]
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    median = statistics.median(per_call_ms)
+    variance = statistics.pvariance(per_call_ms) if len(per_call_ms) > 1 else 0.0
+    return {
+        "runtime_ms": round(median, 6),
+        "runtime_var": variance,
+        "runtime_cv": round((variance ** 0.5) / median, 4) if median > 0 else 0.0,
+        "mem_kb": round(peak / 1024.0, 2),
+        "number": number,
+        "repeat": repeat,
+        "measured": True,
+    }
+
+
+def _child_main() -> None:
+    """Subprocess entry point for measure_code_regions; reads JSON from stdin."""
+    payload = json.loads(sys.stdin.read() or "{}")
+    result: Dict[str, Any] = {"targets": {}, "errors": {}}
+    real_stdout = sys.stdout
+    filename = payload.get("filename") or "<microprofile>"
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            sys.path.insert(0, str(Path(filename).resolve().parent))
+            mod = types.ModuleType("__microprofile__")
+            mod.__file__ = filename
+            sys.modules[mod.__name__] = mod
+            exec(compile(payload.get("code", ""), filename, "exec"), mod.__dict__)
+        except BaseException as e:
+            result["error"] = f"import failed: {e!r}"
+            mod = None
+        samples = payload.get("samples") or {}
+        for name in payload.get("targets", []) if mod is not None else []:
+            fn = getattr(mod, name, None)
+            if not callable(fn):
+                continue
+            try:
+                args, kwargs = _sample_args(fn, samples.get(name))
+                result["targets"][name] = _measure_callable(fn, args, kwargs, int(payload.get("repeat", DEFAULT_REPEAT)))
+            except BaseException as e:
+                result["errors"][name] = repr(e)
+    real_stdout.write(json.dumps(result) + "\n")
+    real_stdout.flush()
+
+
+if __name__ == "__main__":
+    _child_main()
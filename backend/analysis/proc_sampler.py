@@ -0,0 +1,233 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+PROC = Path("/proc")
+DEFAULT_INTERVAL_SEC = 0.05
+MAX_SERIES_POINTS = 300
+
+try:
+    CLK_TCK = os.sysconf("SC_CLK_TCK")
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except Exception:
+    CLK_TCK, PAGE_SIZE = 100, 4096
+
+
+def available() -> bool:
+    return (PROC / "self" / "stat").exists() and hasattr(os, "waitid")
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text()
+    except Exception:
+        return None
+
+
+def _stat(pid: int) -> Optional[Dict[str, int]]:
+    raw = _read(PROC / str(pid) / "stat")
+    if not raw:
+        return None
+    # comm may contain spaces/parens; fields resume after the last ')'
+    f = raw[raw.rfind(")") + 2:].split()
+    # f[0] is field 3 (state): utime=14, stime=15, cutime=16, cstime=17, rss=24
+    return {
+        "ppid": int(f[1]),
+        "cpu_ticks": int(f[11]) + int(f[12]) + int(f[13]) + int(f[14]),
+        "user_ticks": int(f[11]) + int(f[13]),
+        "sys_ticks": int(f[12]) + int(f[14]),
+        "rss": int(f[21]) * PAGE_SIZE,
+    }
+
+
+def _ctx_switches(pid: int) -> Dict[str, int]:
+    # /proc/<pid>/status only counts the leader thread; sum over tasks
+    vol = invol = 0
+    try:
+        tids = os.listdir(PROC / str(pid) / "task")
+    except Exception:
+        tids = []
+    for tid in tids:
+        for line in (_read(PROC / str(pid) / "task" / tid / "status") or "").splitlines():
+            if line.startswith("voluntary_ctxt_switches:"):
+                vol += int(line.split()[1])
+            elif line.startswith("nonvoluntary_ctxt_switches:"):
+                invol += int(line.split()[1])
+    return {"ctx_voluntary": vol, "ctx_involuntary": invol}
+
+
+def _io(pid: int) -> Dict[str, int]:
+    out = {"read_bytes": 0, "write_bytes": 0}
+    for line in (_read(PROC / str(pid) / "io") or "").splitlines():
+        key, _, val = line.partition(":")
+        if key in out:
+            out[key] = int(val)
+    return out
+
+
+def _children(pid: int) -> List[int]:
+    kids: List[int] = []
+    try:
+        tids = os.listdir(PROC / str(pid) / "task")
+    except Exception:
+        return kids
+    for tid in tids:
+        raw = _read(PROC / str(pid) / "task" / tid / "children")
+        if raw:
+            kids.extend(int(c) for c in raw.split())
+    return kids
+
+
+def process_tree(root: int) -> List[int]:
+    seen: Set[int] = set()
+    stack = [root]
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        stack.extend(_children(pid))
+    return sorted(seen)
+
+
+def _decimate(series: Dict[str, list], n: int) -> Dict[str, list]:
+    size = len(series["t"])
+    if size <= n:
+        return series
+    step = size / float(n)
+    idx = sorted({int(i * step) for i in range(n)} | {size - 1})
+    return {k: [v[i] for i in idx] for k, v in series.items()}
+
+
+class ProcTreeSampler(threading.Thread):
+    """
+    Sample a child process and its descendants from /proc every `interval` seconds:
+    CPU (utime+stime, including reaped descendants via cutime/cstime), RSS, context
+    switches and I/O bytes. The root is observed with waitid(WNOWAIT) so the final
+    sample is taken after exit but before the caller reaps it.
+    """
+
+    def __init__(self, pid: int, interval: float = DEFAULT_INTERVAL_SEC):
+        super().__init__(name=f"procsampler-{pid}", daemon=True)
+        self.pid = pid
+        self.interval = max(0.005, float(interval))
+        self.exited = threading.Event()
+        self._stop_evt = threading.Event()
+        self._t0 = time.perf_counter()
+        # Last-seen cumulative counters per pid, so exited processes still count
+        self._ctx: Dict[int, Dict[str, int]] = {}
+        self._iob: Dict[int, Dict[str, int]] = {}
+        self._cpu_total = 0
+        self._user = self._sys = 0
+        self.series: Dict[str, list] = {"t": [], "cpu_pct": [], "rss_mb": [], "procs": [],
+                                        "ctx_involuntary": [], "read_mb": [], "write_mb": []}
+
+    def _sample(self) -> None:
+        now = time.perf_counter() - self._t0
+        pids = process_tree(self.pid)
+        cpu = user = sys_ = rss = live = 0
+        for pid in pids:
+            st = _stat(pid)
+            if st is None:
+                continue
+            live += 1
+            cpu += st["cpu_ticks"]
+            user += st["user_ticks"]
+            sys_ += st["sys_ticks"]
+            rss += st["rss"]
+            self._ctx[pid] = _ctx_switches(pid)
+            self._iob[pid] = _io(pid)
+        if not live:
+            return
+        # Descendants in flight between exit and reap can make the sum dip briefly
+        cpu = max(cpu, self._cpu_total)
+        self._user, self._sys = max(user, self._user), max(sys_, self._sys)
+        s = self.series
+        prev_t = s["t"][-1] if s["t"] else 0.0
+        dt = now - prev_t
+        pct = (cpu - self._cpu_total) / CLK_TCK / dt * 100.0 if dt > 0 else 0.0
+        self._cpu_total = cpu
+        s["t"].append(round(now, 4))
+        s["cpu_pct"].append(round(pct, 1))
+        s["rss_mb"].append(round(rss / 1048576.0, 2))
+        s["procs"].append(live)
+        s["ctx_involuntary"].append(sum(c["ctx_involuntary"] for c in self._ctx.values()))
+        s["read_mb"].append(round(sum(c["read_bytes"] for c in self._iob.values()) / 1048576.0, 3))
+        s["write_mb"].append(round(sum(c["write_bytes"] for c in self._iob.values()) / 1048576.0, 3))
+
+    def _root_exited(self) -> bool:
+        try:
+            info = os.waitid(os.P_PID, self.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+        except ChildProcessError:
+            return True
+        return info is not None
+
+    def run(self) -> None:
+        try:
+            while not self._stop_evt.is_set():
+                done = self._root_exited()
+                self._sample()
+                if done:
+                    break
+                self._stop_evt.wait(self.interval)
+        finally:
+            self.exited.set()
+
+    def wait_exit(self, timeout: Optional[float]) -> bool:
+        """Block until the root exits (and the final sample is taken); False on timeout."""
+        return self.exited.wait(timeout)
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop_evt.set()
+        self.join(timeout=max(1.0, self.interval * 4))
+        return self.result()
+
+    def result(self) -> Dict[str, Any]:
+        s = self.series
+        duration = s["t"][-1] if s["t"] else 0.0
+        ctx = {k: sum(c[k] for c in self._ctx.values()) for k in ("ctx_voluntary", "ctx_involuntary")}
+        rss = s["rss_mb"]
+        summary = {
+            "duration_sec": round(duration, 4),
+            "n_samples": len(s["t"]),
+            "peak_rss_mb": max(rss) if rss else None,
+            "rss_growth_mb": round(rss[-1] - rss[0], 2) if rss else None,
+            "cpu_user_sec": round(self._user / CLK_TCK, 3),
+            "cpu_sys_sec": round(self._sys / CLK_TCK, 3),
+            "mean_cpu_pct": round(self._cpu_total / CLK_TCK / duration * 100.0, 1) if duration > 0 else None,
+            "max_cpu_pct": max(s["cpu_pct"][1:]) if len(s["cpu_pct"]) > 1 else None,
+            "max_procs": max(s["procs"]) if s["procs"] else 0,
+            "read_mb": s["read_mb"][-1] if s["read_mb"] else 0.0,
+            "write_mb": s["write_mb"][-1] if s["write_mb"] else 0.0,
+            **ctx,
+        }
+        return {"interval_sec": self.interval, "summary": summary, "series": _decimate(s, MAX_SERIES_POINTS)}
+
+
+def aggregate(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-run sampler results: peaks are maxima, counters are totals, CPU% is time-weighted."""
+    sums = [r["summary"] for r in runs if r and r.get("summary")]
+    if not sums:
+        return {}
+    duration = sum(s["duration_sec"] for s in sums)
+    cpu_sec = sum(s["cpu_user_sec"] + s["cpu_sys_sec"] for s in sums)
+
+    def peak(key):
+        vals = [s[key] for s in sums if s.get(key) is not None]
+        return max(vals) if vals else None
+    return {
+        "runs": len(sums),
+        "duration_sec": round(duration, 4),
+        "peak_rss_mb": peak("peak_rss_mb"),
+        "rss_growth_mb": peak("rss_growth_mb"),
+        "mean_cpu_pct": round(cpu_sec / duration * 100.0, 1) if duration > 0 else None,
+        "max_cpu_pct": peak("max_cpu_pct"),
+        "cpu_user_sec": round(sum(s["cpu_user_sec"] for s in sums), 3),
+        "cpu_sys_sec": round(sum(s["cpu_sys_sec"] for s in sums), 3),
+        "ctx_voluntary": sum(s["ctx_voluntary"] for s in sums),
+        "ctx_involuntary": sum(s["ctx_involuntary"] for s in sums),
+        "read_mb": round(sum(s["read_mb"] for s in sums), 3),
+        "write_mb": round(sum(s["write_mb"] for s in sums), 3),
+    }
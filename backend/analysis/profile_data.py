@@ -0,0 +1,328 @@
+import bisect
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+# History retention per project: whichever cap is hit first
+HISTORY_MAX_ENTRIES = 50
+HISTORY_MAX_BYTES = 20 * 1024 * 1024
+MAX_STACK_DEPTH = 64
+# Reconstructed stacks below this share of total self time are dropped, and at most
+# MAX_STACKS of the heaviest are emitted
+MIN_STACK_FRACTION = 0.001
+MAX_STACKS = 5000
+PRUNED = "[pruned]"
+
+
+def _project_id(project_path: str) -> str:
+    return hashlib.sha256(project_path.encode("utf-8")).hexdigest()[:16]
+
+
+def hotspots(profile: Dict[str, Any], n: int = 10, key: str = "tottime") -> List[Dict[str, Any]]:
+    """Top-n functions of a structured profile ranked by `key` (tottime|cumtime|samples)."""
+    fns = profile.get("functions") or []
+    return sorted(fns, key=lambda f: f.get(key, 0), reverse=True)[:n]
+
+
+def collapsed_stacks(profile: Dict[str, Any]) -> List[str]:
+    """
+    Collapsed-stack lines ("root;child;leaf <weight>") for flamegraph.pl / speedscope.
+    Sampled profiles carry exact stacks; for cProfile data stacks are reconstructed
+    from caller->callee edges, splitting each function's self time across its callers
+    in proportion to the cumulative time each caller edge accounts for. Subtrees are
+    memoized per (function, depth); stacks lighter than MIN_STACK_FRACTION of the
+    total fold into a "[pruned]" frame under their caller, and only the MAX_STACKS
+    heaviest are emitted, so cost stays polynomial in the call graph. Weights are
+    integer microseconds (or sample counts).
+    """
+    if profile.get("stacks"):
+        return [f"{s['stack']} {int(s['count'])}" for s in profile["stacks"]]
+    fns = {f["id"]: f for f in profile.get("functions") or []}
+    callees: Dict[str, List[Dict[str, Any]]] = {}
+    incoming_ct: Dict[str, float] = {}
+    for e in profile.get("edges") or []:
+        callees.setdefault(e["caller"], []).append(e)
+        incoming_ct[e["callee"]] = incoming_ct.get(e["callee"], 0.0) + e.get("cumtime", 0.0)
+    roots = [fid for fid in fns if fid not in incoming_ct]
+    min_w = MIN_STACK_FRACTION * sum(f.get("tottime", 0.0) for f in fns.values())
+    memo: Dict[tuple, Dict[tuple, float]] = {}
+    active: set = set()
+
+    def subtree(fid: str, depth: int) -> Dict[tuple, float]:
+        """Stacks rooted at `fid` (as fid tuples) with their self-time weights, memoized per (fid, depth)."""
+        key = (fid, depth)
+        if key in memo:
+            return memo[key]
+        f = fns.get(fid)
+        if f is None or depth >= MAX_STACK_DEPTH:
+            return {}
+        active.add(fid)
+        out: Dict[tuple, float] = {}
+        if f.get("tottime", 0.0) > 0:
+            out[(fid,)] = f["tottime"]
+        for e in callees.get(fid, []):
+            callee = e["callee"]
+            total = incoming_ct.get(callee, 0.0)
+            # Share of the callee's time that arrives through this edge
+            share = (e.get("cumtime", 0.0) / total) if total > 0 else 0.0
+            if share <= 0 or callee in active:
+                continue
+            for stack, w in subtree(callee, depth + 1).items():
+                w *= share
+                # Light paths fold into "<fid>;[pruned]" so total weight is preserved
+                stack = (fid,) + stack if w >= min_w else (fid, PRUNED)
+                out[stack] = out.get(stack, 0.0) + w
+        active.discard(fid)
+        memo[key] = out
+        return out
+
+    weights: Dict[tuple, float] = {}
+    for r in roots:
+        for stack, w in subtree(r, 0).items():
+            weights[stack] = weights.get(stack, 0.0) + w
+    lines = []
+    for stack, sec in sorted(weights.items(), key=lambda kv: kv[1], reverse=True)[:MAX_STACKS]:
+        us = int(round(sec * 1e6))
+        if us > 0:
+            lines.append(f"{';'.join(fns[p].get('label', p) if p in fns else p for p in stack)} {us}")
+    return lines
+
+
+def _history_key(project_path: str) -> str:
+    """Resolved project path, so '/profile' targets and '/suggest' file dirs share one history."""
+    return str(Path(project_path).resolve())
+
+
+def _history_dir(data_dir: Path, project_path: str) -> Path:
+    d = data_dir / "profiles" / _project_id(_history_key(project_path))
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def save_history(data_dir: Path, project_path: str, profile: Dict[str, Any], kind: str = "cprofile") -> Dict[str, Any]:
+    """Persist a profile for `project_path` and evict the oldest entries beyond the caps."""
+    d = _history_dir(data_dir, project_path)
+    ts = time.time()
+    # Millisecond prefix keeps ids sortable; the random suffix keeps concurrent saves apart
+    entry_id = f"{int(ts * 1000)}-{os.urandom(3).hex()}"
+    record = {"id": entry_id, "timestamp": ts, "kind": kind, "project_path": _history_key(project_path),
+              "profile": profile}
+    dest = d / f"{entry_id}.json"
+    tmp = dest.with_suffix(".tmp")
+    tmp.write_text(json.dumps(record))
+    os.replace(tmp, dest)
+    files = sorted(d.glob("*.json"), key=lambda f: f.name, reverse=True)
+    total = 0
+    for i, f in enumerate(files):
+        try:
+            total += f.stat().st_size
+        except OSError:
+            continue
+        if i >= HISTORY_MAX_ENTRIES or (i > 0 and total > HISTORY_MAX_BYTES):
+            f.unlink(missing_ok=True)
+    return {"id": entry_id, "timestamp": ts, "kind": kind}
+
+
+def list_history(data_dir: Path, project_path: str, top: int = 5) -> List[Dict[str, Any]]:
+    """Newest-first history entries with their top hotspots (no full payloads)."""
+    out = []
+    for f in sorted(_history_dir(data_dir, project_path).glob("*.json"), key=lambda f: f.name, reverse=True):
+        try:
+            rec = json.loads(f.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        prof = rec.get("profile") or {}
+        out.append({
+            "id": rec.get("id"),
+            "timestamp": rec.get("timestamp"),
+            "kind": rec.get("kind"),
+            "total_time": prof.get("total_time"),
+            "error": prof.get("error"),
+            "hotspots": hotspots(prof, top),
+        })
+    return out
+
+
+def load_history(data_dir: Path, project_path: str, entry_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Load one history record by id, or the newest when entry_id is None."""
+    d = _history_dir(data_dir, project_path)
+    if entry_id:
+        f = d / f"{Path(entry_id).name}.json"
+    else:
+        files = sorted(d.glob("*.json"), key=lambda f: f.name, reverse=True)
+        f = files[0] if files else None
+    if f is None or not f.exists():
+        return None
+    try:
+        return json.loads(f.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
+def _latest_section(data_dir: Path, project_path: str, section: str, required: str) -> Optional[Dict[str, Any]]:
+    d = _history_dir(data_dir, project_path)
+    for f in sorted(d.glob("*.json"), key=lambda f: f.name, reverse=True):
+        try:
+            rec = json.loads(f.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        part = (rec.get("profile") or {}).get(section) or {}
+        if part.get(required):
+            return part
+    return None
+
+
+def latest_line_profile(data_dir: Path, project_path: str) -> Optional[Dict[str, Any]]:
+    """Newest stored line-mode profile for the project, or None."""
+    return _latest_section(data_dir, project_path, "line_profile", "lines")
+
+
+def latest_alloc_profile(data_dir: Path, project_path: str) -> Optional[Dict[str, Any]]:
+    """Newest stored allocation profile for the project, or None."""
+    return _latest_section(data_dir, project_path, "alloc", "by_line")
+
+
+def alloc_by_function(alloc: Dict[str, Any], file: str, ranges: Dict[str, tuple]) -> Dict[str, Any]:
+    """
+    Attribute traced bytes in `file` to functions by line range ({name: (first, last)}).
+    Returns {"total": bytes over all lines, "functions": {name: bytes}}.
+    """
+    try:
+        target = Path(file).resolve()
+    except Exception:
+        return {"total": 0, "functions": {}}
+    rows = alloc.get("by_line") or []
+    total = sum(size for _, _, size in rows)
+    per_fn: Dict[str, int] = {}
+    same_file: Dict[str, bool] = {}
+    for f, line, size in rows:
+        if f not in same_file:
+            try:
+                same_file[f] = Path(f).resolve() == target
+            except Exception:
+                same_file[f] = False
+        if not same_file[f]:
+            continue
+        for name, (first, last) in ranges.items():
+            if first <= line <= last:
+                per_fn[name] = per_fn.get(name, 0) + size
+    return {"total": total, "functions": per_fn}
+
+
+def hot_lines_for(line_profile: Dict[str, Any], file: str, name: str, n: int = 5) -> List[Dict[str, Any]]:
+    """Top-n lines by time for function `name` defined in `file`."""
+    try:
+        target = Path(file).resolve()
+    except Exception:
+        return []
+    for fn in line_profile.get("lines") or []:
+        if fn.get("name") != name:
+            continue
+        try:
+            same = Path(fn.get("file", "")).resolve() == target
+        except Exception:
+            same = False
+        if same:
+            return sorted(fn.get("lines") or [], key=lambda ln: ln.get("time", 0), reverse=True)[:n]
+    return []
+
+
+# Function deltas below both thresholds are treated as run-to-run noise
+DIFF_MIN_ABS_SEC = 0.001
+DIFF_MIN_REL = 0.05
+DIFF_MIN_ALLOC_KB = 16.0
+
+
+def _diff_keys(functions: List[Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
+    """
+    Key functions by (file, name) so matches survive line shifts from the patch;
+    names that repeat within a file fall back to (file, name, line).
+    """
+    seen: Dict[tuple, int] = {}
+    for f in functions:
+        k = (f.get("file"), f.get("name"))
+        seen[k] = seen.get(k, 0) + 1
+    out = {}
+    for f in functions:
+        k = (f.get("file"), f.get("name"))
+        out[k if seen[k] == 1 else k + (f.get("line"),)] = f
+    return out
+
+
+def _alloc_per_function(cprof: Dict[str, Any], alloc: Dict[str, Any]) -> Dict[tuple, float]:
+    """Attribute per-line allocation totals to the enclosing function (nearest def at or above the line)."""
+    starts: Dict[str, List[tuple]] = {}
+    for key, f in _diff_keys(cprof.get("functions") or []).items():
+        if f.get("line"):
+            starts.setdefault(f.get("file"), []).append((f["line"], key))
+    index = {}
+    for file, lst in starts.items():
+        lst.sort(key=lambda t: t[0])
+        index[file] = ([ln for ln, _ in lst], [k for _, k in lst])
+    out: Dict[tuple, float] = {}
+    for file, line, size in alloc.get("by_line") or []:
+        if file not in index:
+            continue
+        lines, keys = index[file]
+        i = bisect.bisect_right(lines, line) - 1
+        if i >= 0:
+            out[keys[i]] = out.get(keys[i], 0.0) + size / 1024.0
+    return out
+
+
+def _is_noise(before: float, after: float, min_abs: float, min_rel: float) -> bool:
+    delta = abs(after - before)
+    return delta < min_abs or delta < min_rel * max(abs(before), abs(after))
+
+
+def diff_profiles(before: Dict[str, Any], after: Dict[str, Any], top: int = 20,
+                  min_abs_sec: float = DIFF_MIN_ABS_SEC, min_rel: float = DIFF_MIN_REL,
+                  min_alloc_kb: float = DIFF_MIN_ALLOC_KB) -> Dict[str, Any]:
+    """
+    Match functions across two captures ({"cprofile": ..., "alloc": ...}) and rank
+    them by tottime/cumtime delta and allocation delta. Positive deltas are regressions.
+    """
+    bc, ac = before.get("cprofile") or {}, after.get("cprofile") or {}
+    bf, af = _diff_keys(bc.get("functions") or []), _diff_keys(ac.get("functions") or [])
+    b_alloc = _alloc_per_function(bc, before.get("alloc") or {}) if before.get("alloc") else {}
+    a_alloc = _alloc_per_function(ac, after.get("alloc") or {}) if after.get("alloc") else {}
+    rows = []
+    for key in set(bf) | set(af):
+        b, a = bf.get(key) or {}, af.get(key) or {}
+        row = {
+            "function": (a or b).get("label") or (a or b).get("name"),
+            "file": (a or b).get("file"),
+            "status": "added" if not b else ("removed" if not a else "changed"),
+            "tottime_before": b.get("tottime", 0.0),
+            "tottime_after": a.get("tottime", 0.0),
+            "cumtime_before": b.get("cumtime", 0.0),
+            "cumtime_after": a.get("cumtime", 0.0),
+            "ncalls_before": b.get("ncalls", 0),
+            "ncalls_after": a.get("ncalls", 0),
+        }
+        row["tottime_delta"] = row["tottime_after"] - row["tottime_before"]
+        row["cumtime_delta"] = row["cumtime_after"] - row["cumtime_before"]
+        significant = not (_is_noise(row["tottime_before"], row["tottime_after"], min_abs_sec, min_rel)
+                           and _is_noise(row["cumtime_before"], row["cumtime_after"], min_abs_sec, min_rel))
+        if b_alloc or a_alloc:
+            kb_b, kb_a = b_alloc.get(key, 0.0), a_alloc.get(key, 0.0)
+            row["alloc_kb_before"], row["alloc_kb_after"] = round(kb_b, 3), round(kb_a, 3)
+            row["alloc_kb_delta"] = round(kb_a - kb_b, 3)
+            significant = significant or not _is_noise(kb_b, kb_a, min_alloc_kb, min_rel)
+        if significant:
+            rows.append(row)
+    rows.sort(key=lambda r: (abs(r["tottime_delta"]), abs(r["cumtime_delta"]), abs(r.get("alloc_kb_delta", 0.0))),
+              reverse=True)
+    regressions = [r for r in rows if r["tottime_delta"] > 0 or r.get("alloc_kb_delta", 0.0) > 0]
+    return {
+        "total_time_before": bc.get("total_time"),
+        "total_time_after": ac.get("total_time"),
+        "functions_compared": len(set(bf) & set(af)),
+        "significant": len(rows),
+        "thresholds": {"min_abs_sec": min_abs_sec, "min_rel": min_rel, "min_alloc_kb": min_alloc_kb},
+        "top": rows[:top],
+        "top_regression": regressions[0] if regressions else None,
+    }
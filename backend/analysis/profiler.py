@@ -1,8 +1,45 @@
 import cProfile, pstats, io, runpy
+import contextlib
+import json
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from collections import deque
 from pathlib import Path
-import pstats
+from typing import Dict, Any, Callable, Optional, Tuple
 
-def run_profile_on_example(path):
+try:
+    from . import sandbox
+    from . import jobs
+    from . import profile_data
+except Exception:
+    sandbox = None
+    jobs = None
+    profile_data = None
+
+try:
+    import resource
+except Exception:
+    resource = None
+
+DEFAULT_TIMEOUT_SEC = 60.0
+DEFAULT_MEM_MB = 1024
+HEARTBEAT_SEC = 0.5
+DEFAULT_SAMPLE_HZ = 100
+DEFAULT_LINE_TOP_N = 5
+DEFAULT_SNAPSHOT_SEC = 1.0
+ALLOC_NFRAMES = 10
+ALLOC_TOP = 25
+MAX_ALLOC_SNAPSHOTS = 16
+PROFILE_MODES = ('cprofile', 'sample', 'line', 'alloc')
+# Time the child gets to flush partial stats after SIGINT before it is killed
+GRACE_SEC = 3.0
+
+
+def _resolve_main(path) -> Tuple[Optional[Path], Optional[str]]:
     # Try both relative and absolute paths
     p = Path(path)
     if not p.is_absolute():
@@ -10,26 +47,648 @@ def run_profile_on_example(path):
         backend_dir = Path(__file__).resolve().parent.parent
         p = (backend_dir / path).resolve()
     if not p.exists():
-        return {'error': f'Path not found: {p}'}
+        return None, f'Path not found: {p}'
     main = p / 'main.py'
     if not main.exists():
-        return {'error': f'main.py not found in {p}'}
-    pr = cProfile.Profile()
-    try:
-        pr.enable()
-        runpy.run_path(str(main), run_name='__main__')
-    except SystemExit:
-        pass
-    except Exception as e:
-        # Return error while still producing whatever profile we captured so far
-        pr.disable()
-        return {"error": str(e)}
-    finally:
+        return None, f'main.py not found in {p}'
+    return main, None
+
+
+def _pump(stream, sink: Callable[[str], None]) -> None:
+    for line in iter(stream.readline, ''):
+        sink(line)
+    stream.close()
+
+
+def _stream_profile(main: Path, timeout: float, mem_mb: Optional[int],
+                    on_event: Callable[[Dict[str, Any]], None],
+                    cancelled: Optional[threading.Event] = None,
+                    mode: str = 'cprofile', hz: float = DEFAULT_SAMPLE_HZ,
+                    functions: Optional[list] = None,
+                    snapshot_sec: float = DEFAULT_SNAPSHOT_SEC) -> Dict[str, Any]:
+    """
+    Profile `main` in a child interpreter. Progress events are passed to on_event as
+    they arrive. On timeout or cancellation the child is interrupted (SIGINT) so it can
+    report partial stats, then killed if it does not exit within GRACE_SEC.
+    """
+    if sandbox is None:
+        return {'error': 'sandbox unavailable'}
+    payload = {'main': str(main), 'mode': mode, 'hz': hz, 'functions': functions or [], 'snapshot_sec': snapshot_sec}
+    proc = sandbox.spawn_json_child(Path(__file__), payload, mem_mb=mem_mb, cwd=str(main.parent))
+    lines: queue.Queue = queue.Queue()
+    stderr_tail: deque = deque(maxlen=200)
+    readers = [
+        threading.Thread(target=_pump, args=(proc.stdout, lines.put), daemon=True),
+        threading.Thread(target=_pump, args=(proc.stderr, stderr_tail.append), daemon=True),
+    ]
+    for t in readers:
+        t.start()
+
+    deadline = time.time() + timeout
+    stopped_reason = None
+    kill_at = None
+    result: Optional[Dict[str, Any]] = None
+    while True:
         try:
-            pr.disable()
-        except Exception:
-            pass
+            line = lines.get(timeout=0.2)
+        except queue.Empty:
+            line = None
+        if line:
+            try:
+                ev = json.loads(line)
+            except Exception:
+                ev = None
+            if isinstance(ev, dict):
+                if ev.get('event') == 'result':
+                    result = ev.get('result') or {}
+                else:
+                    on_event(ev)
+        if proc.poll() is not None and lines.empty() and not readers[0].is_alive():
+            break
+        now = time.time()
+        if stopped_reason is None:
+            if cancelled is not None and cancelled.is_set():
+                stopped_reason = 'cancelled'
+            elif now > deadline:
+                stopped_reason = f'timeout after {timeout}s'
+            if stopped_reason:
+                on_event({'event': 'stopping', 'reason': stopped_reason})
+                try:
+                    proc.send_signal(signal.SIGINT)
+                except Exception:
+                    pass
+                kill_at = now + GRACE_SEC
+        elif kill_at and now > kill_at and proc.poll() is None:
+            proc.kill()
+            kill_at = None
+    for t in readers:
+        t.join(timeout=1.0)
+
+    output = ''.join(stderr_tail)[-4000:]
+    if result is None:
+        result = {'error': stopped_reason or f'profiler exited with {proc.returncode}'}
+    elif stopped_reason:
+        result['partial'] = True
+        result.setdefault('error', stopped_reason)
+    result['returncode'] = proc.returncode
+    if output:
+        result['output'] = output
+    if profile_data is not None and result.get('functions'):
+        result['hotspots'] = profile_data.hotspots(result, 10)
+        if mode == 'sample':
+            # Sampled stacks are exact, so ship the flamegraph input inline
+            result['collapsed'] = profile_data.collapsed_stacks(result)
+    return result
+
+
+def _hot_user_functions(profile: Dict[str, Any], root: Path, n: int) -> list:
+    """Top-n functions by self time that are defined in files under `root`."""
+    root_s = str(root.resolve())
+    picked = []
+    for f in sorted(profile.get('functions') or [], key=lambda f: f.get('tottime', 0), reverse=True):
+        if f.get('line') and f.get('name') != '<module>' and str(f.get('file', '')).startswith(root_s):
+            picked.append([f['file'], f['line'], f['name']])
+        if len(picked) >= n:
+            break
+    return picked
+
+
+def _run_mode(main: Path, timeout: float, mem_mb: Optional[int], on_event, cancelled, mode: str,
+              hz: float, line_top_n: int, first_pass: str, snapshot_sec: float = DEFAULT_SNAPSHOT_SEC) -> Dict[str, Any]:
+    if mode != 'line':
+        return _stream_profile(main, timeout, mem_mb, on_event, cancelled, mode=mode, hz=hz, snapshot_sec=snapshot_sec)
+    # Line mode: a cheap first pass finds the hot functions, the second pass instruments only those
+    first = _stream_profile(main, timeout, mem_mb, on_event, cancelled, mode=first_pass, hz=hz)
+    targets = _hot_user_functions(first, main.parent, line_top_n)
+    if not targets or (cancelled is not None and cancelled.is_set()):
+        first['line_profile'] = {'error': 'no hot user functions found' if not targets else 'cancelled'}
+        return first
+    on_event({'event': 'line_pass', 'functions': targets})
+    second = _stream_profile(main, timeout, mem_mb, on_event, cancelled, mode='line', functions=targets)
+    first['line_profile'] = {k: second[k] for k in ('lines', 'monitor', 'error', 'partial', 'elapsed_sec') if k in second}
+    first['mode'] = 'line'
+    first['first_pass'] = first_pass
+    return first
+
+
+def run_profile_on_example(path, timeout: float = DEFAULT_TIMEOUT_SEC, mem_mb: Optional[int] = DEFAULT_MEM_MB,
+                           mode: str = 'cprofile', hz: float = DEFAULT_SAMPLE_HZ,
+                           line_top_n: int = DEFAULT_LINE_TOP_N, first_pass: str = 'cprofile',
+                           snapshot_sec: float = DEFAULT_SNAPSHOT_SEC):
+    """
+    Blocking profile of <path>/main.py in an isolated subprocess.
+    mode='cprofile' traces every call; mode='sample' takes stack samples at `hz`
+    for long-running targets where tracing overhead would distort results;
+    mode='line' adds per-line hits/time for the top `line_top_n` functions found by a
+    `first_pass` (cprofile|sample) run, using sys.monitoring (Python 3.12+);
+    mode='alloc' traces allocations with tracemalloc, snapshotting every `snapshot_sec`.
+    """
+    main, err = _resolve_main(path)
+    if err:
+        return {'error': err}
+    if mode not in PROFILE_MODES or first_pass not in ('cprofile', 'sample'):
+        return {'error': f'unsupported mode: {mode}'}
+    return _run_mode(main, timeout, mem_mb, lambda ev: None, None, mode, hz, line_top_n, first_pass, snapshot_sec)
+
+
+def capture_for_diff(path, modes=('cprofile',), timeout: float = DEFAULT_TIMEOUT_SEC,
+                     mem_mb: Optional[int] = DEFAULT_MEM_MB) -> Dict[str, Any]:
+    """Run one profile per mode (cprofile and/or alloc) for profile_data.diff_profiles."""
+    return {mode: run_profile_on_example(path, timeout=timeout, mem_mb=mem_mb, mode=mode)
+            for mode in modes if mode in ('cprofile', 'alloc')}
+
+
+def start_profile_job(path, timeout: float = DEFAULT_TIMEOUT_SEC, mem_mb: Optional[int] = DEFAULT_MEM_MB,
+                      on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      mode: str = 'cprofile', hz: float = DEFAULT_SAMPLE_HZ,
+                      line_top_n: int = DEFAULT_LINE_TOP_N, first_pass: str = 'cprofile',
+                      snapshot_sec: float = DEFAULT_SNAPSHOT_SEC):
+    """
+    Start a background profile job; progress is streamed into job events.
+    on_result is called with the final profile on the job thread (e.g. to persist history).
+    """
+    main, err = _resolve_main(path)
+    if err:
+        return None, {'error': err}
+    if mode not in PROFILE_MODES or first_pass not in ('cprofile', 'sample'):
+        return None, {'error': f'unsupported mode: {mode}'}
+
+    def work(job):
+        res = _run_mode(main, timeout, mem_mb, job.emit, job.cancelled, mode, hz, line_top_n, first_pass, snapshot_sec)
+        if on_result is not None:
+            try:
+                on_result(res)
+            except Exception as e:
+                res['history_error'] = str(e)
+        return res
+
+    meta = {'path': str(main.parent), 'timeout': timeout, 'mem_mb': mem_mb, 'mode': mode}
+    return jobs.start('profile', work, meta=meta), None
+
+
+def _func_key(key) -> Dict[str, Any]:
+    file, line, name = key
+    short = os.path.basename(file) if file != '~' else 'builtin'
+    return {
+        'id': f'{file}:{line}({name})',
+        'file': file,
+        'line': line,
+        'name': name,
+        'label': f'{name} ({short}:{line})' if line else name,
+    }
+
+
+def _format_stats(pr: cProfile.Profile) -> Dict[str, Any]:
+    """Text report plus per-function stats and caller->callee edges from pstats."""
     s = io.StringIO()
     ps = pstats.Stats(pr, stream=s).sort_stats('cumulative')
     ps.print_stats(20)
-    return {'raw': s.getvalue()}
+    functions = []
+    edges = []
+    for key, (cc, nc, tt, ct, callers) in ps.stats.items():
+        fn = _func_key(key)
+        fn.update({'ncalls': nc, 'primcalls': cc, 'tottime': tt, 'cumtime': ct})
+        functions.append(fn)
+        for caller, (ecc, enc, ett, ect) in callers.items():
+            edges.append({
+                'caller': _func_key(caller)['id'],
+                'callee': fn['id'],
+                'ncalls': enc,
+                'tottime': ett,
+                'cumtime': ect,
+            })
+    functions.sort(key=lambda f: f['cumtime'], reverse=True)
+    return {'raw': s.getvalue(), 'total_time': ps.total_tt, 'functions': functions, 'edges': edges}
+
+
+class _StackSampler(threading.Thread):
+    """
+    Low-overhead statistical profiler: snapshots sys._current_frames() at `hz` and
+    counts whole stacks. Time spent sampling is measured and reported as overhead.
+    """
+
+    def __init__(self, hz: float, main_file: str, ignore_threads=()):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.interval = 1.0 / max(1.0, float(hz))
+        self.main_file = os.path.realpath(main_file)
+        self.ignore = set(ignore_threads)
+        self.stacks: Dict[tuple, int] = {}
+        self.samples = 0
+        self.busy = 0.0
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self._stop_evt = threading.Event()
+        # co_filename -> 'main' | 'harness' | None, resolved once per code file
+        self._kinds: Dict[str, Optional[str]] = {}
+        self._harness = {os.path.realpath(f) for f in (__file__, runpy.__file__, threading.__file__)}
+
+    def _kind(self, fname: str) -> Optional[str]:
+        kind = self._kinds.get(fname, False)
+        if kind is False:
+            real = os.path.realpath(fname) if not fname.startswith('<') else fname
+            kind = 'main' if real == self.main_file else 'harness' if real in self._harness else None
+            self._kinds[fname] = kind
+        return kind
+
+    def _stack(self, frame) -> Optional[tuple]:
+        stack = []
+        while frame is not None:
+            co = frame.f_code
+            stack.append((co.co_filename, co.co_firstlineno, co.co_name))
+            frame = frame.f_back
+        stack.reverse()
+        # Drop harness frames (this module, runpy, exec) above the target's <module> frame
+        for i, (fname, _, _) in enumerate(stack):
+            if self._kind(fname) == 'main':
+                return tuple(stack[i:])
+        # Threads the target started: drop the threading bootstrap; a stack that is
+        # all harness (runpy loading or unwinding the target) is not recorded
+        i = 0
+        while i < len(stack) and (self._kind(stack[i][0]) == 'harness' or stack[i][0].startswith('<frozen runpy')):
+            i += 1
+        return tuple(stack[i:]) or None
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        # The sampler needs the GIL once per tick; shorten the switch interval so a
+        # CPU-bound target cannot starve it below the requested rate.
+        if sys.getswitchinterval() > self.interval / 2:
+            sys.setswitchinterval(self.interval / 2)
+        self.started_at = time.perf_counter()
+        while not self._stop_evt.is_set():
+            t0 = time.perf_counter()
+            for tid, frame in sys._current_frames().items():
+                if tid == me or tid in self.ignore:
+                    continue
+                st = self._stack(frame)
+                if st:
+                    self.stacks[st] = self.stacks.get(st, 0) + 1
+            self.samples += 1
+            spent = time.perf_counter() - t0
+            self.busy += spent
+            self._stop_evt.wait(max(0.0, self.interval - spent))
+        self.stopped_at = time.perf_counter()
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+        self.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Same functions/edges shape as _format_stats, with sample counts and exact stacks."""
+        elapsed = max(1e-9, self.stopped_at - self.started_at)
+        # Weight samples by the achieved tick period, not the requested one
+        interval = elapsed / self.samples if self.samples else self.interval
+        funcs: Dict[tuple, Dict[str, Any]] = {}
+        edges: Dict[tuple, int] = {}
+        stacks = []
+        total = 0
+        for st, count in self.stacks.items():
+            if not st:
+                continue
+            total += count
+            for key in set(st):
+                f = funcs.setdefault(key, dict(_func_key(key), samples=0, cum_samples=0))
+                f['cum_samples'] += count
+            funcs[st[-1]]['samples'] += count
+            for pair in set(zip(st, st[1:])):
+                edges[pair] = edges.get(pair, 0) + count
+            stacks.append({'stack': ';'.join(_func_key(k)['label'] for k in st), 'count': count})
+        functions = []
+        for f in funcs.values():
+            f['tottime'] = f['samples'] * interval
+            f['cumtime'] = f['cum_samples'] * interval
+            functions.append(f)
+        functions.sort(key=lambda f: f['cumtime'], reverse=True)
+        return {
+            'total_time': total * interval,
+            'functions': functions,
+            'edges': [
+                {'caller': _func_key(a)['id'], 'callee': _func_key(b)['id'], 'samples': n, 'cumtime': n * interval}
+                for (a, b), n in edges.items()
+            ],
+            'stacks': sorted(stacks, key=lambda x: x['count'], reverse=True),
+            'sampler': {
+                'hz': round(1.0 / self.interval, 2),
+                'effective_hz': round(self.samples / elapsed, 2),
+                'ticks': self.samples,
+                'sampling_time_sec': round(self.busy, 6),
+                'overhead_pct': round(100.0 * self.busy / elapsed, 3),
+            },
+        }
+
+
+class _LineMonitor:
+    """
+    Per-line hit counts and wall time for selected functions via sys.monitoring.
+    A global PY_START hook finds the target code objects, enables LINE/return events
+    locally on them and returns DISABLE, so non-target code pays one callback each.
+    Time on a line runs until the next line event in the same frame, so it includes
+    time spent in calls made from that line.
+    """
+
+    EVENTS = ('PY_START', 'PY_RESUME', 'LINE', 'PY_RETURN', 'PY_YIELD')
+
+    def __init__(self, functions):
+        self.targets = {(f, int(ln), n) for f, ln, n in functions}
+        self.codes: Dict[Any, tuple] = {}
+        self.hits: Dict[tuple, int] = {}
+        self.times: Dict[tuple, float] = {}
+        self.calls: Dict[Any, int] = {}
+        self.callbacks = 0
+        self.tool = None
+        self._tls = threading.local()
+
+    def _stack(self) -> list:
+        st = getattr(self._tls, 'stack', None)
+        if st is None:
+            st = self._tls.stack = []
+        return st
+
+    def _close(self, entry, now) -> None:
+        code, line, t = entry
+        if line is not None:
+            key = (code, line)
+            self.times[key] = self.times.get(key, 0.0) + (now - t)
+
+    def _on_start(self, code, offset):
+        mon = sys.monitoring
+        if code in self.codes:
+            self.calls[code] = self.calls.get(code, 0) + 1
+            self._stack().append([code, None, time.perf_counter()])
+            return None
+        key = (code.co_filename, code.co_firstlineno, code.co_name)
+        if key not in self.targets:
+            return mon.DISABLE
+        self.codes[code] = key
+        ev = mon.events
+        mon.set_local_events(self.tool, code, ev.LINE | ev.PY_RETURN | ev.PY_YIELD | ev.PY_RESUME)
+        self.calls[code] = 1
+        self._stack().append([code, None, time.perf_counter()])
+        return None
+
+    def _on_resume(self, code, offset):
+        if code in self.codes:
+            self._stack().append([code, None, time.perf_counter()])
+
+    def _on_line(self, code, line):
+        now = time.perf_counter()
+        self.callbacks += 1
+        st = self._stack()
+        if not st or st[-1][0] is not code:
+            # Missed a frame boundary (e.g. exception unwind); resync on this frame
+            while st and st[-1][0] is not code:
+                st.pop()
+            if not st:
+                st.append([code, None, now])
+        top = st[-1]
+        self._close(top, now)
+        key = (code, line)
+        self.hits[key] = self.hits.get(key, 0) + 1
+        top[1], top[2] = line, time.perf_counter()
+
+    def _on_exit(self, code, offset, retval):
+        now = time.perf_counter()
+        st = self._stack()
+        while st:
+            entry = st.pop()
+            self._close(entry, now)
+            if entry[0] is code:
+                break
+
+    def start(self) -> None:
+        mon = getattr(sys, 'monitoring', None)
+        if mon is None:
+            raise RuntimeError('line mode requires Python 3.12+ (sys.monitoring)')
+        self.tool = mon.PROFILER_ID
+        mon.use_tool_id(self.tool, 'softpatent-line-profiler')
+        ev = mon.events
+        mon.register_callback(self.tool, ev.PY_START, self._on_start)
+        mon.register_callback(self.tool, ev.PY_RESUME, self._on_resume)
+        mon.register_callback(self.tool, ev.LINE, self._on_line)
+        mon.register_callback(self.tool, ev.PY_RETURN, self._on_exit)
+        mon.register_callback(self.tool, ev.PY_YIELD, self._on_exit)
+        mon.set_events(self.tool, ev.PY_START)
+
+    def stop(self) -> None:
+        mon = getattr(sys, 'monitoring', None)
+        if mon is None or self.tool is None:
+            return
+        mon.set_events(self.tool, 0)
+        for code in self.codes:
+            mon.set_local_events(self.tool, code, 0)
+        for name in self.EVENTS:
+            mon.register_callback(self.tool, getattr(mon.events, name), None)
+        mon.free_tool_id(self.tool)
+        self.tool = None
+
+    def stats(self) -> Dict[str, Any]:
+        import linecache
+        per_fn: Dict[Any, Dict[str, Any]] = {}
+        for (code, line), hits in self.hits.items():
+            fn = per_fn.get(code)
+            if fn is None:
+                file, first, name = self.codes[code]
+                fn = per_fn[code] = dict(_func_key((file, first, name)), calls=self.calls.get(code, 0), total_time=0.0, lines=[])
+            t = self.times.get((code, line), 0.0)
+            fn['total_time'] += t
+            fn['lines'].append({
+                'line': line,
+                'hits': hits,
+                'time': t,
+                'source': linecache.getline(fn['file'], line).rstrip(),
+            })
+        out = []
+        for fn in per_fn.values():
+            fn['lines'].sort(key=lambda ln: ln['line'])
+            for ln in fn['lines']:
+                ln['pct'] = round(100.0 * ln['time'] / fn['total_time'], 2) if fn['total_time'] > 0 else 0.0
+            out.append(fn)
+        out.sort(key=lambda f: f['total_time'], reverse=True)
+        return {'lines': out, 'monitor': {'functions': len(self.targets), 'instrumented': len(self.codes),
+                                          'line_events': self.callbacks}}
+
+
+class _AllocTracker:
+    """
+    tracemalloc-based allocation profile: periodic snapshots on a background thread,
+    top sites by line and traceback from the largest snapshot, growth between
+    consecutive snapshots and overall first->last growth, plus traced peak.
+    Grouping a snapshot while tracing is on is ~30x slower (the grouping itself is
+    traced), so only raw snapshots are taken during the run - a bounded, downsampled
+    set - and all grouping happens in stats() after tracing stops.
+    """
+
+    def __init__(self, snapshot_sec: float, nframes: int = ALLOC_NFRAMES):
+        import tracemalloc
+        self.tm = tracemalloc
+        self.snapshot_sec = max(0.05, float(snapshot_sec))
+        self.nframes = nframes
+        self.snaps = []
+        self.largest = None
+        self.largest_current = -1
+        self.peak = 0
+        self.busy = 0.0
+        self.started_at = 0.0
+        self._stop_evt = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='alloc-snapshots', daemon=True)
+        # Harness frames are dropped from grouped stats rather than with
+        # Snapshot.filter_traces, which is far slower on large snapshots.
+        self._skip = {tracemalloc.__file__, __file__, threading.__file__,
+                      '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>'}
+
+    def _by_line(self, snap) -> Dict[tuple, tuple]:
+        out = {}
+        for st in snap.statistics('lineno'):
+            fr = st.traceback[0]
+            if fr.filename not in self._skip:
+                out[(fr.filename, fr.lineno)] = (st.size, st.count)
+        return out
+
+    @staticmethod
+    def _growth(new: Dict[tuple, tuple], old: Dict[tuple, tuple], n: int) -> list:
+        diffs = []
+        for key, (size, count) in new.items():
+            osize, ocount = old.get(key, (0, 0))
+            if size > osize:
+                diffs.append((size - osize, count - ocount, key))
+        diffs.sort(reverse=True)
+        return [{'file': f, 'line': ln, 'size_diff_kb': round(ds / 1024.0, 3), 'count_diff': dc}
+                for ds, dc, (f, ln) in diffs[:n]]
+
+    def _take(self) -> None:
+        t0 = time.perf_counter()
+        snap = self.tm.take_snapshot()
+        current, peak = self.tm.get_traced_memory()
+        self.snaps.append((round(t0 - self.started_at, 3), current, peak, snap))
+        if current > self.largest_current:
+            self.largest, self.largest_current = snap, current
+        if len(self.snaps) > MAX_ALLOC_SNAPSHOTS:
+            # Downsample: keep the first and last, drop every other one in between
+            self.snaps = [self.snaps[0]] + self.snaps[1:-1][1::2] + [self.snaps[-1]]
+        self.busy += time.perf_counter() - t0
+
+    def _loop(self) -> None:
+        while not self._stop_evt.wait(self.snapshot_sec):
+            self._take()
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self.tm.start(self.nframes)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+        self._thread.join()
+        if self.tm.is_tracing():
+            self.peak = self.tm.get_traced_memory()[1]
+            self._take()
+            self.tm.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        import linecache
+        if self.largest is None:
+            return {'alloc': {'error': 'no snapshots taken'}}
+        timeline = []
+        grouped = []
+        for t, current, peak, snap in self.snaps:
+            lines = self._by_line(snap)
+            total = sum(size for size, _ in lines.values())
+            entry = {'t': t, 'current_kb': round(current / 1024.0, 2), 'peak_kb': round(peak / 1024.0, 2),
+                     'tracked_kb': round(total / 1024.0, 2)}
+            if grouped:
+                entry['growth_kb'] = round((total - grouped[-1][1]) / 1024.0, 2)
+                entry['top_growth'] = self._growth(lines, grouped[-1][0], 5)
+            grouped.append((lines, total))
+            timeline.append(entry)
+        largest_lines = self._by_line(self.largest)
+        ranked = sorted(largest_lines.items(), key=lambda kv: kv[1][0], reverse=True)
+        top_lines = [{
+            'file': f,
+            'line': ln,
+            'size_kb': round(size / 1024.0, 3),
+            'count': count,
+            'source': linecache.getline(f, ln).strip(),
+        } for (f, ln), (size, count) in ranked[:ALLOC_TOP]]
+        top_tb = []
+        for st in self.largest.statistics('traceback'):
+            frames = [{'file': fr.filename, 'line': fr.lineno} for fr in st.traceback if fr.filename not in self._skip]
+            if frames:
+                top_tb.append({'size_kb': round(st.size / 1024.0, 3), 'count': st.count, 'frames': frames})
+            if len(top_tb) >= 10:
+                break
+        growth = self._growth(grouped[-1][0], grouped[0][0], ALLOC_TOP) if len(grouped) > 1 else []
+        return {'alloc': {
+            'peak_kb': round(self.peak / 1024.0, 2),
+            'largest_snapshot_kb': round(sum(size for size, _ in largest_lines.values()) / 1024.0, 2),
+            'top_lines': top_lines,
+            # Full per-line totals (capped) so callers can attribute memory to functions
+            'by_line': [[f, ln, size] for (f, ln), (size, _) in ranked[:2000]],
+            'top_tracebacks': top_tb,
+            'growth': growth,
+            'snapshots': timeline,
+            'snapshot_sec': self.snapshot_sec,
+            'snapshot_time_sec': round(self.busy, 4),
+            'nframes': self.nframes,
+        }}
+
+
+def _child_main() -> None:
+    """Subprocess entry point: profile payload['main'] and stream JSON lines to stdout."""
+    payload = json.loads(sys.stdin.read() or '{}')
+    out = sys.stdout
+    lock = threading.Lock()
+    done = threading.Event()
+    started = time.time()
+
+    def emit(ev):
+        with lock:
+            out.write(json.dumps(ev) + '\n')
+            out.flush()
+
+    def heartbeat():
+        while not done.wait(HEARTBEAT_SEC):
+            ev = {'event': 'progress', 'elapsed_sec': round(time.time() - started, 2)}
+            if resource is not None:
+                ev['maxrss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            emit(ev)
+
+    main = payload['main']
+    mode = payload.get('mode') or 'cprofile'
+    sys.path.insert(0, os.path.dirname(main))
+    hb = threading.Thread(target=heartbeat, daemon=True)
+    hb.start()
+    emit({'event': 'started', 'main': main, 'mode': mode})
+    result: Dict[str, Any] = {'mode': mode}
+    if mode == 'sample':
+        collector = _StackSampler(payload.get('hz') or DEFAULT_SAMPLE_HZ, main, ignore_threads=[hb.ident])
+        start, stop = collector.start, collector.stop
+    elif mode == 'line':
+        collector = _LineMonitor(payload.get('functions') or [])
+        start, stop = collector.start, collector.stop
+    elif mode == 'alloc':
+        collector = _AllocTracker(payload.get('snapshot_sec') or DEFAULT_SNAPSHOT_SEC)
+        start, stop = collector.start, collector.stop
+    else:
+        collector = cProfile.Profile()
+        start, stop = collector.enable, collector.disable
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            start()
+            runpy.run_path(main, run_name='__main__')
+        except SystemExit:
+            pass
+        except KeyboardInterrupt:
+            result['partial'] = True
+        except BaseException as e:
+            # Still report whatever profile we captured so far
+            result['error'] = str(e) or type(e).__name__
+        finally:
+            stop()
+    done.set()
+    result.update(_format_stats(collector) if mode == 'cprofile' else collector.stats())
+    result['elapsed_sec'] = round(time.time() - started, 3)
+    emit({'event': 'result', 'result': result})
+
+
+if __name__ == '__main__':
+    _child_main()
@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    import resource
+except Exception:
+    resource = None
+
+
+def _limits(mem_mb: Optional[int], cpu_sec: Optional[int]):
+    """
+    Build a preexec_fn applying address-space and CPU rlimits in the child.
+    Returns None where rlimits are unavailable (e.g. Windows).
+    """
+    if resource is None or (not mem_mb and not cpu_sec):
+        return None
+
+    def apply():
+        if mem_mb:
+            nbytes = int(mem_mb) * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (nbytes, nbytes))
+        if cpu_sec:
+            resource.setrlimit(resource.RLIMIT_CPU, (int(cpu_sec), int(cpu_sec) + 1))
+    return apply
+
+
+def child_command(script: Path, *args: str) -> List[str]:
+    # -P keeps the helper's own directory off sys.path so user modules named
+    # like our analysis modules (benchmark, profiler, ...) are not shadowed.
+    return [sys.executable, "-P", str(script), *args]
+
+
+def run_json_child(script: Path, payload: Dict[str, Any], timeout: float = 30.0,
+                   mem_mb: Optional[int] = 512, cpu_sec: Optional[int] = None,
+                   cwd: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run `script` in a fresh interpreter, feed `payload` as JSON on stdin and
+    parse the last stdout line as the JSON result. Never raises on child failure.
+    """
+    try:
+        proc = subprocess.run(
+            child_command(script),
+            input=json.dumps(payload),
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            cwd=cwd,
+            preexec_fn=_limits(mem_mb, cpu_sec) if os.name == "posix" else None,
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": f"timeout after {timeout}s"}
+    except Exception as e:
+        return {"error": f"spawn failed: {e}"}
+    lines = [ln for ln in (proc.stdout or "").splitlines() if ln.strip()]
+    if not lines:
+        return {"error": f"child exited with {proc.returncode}", "stderr": (proc.stderr or "")[-2000:]}
+    try:
+        return json.loads(lines[-1])
+    except Exception:
+        return {"error": "unparseable child output", "stderr": (proc.stderr or "")[-2000:]}
+
+
+def spawn_json_child(script: Path, payload: Dict[str, Any], mem_mb: Optional[int] = 512,
+                     cpu_sec: Optional[int] = None, cwd: Optional[str] = None) -> subprocess.Popen:
+    """
+    Start `script` like run_json_child but return the Popen so the caller can
+    stream its stdout line by line. `payload` is written to stdin, which is then closed.
+    """
+    proc = subprocess.Popen(
+        child_command(script),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        cwd=cwd,
+        preexec_fn=_limits(mem_mb, cpu_sec) if os.name == "posix" else None,
+    )
+    proc.stdin.write(json.dumps(payload))
+    proc.stdin.close()
+    return proc
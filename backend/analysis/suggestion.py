@@ -1,4 +1,6 @@
 import ast
+import os
+from pathlib import Path
 from typing import List, Dict, Any
 
 try:
@@ -9,6 +11,14 @@ try:
     from . import microprofiler
 except Exception:
     microprofiler = None
+try:
+    from . import costmodel
+except Exception:
+    costmodel = None
+try:
+    from . import profile_data
+except Exception:
+    profile_data = None
 try:
     from .arch_guard import check_patch as arch_check
 except Exception:
@@ -206,10 +216,15 @@ def _generate_cpp_suggestions(filename: str, code: str) -> List[Dict[str, Any]]:
     return suggestions
 
 
-def generate_suggestions(filename: str, code: str, domain: str = None, path: str = None, targets: List[str] = None, compliance_targets: List[str] = None) -> List[Dict[str, Any]]:
+def generate_suggestions(filename: str, code: str, domain: str = None, path: str = None, targets: List[str] = None, compliance_targets: List[str] = None,
+                         profile_execute: bool = False, profile_samples: Dict[str, Any] = None,
+                         data_dir: Path = None) -> List[Dict[str, Any]]:
     """
     Analyze Python code and return a list of suggestion dicts.
     Each suggestion: {"message": str, "patch": str, "reason": str, "audit": {...}}
+    profile_execute opts in to sandboxed execution-based micro-benchmarks of the targets.
+    With data_dir, estimates use the project's calibrated cost model and measured runs
+    are recorded as calibration samples.
     """
 
     suggestions = []
@@ -223,7 +238,6 @@ def generate_suggestions(filename: str, code: str, domain: str = None, path: str
         pass
     # Language routing based on filename extension
     try:
-        import os
         ext = os.path.splitext(filename or "")[1].lower()
     except Exception:
         ext = ""
@@ -260,11 +274,42 @@ def generate_suggestions(filename: str, code: str, domain: str = None, path: str
         baseline_profile = {}
         expected_impact = {}
         if microprofiler and prof_targets:
+            cost_pid = None
+            cost_model = None
+            if costmodel and data_dir:
+                cost_pid = costmodel.project_id(path or os.path.dirname(filename or ""))
+                cost_model = costmodel.load_model(data_dir, cost_pid)
             try:
-                baseline_profile = microprofiler.profile_code_regions(filename, code, prof_targets)
+                baseline_profile = microprofiler.profile_code_regions(
+                    filename, code, prof_targets, execute=profile_execute, samples=profile_samples, model=cost_model)
                 expected_impact = microprofiler.expected_impact_from_profile(baseline_profile)
             except Exception:
                 baseline_profile = {"error": "microprofiler-failed"}
+            # Calibration is best-effort and must not discard a measured profile
+            if cost_pid and profile_execute:
+                try:
+                    if costmodel.record_samples(data_dir, cost_pid, baseline_profile):
+                        costmodel.maybe_fit(data_dir, cost_pid, cost_model)
+                except Exception:
+                    pass
+
+        # Replace projected memory impact with measured allocation share where an
+        # allocation profile (/profile mode=alloc) exists for this project
+        if profile_data and data_dir and expected_impact:
+            try:
+                alloc = profile_data.latest_alloc_profile(data_dir, path or os.path.dirname(filename or ""))
+                if alloc:
+                    ranges = {n.name: (n.lineno, getattr(n, "end_lineno", n.lineno)) for n in fn_defs
+                              if n.name in expected_impact}
+                    attributed = profile_data.alloc_by_function(alloc, filename, ranges)
+                    total = attributed["total"] or 1
+                    for name, nbytes in attributed["functions"].items():
+                        share = nbytes / total
+                        expected_impact[name]["mem_pct"] = round(-min(20.0, 20.0 * share), 1)
+                        expected_impact[name]["alloc_kb"] = round(nbytes / 1024.0, 2)
+                        expected_impact[name]["mem_basis"] = "tracemalloc"
+            except Exception:
+                pass
 
         # Rule 1: Long functions
         for node in ast.walk(tree):
@@ -358,10 +403,25 @@ def generate_suggestions(filename: str, code: str, domain: str = None, path: str
     if not project_path and filename:
         try:
             # use parent folder of file as project root by default
-            import os
             project_path = os.path.dirname(filename)
         except Exception:
             project_path = None
+
+    # Point function-level advice at measured hot lines from the latest line profile
+    if profile_data and data_dir and project_path:
+        try:
+            line_profile = profile_data.latest_line_profile(data_dir, project_path)
+            if line_profile:
+                for s in suggestions:
+                    fn_name = s.get("audit", {}).get("function")
+                    hot = profile_data.hot_lines_for(line_profile, filename, fn_name) if fn_name else []
+                    if hot:
+                        s["audit"]["hot_lines"] = hot
+                        top = hot[0]
+                        s["reason"] = (f"{s.get('reason', '')} Hot line {top['line']} "
+                                       f"({top.get('pct', 0)}% of time): `{top.get('source', '').strip()}`").strip()
+        except Exception:
+            pass
     analysis_graph = None
     if analyze_project and project_path:
         try:
@@ -1,8 +1,45 @@
+import bisect
+import gzip
 import hashlib
 import json
+import os
+import struct
+import threading
 import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+try:
+    import fcntl
+except Exception:
+    fcntl = None
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+TAIL_BLOCK = 4096
+# Byte-offset index: one fixed-width record per event in <pid>.idx
+#   offset u64, length u32, timestamp f64, type/file/message ids u32 (into
+#   <pid>.strings, 0 = absent; messages are no longer interned, so the id is
+#   only set on records from older indexes), raw chain hash 32 bytes
+IDX_REC = struct.Struct("<QIdIII32s")
+IDX_SCAN_CHUNK = 4096
+DEFAULT_PAGE = 100
+MAX_PAGE = 1000
+# Segment rotation: the active <pid>.jsonl is sealed into a compressed
+# <pid>.<n>.jsonl.zst (or .gz without zstandard) once it reaches either limit.
+# Index offsets are logical: byte positions in the concatenation of all segments.
+SEGMENT_MAX_BYTES = int(float(os.getenv("TIMELINE_SEGMENT_MB", "8")) * (1 << 20))
+SEGMENT_MAX_AGE_SEC = float(os.getenv("TIMELINE_SEGMENT_DAYS", "7")) * 86400
+SEGMENT_CACHE = 4
+SHORT_READ_RETRIES = 5
+_segment_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_segment_cache_lock = threading.Lock()
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
 
 
 def _project_id(project_path: str) -> str:
@@ -16,49 +53,635 @@ def _chain_hash(prev_hash: str, payload: Dict[str, Any]) -> str:
     return h.hexdigest()
 
 
+@contextmanager
+def _locked(tdir: Path, pid: str):
+    """Exclusive append lock for one timeline: flock on a lock file (cross-process), else a thread lock."""
+    if fcntl is None:
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(pid, threading.Lock())
+        with lock:
+            yield
+        return
+    with open(tdir / f"{pid}.lock", "a+b") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _last_line(log: Path) -> Optional[bytes]:
+    """Last complete line of `log`, found by seeking backwards from the end."""
+    with log.open("rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        end = fh.tell()
+        buf = b""
+        pos = end
+        while pos > 0:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            fh.seek(pos)
+            buf = fh.read(step) + buf
+            stripped = buf.rstrip(b"\n")
+            nl = stripped.rfind(b"\n")
+            if nl >= 0:
+                return stripped[nl + 1:]
+        return buf.rstrip(b"\n") or None
+
+
+def _count_lines(log: Path) -> int:
+    n = 0
+    with log.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            n += chunk.count(b"\n")
+    return n
+
+
+def _head_path(tdir: Path, pid: str) -> Path:
+    return tdir / f"{pid}.head"
+
+
+def _read_head(tdir: Path, pid: str, log: Path) -> Dict[str, Any]:
+    """
+    Chain head from the sidecar: last chain_hash, logical byte offset, event
+    count, and where the active log starts (`base` offset, `seq_base`, and the
+    first event's `base_ts` for age-based rotation). It is
+    trusted only if its offset matches base + active log size; otherwise an
+    interrupted rotation is finished and the head is rebuilt from the log tail
+    (or the last sealed segment).
+    """
+    size = log.stat().st_size if log.exists() else 0
+    try:
+        head = json.loads(_head_path(tdir, pid).read_text(encoding="utf-8"))
+        if head.get("offset") == head.get("base", 0) + size:
+            head.setdefault("base", 0)
+            head.setdefault("seq_base", 0)
+            if "base_ts" not in head:  # sidecar from before rotation; persisted with the next append
+                head["base_ts"] = _first_ts(tdir, pid, head["seq_base"])
+            return head
+    except Exception:
+        pass
+    segs = _load_segments(tdir, pid)
+    if _recover_rotation(tdir, pid, log, segs):
+        segs = _load_segments(tdir, pid)
+        size = log.stat().st_size if log.exists() else 0
+    last = segs[-1] if segs else {"chain_hash": "", "offset_end": 0, "seq_end": 0}
+    head = {"chain_hash": last["chain_hash"], "offset": last["offset_end"], "count": last["seq_end"],
+            "base": last["offset_end"], "seq_base": last["seq_end"]}
+    if not size:
+        return head
+    try:
+        head["chain_hash"] = json.loads(_last_line(log) or b"{}").get("chain_hash", "")
+    except Exception:
+        head["chain_hash"] = ""
+    head["offset"] += size
+    head["count"] += _count_lines(log)
+    head["base_ts"] = _first_ts(tdir, pid, head["seq_base"])
+    return head
+
+
+def _write_head(tdir: Path, pid: str, head: Dict[str, Any]) -> None:
+    path = _head_path(tdir, pid)
+    tmp = path.with_suffix(f".head.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(head), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _segments_path(tdir: Path, pid: str) -> Path:
+    return tdir / f"{pid}.segments.json"
+
+
+def _load_segments(tdir: Path, pid: str) -> List[Dict[str, Any]]:
+    """Sealed segments, oldest first: file, codec, seq/offset ranges, first/last ts, last chain hash, sizes."""
+    try:
+        return json.loads(_segments_path(tdir, pid).read_text(encoding="utf-8"))["segments"]
+    except Exception:
+        return []
+
+
+def _save_segments(tdir: Path, pid: str, segs: List[Dict[str, Any]]) -> None:
+    path = _segments_path(tdir, pid)
+    tmp = path.with_suffix(f".json.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"segments": segs}, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _base(segs: List[Dict[str, Any]]) -> int:
+    """Logical offset of the active log's first byte."""
+    return segs[-1]["offset_end"] if segs else 0
+
+
+def _codec() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def _compress(raw: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(raw)
+    return gzip.compress(raw, compresslevel=6)
+
+
+def _segment_bytes(tdir: Path, seg: Dict[str, Any]) -> bytes:
+    """Decompressed contents of a sealed segment; the last few are kept in memory for paging."""
+    key = str(tdir / seg["file"])
+    with _segment_cache_lock:
+        data = _segment_cache.get(key)
+        if data is not None:
+            _segment_cache.move_to_end(key)
+            return data
+    stored = Path(key).read_bytes()
+    if seg.get("codec") == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"{seg['file']} is zstd-compressed; install zstandard to read it")
+        data = zstandard.ZstdDecompressor().decompress(stored, max_output_size=seg["raw_bytes"])
+    else:
+        data = gzip.decompress(stored)
+    with _segment_cache_lock:
+        _segment_cache[key] = data
+        while len(_segment_cache) > SEGMENT_CACHE:
+            _segment_cache.popitem(last=False)
+    return data
+
+
+class _LogReader:
+    """
+    Random and sequential access to a timeline by logical byte offset across the
+    sealed segments and the active log. Rotation empties the active log before it
+    publishes the new manifest, so a concurrent reader sees a short read (never
+    shifted bytes) and simply reloads.
+    """
+
+    def __init__(self, tdir: Path, pid: str):
+        self.tdir, self.pid = tdir, pid
+        self.fh = None
+        self._reload()
+
+    def _reload(self) -> None:
+        # Manifest first, then the active file: a handle opened after a rotation
+        # published its manifest can never be paired with the older manifest
+        self.segs = _load_segments(self.tdir, self.pid)
+        self.base = _base(self.segs)
+        self.starts = [seg["offset_start"] for seg in self.segs]
+        if self.fh is not None:
+            self.fh.close()
+        log = self.tdir / f"{self.pid}.jsonl"
+        self.fh = log.open("rb") if log.exists() else None
+
+    def close(self) -> None:
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read(self, offset: int, length: int) -> bytes:
+        parts = []
+        end = offset + length
+        while offset < end:
+            if offset < self.base:
+                seg = self.segs[bisect.bisect_right(self.starts, offset) - 1]
+                data = _segment_bytes(self.tdir, seg)
+                lo = offset - seg["offset_start"]
+                hi = min(end, seg["offset_end"]) - seg["offset_start"]
+                parts.append(data[lo:hi])
+                offset += hi - lo
+            else:
+                if self.fh is not None:
+                    self.fh.seek(offset - self.base)
+                    parts.append(self.fh.read(end - offset))
+                break
+        return b"".join(parts)
+
+    def read(self, offset: int, length: int) -> bytes:
+        data = b""
+        for attempt in range(SHORT_READ_RETRIES):
+            data = self._read(offset, length)
+            if len(data) == length:
+                break
+            time.sleep(0.01 * attempt)
+            self._reload()
+        return data
+
+    def lines(self, start: int = 0):
+        """Yield (logical offset, line) for every complete line from `start` on."""
+        for seg in self.segs:
+            if seg["offset_end"] <= start:
+                continue
+            data = _segment_bytes(self.tdir, seg)
+            pos = max(0, start - seg["offset_start"])
+            while pos < len(data):
+                nl = data.find(b"\n", pos)
+                if nl < 0:
+                    break
+                yield seg["offset_start"] + pos, data[pos:nl + 1]
+                pos = nl + 1
+        if self.fh is None:
+            return
+        offset = max(start, self.base)
+        self.fh.seek(offset - self.base)
+        for line in self.fh:
+            if not line.endswith(b"\n"):
+                return
+            yield offset, line
+            offset += len(line)
+
+
+def _segment_name(pid: str, n: int, codec: str) -> str:
+    return f"{pid}.{n:06d}.jsonl.{'zst' if codec == 'zstd' else 'gz'}"
+
+
+def _seal(tdir: Path, pid: str, log: Path, segs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Seal the active log into the next compressed segment. Caller holds the lock.
+    Order: write the segment under a temporary name, empty the active log,
+    publish the segment, then the manifest; _recover_rotation finishes any step
+    a crash interrupted.
+    """
+    raw = log.read_bytes()
+    codec = _codec()
+    name = _segment_name(pid, len(segs), codec)
+    tmp = tdir / f"{name}.tmp"
+    tmp.write_bytes(_compress(raw, codec))
+    empty = log.with_suffix(f".jsonl.{os.getpid()}.tmp")
+    empty.write_bytes(b"")
+    os.replace(empty, log)
+    os.replace(tmp, tdir / name)
+    return _publish_segment(tdir, pid, segs, name, codec, raw)
+
+
+def _publish_segment(tdir: Path, pid: str, segs: List[Dict[str, Any]], name: str, codec: str,
+                     raw: bytes) -> Dict[str, Any]:
+    prev = segs[-1] if segs else {"offset_end": 0, "seq_end": 0}
+    lines = raw.splitlines()
+    first, last = json.loads(lines[0]), json.loads(lines[-1])
+    seg = {
+        "file": name,
+        "codec": codec,
+        "seq_start": prev["seq_end"],
+        "seq_end": prev["seq_end"] + len(lines),
+        "offset_start": prev["offset_end"],
+        "offset_end": prev["offset_end"] + len(raw),
+        "first_ts": first.get("timestamp"),
+        "last_ts": last.get("timestamp"),
+        "chain_hash": last.get("chain_hash", ""),
+        "raw_bytes": len(raw),
+        "stored_bytes": (tdir / name).stat().st_size,
+        "sealed_at": time.time(),
+    }
+    _save_segments(tdir, pid, segs + [seg])
+    return seg
+
+
+def _recover_rotation(tdir: Path, pid: str, log: Path, segs: List[Dict[str, Any]]) -> bool:
+    """Finish a rotation interrupted by a crash. Caller holds the lock. True if anything changed."""
+    n = len(segs)
+    for codec in ("zstd", "gzip"):
+        name = _segment_name(pid, n, codec)
+        final, tmp = tdir / name, tdir / f"{name}.tmp"
+        if tmp.exists():
+            if log.exists() and log.stat().st_size:
+                tmp.unlink()  # crashed before the active log was emptied: the log is authoritative
+                continue
+            os.replace(tmp, final)
+        if final.exists():
+            raw = _segment_bytes(tdir, {"file": name, "codec": codec, "raw_bytes": SEGMENT_MAX_BYTES << 4})
+            _publish_segment(tdir, pid, segs, name, codec, raw)
+            return True
+    return False
+
+
+def _should_rotate(size: int, first_ts: Optional[float]) -> bool:
+    if size <= 0:
+        return False
+    if size >= SEGMENT_MAX_BYTES:
+        return True
+    return SEGMENT_MAX_AGE_SEC > 0 and first_ts is not None and time.time() - first_ts >= SEGMENT_MAX_AGE_SEC
+
+
+def _first_ts(tdir: Path, pid: str, seq: int) -> Optional[float]:
+    idx, _ = _index_paths(tdir, pid)
+    if _index_count(idx) <= seq:
+        return None
+    with idx.open("rb") as fh:
+        return _read_record(fh, seq)[2]
+
+
+def rotate(data_dir: Path, project_path: str, force: bool = False) -> Dict[str, Any]:
+    """Seal the active segment now if it is over the size/age limits (or non-empty, with `force`)."""
+    pid = _project_id(project_path)
+    tdir = data_dir / "timeline"
+    log = tdir / f"{pid}.jsonl"
+    if not log.exists():
+        return {"sealed": None, "segments": []}
+    with _locked(tdir, pid):
+        head = _read_head(tdir, pid, log)
+        size = head["offset"] - head["base"]
+        sealed = None
+        if _index_end(tdir, pid) != head["offset"]:
+            _sync_index(tdir, pid, log)
+        if (force and size > 0) or _should_rotate(size, _first_ts(tdir, pid, head["seq_base"])):
+            sealed = _seal(tdir, pid, log, _load_segments(tdir, pid))
+            _write_head(tdir, pid, dict(head, base=head["offset"], seq_base=head["count"], base_ts=None))
+        return {"sealed": sealed, "segments": _load_segments(tdir, pid)}
+
+
+def segment_stats(data_dir: Path, project_path: str) -> Dict[str, Any]:
+    pid = _project_id(project_path)
+    tdir = data_dir / "timeline"
+    segs = _load_segments(tdir, pid)
+    log = tdir / f"{pid}.jsonl"
+    active = log.stat().st_size if log.exists() else 0
+    raw = sum(seg["raw_bytes"] for seg in segs)
+    stored = sum(seg["stored_bytes"] for seg in segs)
+    return {
+        "segments": len(segs),
+        "sealed_raw_bytes": raw,
+        "sealed_stored_bytes": stored,
+        "compression_ratio": round(raw / stored, 2) if stored else None,
+        "active_bytes": active,
+        "max_segment_bytes": SEGMENT_MAX_BYTES,
+        "max_segment_age_sec": SEGMENT_MAX_AGE_SEC,
+    }
+
+
 def append_event(data_dir: Path, project_path: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Append `event` to the project's hash-chained timeline. The previous hash comes
+    from the `.head` sidecar, so appends cost O(1) regardless of history length, and
+    an OS file lock serializes writers across threads and worker processes. The
+    active log is sealed into a compressed segment once it exceeds the size/age
+    limits; the chain simply continues in the fresh active log.
+    """
     pid = _project_id(project_path)
     tdir = data_dir / "timeline"
     tdir.mkdir(parents=True, exist_ok=True)
     log = tdir / f"{pid}.jsonl"
 
-    prev_hash = ""
-    if log.exists():
-        try:
-            *_, last = log.read_text(encoding="utf-8").strip().splitlines()
-            prev = json.loads(last)
-            prev_hash = prev.get("chain_hash", "")
-        except Exception:
-            prev_hash = ""
-
-    event = dict(event)
-    event["timestamp"] = time.time()
-    payload = {k: v for k, v in event.items() if k != "chain_hash"}
-    event["chain_hash"] = _chain_hash(prev_hash, payload)
-    with log.open("a", encoding="utf-8") as fh:
-        fh.write(json.dumps(event) + "\n")
+    with _locked(tdir, pid):
+        head = _read_head(tdir, pid, log)
+        event = dict(event)
+        event["timestamp"] = time.time()
+        payload = {k: v for k, v in event.items() if k != "chain_hash"}
+        event["chain_hash"] = _chain_hash(head.get("chain_hash", ""), payload)
+        line = (json.dumps(event) + "\n").encode("utf-8")
+        if _index_end(tdir, pid) != head["offset"]:
+            _sync_index(tdir, pid, log)
+        with log.open("ab") as fh:
+            fh.write(line)
+        _append_index(tdir, pid, [(head["offset"], len(line), event)])
+        if head.get("count", 0) == head["seq_base"]:
+            head["base_ts"] = event["timestamp"]
+        head = dict(head, chain_hash=event["chain_hash"], offset=head["offset"] + len(line),
+                    count=head.get("count", 0) + 1)
+        if _should_rotate(head["offset"] - head["base"], head.get("base_ts")):
+            _seal(tdir, pid, log, _load_segments(tdir, pid))
+            head.update(base=head["offset"], seq_base=head["count"], base_ts=None)
+        _write_head(tdir, pid, head)
     return event
 
 
-essential_fields = ["type", "file", "domain", "cues", "result"]
+class _Strings:
+    """
+    Interned type/file strings for the index; id = 1-based line in <pid>.strings.
+    Instances are cached per path (see _strings) and only read lines appended
+    since their last refresh, so interning stays O(new strings).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.offset = 0
+        self.lock = threading.Lock()
+
+    def refresh(self) -> None:
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size < self.offset:  # replaced or truncated: start over
+            self.values, self.ids, self.offset = [], {}, 0
+        if size == self.offset:
+            return
+        with self.path.open("rb") as fh:
+            fh.seek(self.offset)
+            data = fh.read(size - self.offset)
+        end = data.rfind(b"\n") + 1  # ignore a partially written last line
+        for line in data[:end].splitlines():
+            try:
+                value = json.loads(line)
+            except Exception:
+                value = ""
+            self.values.append(value)
+            self.ids.setdefault(value, len(self.values))
+        self.offset += end
+
+    def get(self, sid: int) -> Optional[str]:
+        return self.values[sid - 1] if 0 < sid <= len(self.values) else None
+
+    def lookup(self, value) -> Optional[int]:
+        return self.ids.get(value) if isinstance(value, str) else None
+
+    def intern_all(self, values: List[Any]) -> List[int]:
+        """Ids for `values` (0 for empty/non-strings), appending unseen ones to the table. Caller holds the timeline lock."""
+        with self.lock:
+            self.refresh()
+            new: List[str] = []
+            out = []
+            for value in values:
+                if not isinstance(value, str) or not value:
+                    out.append(0)
+                    continue
+                sid = self.ids.get(value)
+                if sid is None:
+                    self.values.append(value)
+                    sid = self.ids[value] = len(self.values)
+                    new.append(value)
+                out.append(sid)
+            if new:
+                data = "".join(json.dumps(v) + "\n" for v in new).encode("utf-8")
+                with self.path.open("ab") as fh:
+                    fh.write(data)
+                self.offset += len(data)
+            return out
+
+
+_strings_cache: Dict[str, _Strings] = {}
+_strings_cache_guard = threading.Lock()
+
+
+def _strings(spath: Path) -> _Strings:
+    with _strings_cache_guard:
+        table = _strings_cache.get(str(spath))
+        if table is None:
+            table = _strings_cache[str(spath)] = _Strings(spath)
+    with table.lock:
+        table.refresh()
+    return table
 
 
-def list_events(data_dir: Path, project_path: str) -> Dict[str, Any]:
+def _index_paths(tdir: Path, pid: str):
+    return tdir / f"{pid}.idx", tdir / f"{pid}.strings"
+
+
+def _index_count(idx: Path) -> int:
+    return idx.stat().st_size // IDX_REC.size if idx.exists() else 0
+
+
+def _read_record(fh, i: int) -> tuple:
+    fh.seek(i * IDX_REC.size)
+    return IDX_REC.unpack(fh.read(IDX_REC.size))
+
+
+def _index_end(tdir: Path, pid: str) -> int:
+    """Logical byte offset just past the last indexed event."""
+    idx, _ = _index_paths(tdir, pid)
+    n = _index_count(idx)
+    if not n:
+        return 0
+    with idx.open("rb") as fh:
+        rec = _read_record(fh, n - 1)
+    return rec[0] + rec[1]
+
+
+def _append_index(tdir: Path, pid: str, entries: List[tuple]) -> None:
+    idx, spath = _index_paths(tdir, pid)
+    strings = _strings(spath)
+    # Only bounded vocabularies (event types, file paths) are interned; free-text messages are not
+    ids = strings.intern_all([v for _, _, ev in entries for v in (ev.get("type"), ev.get("file"))])
+    recs = []
+    for k, (offset, length, ev) in enumerate(entries):
+        try:
+            chain = bytes.fromhex(ev.get("chain_hash") or "")[:32]
+        except ValueError:
+            chain = b""
+        recs.append(IDX_REC.pack(offset, length, float(ev.get("timestamp") or 0.0), ids[2 * k], ids[2 * k + 1], 0,
+                                 chain))
+    with idx.open("ab") as fh:
+        fh.write(b"".join(recs))
+
+
+def _sync_index(tdir: Path, pid: str, log: Path) -> None:
+    """Bring <pid>.idx up to date with the log (first use on old logs, or after a crash). Caller holds the lock."""
+    idx, _ = _index_paths(tdir, pid)
+    if idx.exists() and idx.stat().st_size % IDX_REC.size:
+        with idx.open("r+b") as fh:
+            fh.truncate(_index_count(idx) * IDX_REC.size)
+    start = _index_end(tdir, pid)
+    segs = _load_segments(tdir, pid)
+    if start >= _base(segs) + (log.stat().st_size if log.exists() else 0):
+        return
+    batch = []
+    with _LogReader(tdir, pid) as reader:
+        for offset, line in reader.lines(start):
+            try:
+                ev = json.loads(line)
+            except Exception:
+                ev = {}
+            batch.append((offset, len(line), ev if isinstance(ev, dict) else {}))
+            if len(batch) >= IDX_SCAN_CHUNK:
+                _append_index(tdir, pid, batch)
+                batch = []
+    if batch:
+        _append_index(tdir, pid, batch)
+
+
+def _ensure_index(tdir: Path, pid: str, log: Path) -> None:
+    size = _base(_load_segments(tdir, pid)) + (log.stat().st_size if log.exists() else 0)
+    if _index_end(tdir, pid) < size:
+        with _locked(tdir, pid):
+            _sync_index(tdir, pid, log)
+
+
+def _bisect_ts(fh, lo: int, hi: int, ts: float) -> int:
+    """First index in [lo, hi) whose timestamp is >= ts (timestamps are append-ordered)."""
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _read_record(fh, mid)[2] < ts:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _summary(seq: int, rec: tuple, strings: _Strings) -> Dict[str, Any]:
+    out = {
+        "seq": seq,
+        "ts": rec[2],
+        "type": strings.get(rec[3]),
+        "file": strings.get(rec[4]),
+        "chain_hash": rec[6].hex() if rec[6] else None,
+    }
+    if rec[5]:
+        out["message"] = strings.get(rec[5])
+    return out
+
+
+def list_events(data_dir: Path, project_path: str, limit: int = DEFAULT_PAGE, cursor: Optional[int] = None,
+                type: Optional[str] = None, file: Optional[str] = None, since: Optional[float] = None,
+                until: Optional[float] = None, summary_only: bool = False) -> Dict[str, Any]:
+    """
+    One newest-first page of the timeline, served from the byte-offset index.
+    `cursor` is the `next_cursor` of the previous page (events with seq below it).
+    Filters on type/file/time use only the index; `summary_only` never reads the
+    event lines themselves, otherwise just the page's lines are parsed (from the
+    active log or, for older events, the sealed segment holding them).
+    """
     pid = _project_id(project_path)
-    log = data_dir / "timeline" / f"{pid}.jsonl"
+    tdir = data_dir / "timeline"
+    log = tdir / f"{pid}.jsonl"
+    out: Dict[str, Any] = {"total": 0, "next_cursor": None}
+    out["summary" if summary_only else "events"] = []
+    if not log.exists():
+        return out
+    _ensure_index(tdir, pid, log)
+    idx, spath = _index_paths(tdir, pid)
+    strings = _strings(spath)
+    n = _index_count(idx)
+    out["total"] = n
+    type_id = strings.lookup(type) if type else None
+    file_id = strings.lookup(file) if file else None
+    if (type and type_id is None) or (file and file_id is None):
+        return out
+    limit = max(1, min(int(limit or DEFAULT_PAGE), MAX_PAGE))
+
+    page: List[tuple] = []
+    more = False
+    with idx.open("rb") as fh:
+        hi = min(n, int(cursor)) if cursor is not None else n
+        lo = 0
+        if since is not None:
+            lo = _bisect_ts(fh, 0, hi, float(since))
+        if until is not None:
+            hi = _bisect_ts(fh, lo, hi, float(until))
+        pos = hi
+        while pos > lo and not more:
+            start = max(lo, pos - IDX_SCAN_CHUNK)
+            fh.seek(start * IDX_REC.size)
+            recs = list(IDX_REC.iter_unpack(fh.read((pos - start) * IDX_REC.size)))
+            for k in range(len(recs) - 1, -1, -1):
+                rec = recs[k]
+                if (type_id is None or rec[3] == type_id) and (file_id is None or rec[4] == file_id):
+                    if len(page) == limit:
+                        more = True
+                        break
+                    page.append((start + k, rec))
+            pos = start
+    if more:
+        out["next_cursor"] = page[-1][0]
+
+    if summary_only:
+        out["summary"] = [_summary(seq, rec, strings) for seq, rec in page]
+        return out
     events = []
-    if log.exists():
-        for line in log.read_text(encoding="utf-8").splitlines():
+    with _LogReader(tdir, pid) as reader:
+        for seq, rec in page:
             try:
-                events.append(json.loads(line))
+                ev = json.loads(reader.read(rec[0], rec[1]))
             except Exception:
                 continue
-    # Summarize lightweight for UI
-    summary = [{
-        "ts": e.get("timestamp"),
-        "type": e.get("type"),
-        "file": e.get("file"),
-        "message": e.get("message"),
-        "chain_hash": e.get("chain_hash")
-    } for e in events]
-    return {"events": events, "summary": summary}
+            ev["seq"] = seq
+            events.append(ev)
+    out["events"] = events
+    return out
@@ -0,0 +1,241 @@
+import hashlib
+import hmac
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from . import timeline
+
+# Events per Merkle block; a checkpoint is written when a block fills
+BLOCK_SIZE = 1024
+KEY_ENV = "SOFTPATENT_TIMELINE_KEY"
+
+
+def _leaf(line: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + line.rstrip(b"\n")).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    """Binary Merkle root; an unpaired node is carried up unchanged (no duplication)."""
+    level = list(leaves)
+    if not level:
+        return hashlib.sha256(b"").digest()
+    while len(level) > 1:
+        nxt = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0]
+
+
+def merkle_path(leaves: List[bytes], index: int) -> List[Dict[str, str]]:
+    path = []
+    level = list(leaves)
+    while len(level) > 1:
+        sib = index ^ 1
+        if sib < len(level):
+            path.append({"side": "left" if sib < index else "right", "hash": level[sib].hex()})
+        nxt = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level, index = nxt, index // 2
+    return path
+
+
+def verify_proof(leaf_hex: str, path: List[Dict[str, str]], root_hex: str) -> bool:
+    h = bytes.fromhex(leaf_hex)
+    for step in path:
+        sib = bytes.fromhex(step["hash"])
+        h = _node(sib, h) if step["side"] == "left" else _node(h, sib)
+    return hmac.compare_digest(h.hex(), root_hex)
+
+
+def _key(tdir: Path) -> bytes:
+    env = os.environ.get(KEY_ENV)
+    if env:
+        return env.encode("utf-8")
+    path = tdir / "checkpoint.key"
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(os.urandom(32).hex().encode("ascii"))
+    except FileExistsError:
+        pass
+    return path.read_bytes().strip()
+
+
+def _sign(key: bytes, cp: Dict[str, Any]) -> str:
+    body = json.dumps({k: v for k, v in cp.items() if k != "sig"}, sort_keys=True).encode("utf-8")
+    return hmac.new(key, body, hashlib.sha256).hexdigest()
+
+
+def _cp_path(tdir: Path, pid: str) -> Path:
+    return tdir / f"{pid}.checkpoints"
+
+
+def load_checkpoints(tdir: Path, pid: str, key: bytes) -> Dict[str, Any]:
+    """
+    Checkpoints whose HMAC verifies and which chain onto the previous one
+    (`prev_sig`). Loading stops at the first bad entry, which is reported.
+    """
+    trusted: List[Dict[str, Any]] = []
+    bad = None
+    path = _cp_path(tdir, pid)
+    if path.exists():
+        for n, line in enumerate(path.read_text(encoding="utf-8").splitlines()):
+            try:
+                cp = json.loads(line)
+            except Exception:
+                bad = {"line": n, "error": "unparseable checkpoint"}
+                break
+            prev_sig = trusted[-1]["sig"] if trusted else ""
+            if cp.get("block") != len(trusted) or cp.get("prev_sig") != prev_sig:
+                bad = {"line": n, "error": "checkpoint out of sequence"}
+                break
+            if not hmac.compare_digest(cp.get("sig", ""), _sign(key, cp)):
+                bad = {"line": n, "error": "checkpoint signature mismatch"}
+                break
+            trusted.append(cp)
+    return {"trusted": trusted, "bad": bad}
+
+
+def _event_chain_ok(line: bytes, prev_hash: str) -> Optional[str]:
+    """The event's chain_hash if it links to prev_hash, else None."""
+    try:
+        ev = json.loads(line)
+    except Exception:
+        return None
+    payload = {k: v for k, v in ev.items() if k != "chain_hash"}
+    expected = timeline._chain_hash(prev_hash, payload)
+    return expected if ev.get("chain_hash") == expected else None
+
+
+def verify(data_dir: Path, project_path: str, full: bool = False) -> Dict[str, Any]:
+    """
+    Verify the timeline's hash chain incrementally. Blocks covered by trusted,
+    signed checkpoints are skipped (only the boundary event is spot-checked);
+    later events are re-hashed and every newly filled block gets a checkpoint
+    (Merkle root over its raw event lines). `full` re-verifies from the start and
+    compares each block against its stored root.
+    """
+    t0 = time.perf_counter()
+    pid = timeline._project_id(project_path)
+    tdir = data_dir / "timeline"
+    log = tdir / f"{pid}.jsonl"
+    out: Dict[str, Any] = {"ok": True, "events": 0, "block_size": BLOCK_SIZE, "new_checkpoints": 0}
+    if not log.exists():
+        return dict(out, elapsed_sec=0.0)
+    key = _key(tdir)
+    with timeline._locked(tdir, pid):
+        timeline._sync_index(tdir, pid, log)
+        idx, _ = timeline._index_paths(tdir, pid)
+        n = timeline._index_count(idx)
+        loaded = load_checkpoints(tdir, pid, key)
+        cps = loaded["trusted"]
+        out.update({"events": n, "checkpoints": len(cps)})
+        if loaded["bad"]:
+            out.update({"ok": False, "checkpoint_error": loaded["bad"]})
+        if cps and cps[-1]["end_seq"] >= n:
+            return dict(out, ok=False, error="checkpoint beyond end of log (truncated?)",
+                        elapsed_sec=round(time.perf_counter() - t0, 4))
+
+        start_block = 0 if full else len(cps)
+        seq = start_block * BLOCK_SIZE
+        prev_hash, offset = "", 0
+        with idx.open("rb") as ifh:
+            if seq:
+                last = cps[start_block - 1]
+                rec = timeline._read_record(ifh, last["end_seq"])
+                # Spot-check the boundary so truncation or rewrites at the trust edge are caught
+                if rec[6].hex() != last["chain_hash"]:
+                    return dict(out, ok=False, first_bad_seq=last["end_seq"], error="event at checkpoint boundary changed",
+                                elapsed_sec=round(time.perf_counter() - t0, 4))
+                prev_hash, offset = last["chain_hash"], rec[0] + rec[1]
+        out["verified_from_seq"] = seq
+
+        leaves: List[bytes] = []
+        new_cps: List[Dict[str, Any]] = []
+        block_start_seq = seq
+        with timeline._LogReader(tdir, pid) as reader:
+            lines = reader.lines(offset)
+            while seq < n:
+                line = next(lines, (0, b""))[1]
+                if not line.endswith(b"\n"):
+                    return dict(out, ok=False, first_bad_seq=seq, error="log shorter than index",
+                                elapsed_sec=round(time.perf_counter() - t0, 4))
+                chain = _event_chain_ok(line, prev_hash)
+                if chain is None:
+                    return dict(out, ok=False, first_bad_seq=seq, error="hash chain broken",
+                                elapsed_sec=round(time.perf_counter() - t0, 4))
+                prev_hash = chain
+                leaves.append(_leaf(line))
+                seq += 1
+                if len(leaves) == BLOCK_SIZE:
+                    block = block_start_seq // BLOCK_SIZE
+                    root = merkle_root(leaves).hex()
+                    if block < len(cps):
+                        if cps[block]["root"] != root:
+                            return dict(out, ok=False, first_bad_seq=block_start_seq,
+                                        error=f"block {block} does not match its checkpoint root",
+                                        elapsed_sec=round(time.perf_counter() - t0, 4))
+                    else:
+                        cp = {"block": block, "start_seq": block_start_seq, "end_seq": seq - 1, "root": root,
+                              "chain_hash": prev_hash, "created": time.time(),
+                              "prev_sig": (new_cps or cps)[-1]["sig"] if (new_cps or cps) else ""}
+                        cp["sig"] = _sign(key, cp)
+                        new_cps.append(cp)
+                    leaves, block_start_seq = [], seq
+        if new_cps and not loaded["bad"]:
+            with _cp_path(tdir, pid).open("a", encoding="utf-8") as cfh:
+                cfh.write("".join(json.dumps(cp) + "\n" for cp in new_cps))
+            out["new_checkpoints"] = len(new_cps)
+            out["checkpoints"] = len(cps) + len(new_cps)
+    out["head"] = prev_hash
+    out["pending_events"] = len(leaves)
+    out["elapsed_sec"] = round(time.perf_counter() - t0, 4)
+    return out
+
+
+def inclusion_proof(data_dir: Path, project_path: str, seq: int) -> Dict[str, Any]:
+    """
+    Merkle inclusion proof for event `seq` against its block's signed checkpoint.
+    Reads only that block's bytes (located via the offset index), from the active
+    log or the sealed segment(s) holding it.
+    """
+    pid = timeline._project_id(project_path)
+    tdir = data_dir / "timeline"
+    log = tdir / f"{pid}.jsonl"
+    if not log.exists():
+        return {"error": "no timeline"}
+    key = _key(tdir)
+    cps = load_checkpoints(tdir, pid, key)["trusted"]
+    block = int(seq) // BLOCK_SIZE
+    if seq < 0 or block >= len(cps):
+        return {"error": "event not covered by a checkpoint yet; run /timeline/verify", "seq": seq}
+    cp = cps[block]
+    idx, _ = timeline._index_paths(tdir, pid)
+    with idx.open("rb") as ifh:
+        first = timeline._read_record(ifh, cp["start_seq"])
+        last = timeline._read_record(ifh, cp["end_seq"])
+    with timeline._LogReader(tdir, pid) as reader:
+        raw = reader.read(first[0], last[0] + last[1] - first[0])
+    lines = raw.splitlines(keepends=True)
+    leaves = [_leaf(ln) for ln in lines]
+    pos = int(seq) - cp["start_seq"]
+    root = merkle_root(leaves).hex()
+    proof = {
+        "seq": int(seq),
+        "event": json.loads(lines[pos]),
+        "leaf": leaves[pos].hex(),
+        "path": merkle_path(leaves, pos),
+        "root": cp["root"],
+        "checkpoint": cp,
+    }
+    proof["valid"] = root == cp["root"] and verify_proof(proof["leaf"], proof["path"], cp["root"])
+    return proof
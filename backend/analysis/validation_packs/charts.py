@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Dict, Any, Optional, Sequence
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+RENDER_WORKERS = 2
+RENDER_MODES = ("background", "lazy", "sync", "off")
+CHART_CACHE_DIRNAME = ".charts"
+# Cached PNGs are pruned least-recently-used past this count, and when older than the age
+CHART_CACHE_MAX_FILES = int(os.getenv("CHART_CACHE_MAX_FILES", "500"))
+CHART_CACHE_MAX_AGE_DAYS = float(os.getenv("CHART_CACHE_MAX_AGE_DAYS", "30"))
+PRUNE_EVERY = 20
+
+# Rendered PNGs keyed by series hash; set by the app, else next to the artifacts
+_cache_dir: Optional[Path] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_inflight: Dict[str, Future] = {}
+_lock = threading.RLock()
+_backend = None
+_renders = 0
+
+
+def set_cache_dir(path: Path) -> None:
+    global _cache_dir
+    _cache_dir = Path(path)
+
+
+def get_cache_dir() -> Optional[Path]:
+    return _cache_dir
+
+
+def _cache_root(target: Path) -> Path:
+    root = _cache_dir or (target.parent / CHART_CACHE_DIRNAME)
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def _figure_cls():
+    """Import matplotlib on first render only; uses the OO API so worker threads never touch pyplot."""
+    global _backend
+    if _backend is None:
+        try:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            _backend = (Figure, FigureCanvasAgg)
+        except Exception:
+            _backend = False
+    return _backend or None
+
+
+def available() -> bool:
+    try:
+        import importlib.util
+        return importlib.util.find_spec("matplotlib") is not None
+    except Exception:
+        return False
+
+
+def series_hash(series: Sequence[float], spec: Dict[str, Any]) -> str:
+    h = hashlib.sha256()
+    if np is not None:
+        h.update(np.ascontiguousarray(series, dtype=np.float64).tobytes())
+    else:
+        h.update(json.dumps([float(v) for v in series]).encode("utf-8"))
+    h.update(json.dumps(spec, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _render(series: Sequence[float], spec: Dict[str, Any], dest: Path) -> bool:
+    backend = _figure_cls()
+    if backend is None:
+        return False
+    Figure, FigureCanvasAgg = backend
+    fig = Figure(figsize=(6, 3))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.plot(series)
+    ax.set_title(spec.get("title", ""))
+    ax.set_xlabel(spec.get("x_label", ""))
+    ax.set_ylabel(spec.get("y_label", ""))
+    fig.tight_layout()
+    tmp = dest.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    fig.savefig(tmp, format="png")
+    os.replace(tmp, dest)
+    return True
+
+
+def _touch(cached: Path) -> None:
+    """Mark a cache hit; pruning evicts by mtime."""
+    try:
+        os.utime(cached)
+    except OSError:
+        pass
+
+
+def prune(root: Path, max_files: int = CHART_CACHE_MAX_FILES,
+          max_age_days: float = CHART_CACHE_MAX_AGE_DAYS) -> int:
+    """
+    Drop cached PNGs unused for `max_age_days`, then the least recently used past
+    `max_files`. Placed artifacts are hard links or copies, so they survive. Returns
+    the number removed.
+    """
+    entries = []
+    for f in Path(root).glob("*.png"):
+        try:
+            entries.append((f.stat().st_mtime, f))
+        except OSError:
+            continue
+    entries.sort(reverse=True)
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for i, (mtime, f) in enumerate(entries):
+        if i >= max_files or mtime < cutoff:
+            try:
+                f.unlink()
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def _place(cached: Path, target: Path) -> None:
+    if target.exists():
+        return
+    try:
+        os.link(cached, target)
+    except OSError:
+        shutil.copyfile(cached, target)
+
+
+def _render_to(series, spec: Dict[str, Any], key: str, target: Path) -> Optional[str]:
+    global _renders
+    root = _cache_root(target)
+    cached = root / f"{key}.png"
+    if cached.exists():
+        _touch(cached)
+    else:
+        if not _render(series, spec, cached):
+            return None
+        with _lock:
+            _renders += 1
+            due = _renders % PRUNE_EVERY == 1
+        if due:
+            prune(root)
+    _place(cached, target)
+    return str(target)
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="chart-render")
+    return _executor
+
+
+def request(series: Sequence[float], spec: Dict[str, Any], target: Path, mode: str = "background") -> Dict[str, Any]:
+    """
+    Schedule the chart for `target`. Identical series+labels reuse the cached PNG;
+    otherwise "background" renders on the worker pool, "lazy" defers to the first
+    ensure() (GET), "sync" renders now and "off" skips the chart.
+    """
+    key = series_hash(series, spec)
+    out = {"path": str(target), "hash": key}
+    if mode == "off" or not available():
+        return dict(out, status="skipped")
+    cached = _cache_root(target) / f"{key}.png"
+    if cached.exists():
+        _touch(cached)
+        _place(cached, target)
+        return dict(out, status="cached")
+    if mode == "sync":
+        return dict(out, status="rendered" if _render_to(series, spec, key, target) else "skipped")
+    if mode == "lazy":
+        return dict(out, status="deferred")
+    with _lock:
+        fut = _inflight.get(str(target))
+        if fut is None:
+            # Snapshot the data: callers may hand in a memmap or a buffer they keep mutating
+            snap = np.array(series, dtype=float) if np is not None else list(series)
+            fut = _pool().submit(_render_to, snap, dict(spec), key, target)
+            _inflight[str(target)] = fut
+            fut.add_done_callback(lambda _f, k=str(target): _forget(k))
+    return dict(out, status="queued")
+
+
+def _forget(key: str) -> None:
+    with _lock:
+        _inflight.pop(key, None)
+
+
+def ensure(target: Path, load, timeout: float = 30.0) -> Optional[Path]:
+    """
+    Return `target`, rendering it first if needed: waits for an in-flight background
+    render, else calls `load()` -> (series, spec) and renders on the worker pool.
+    Raises TimeoutError if the render is still running after `timeout`; it keeps
+    going, so the caller can retry.
+    """
+    target = Path(target)
+    if target.exists():
+        return target
+    with _lock:
+        fut = _inflight.get(str(target))
+    if fut is None:
+        loaded = load()
+        if not loaded:
+            return None
+        series, spec = loaded
+        with _lock:
+            fut = _inflight.get(str(target))
+            if fut is None:
+                fut = _pool().submit(_render_to, series, dict(spec), series_hash(series, spec), target)
+                _inflight[str(target)] = fut
+                fut.add_done_callback(lambda _f, k=str(target): _forget(k))
+    try:
+        fut.result(timeout=timeout)
+    except FutureTimeout:
+        raise TimeoutError(f"chart still rendering after {timeout}s: {target.name}") from None
+    return target if target.exists() else None
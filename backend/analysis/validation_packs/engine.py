@@ -0,0 +1,181 @@
+from pathlib import Path
+from typing import Dict, Any, Optional, Sequence
+import json
+import time
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from . import charts
+from .packs import PACK_DEFS
+
+PERCENTILES = (1, 5, 50, 95, 99)
+SERIES_DTYPE = "<f8"
+
+
+def _r(v: float, nd: int = 4) -> float:
+    return round(float(v), nd)
+
+
+def simulate_series(pack: Dict[str, Any], rng=None):
+    sim = pack["simulate"]
+    rng = rng or np.random.default_rng()
+    base = rng.uniform(*sim["base"])
+    x = base + rng.uniform(-sim["noise"], sim["noise"], size=sim["n"])
+    if sim.get("floor") is not None:
+        x = np.maximum(sim["floor"], x)
+    return np.round(x, sim.get("decimals", 3))
+
+
+def _longest_run(mask) -> int:
+    if not mask.any():
+        return 0
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return int((ends - starts).max())
+
+
+def violations(x, thresholds: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    out = {}
+    for level, bounds in (thresholds or {}).items():
+        mask = np.zeros(len(x), dtype=bool)
+        if bounds.get("below") is not None:
+            mask |= x < bounds["below"]
+        if bounds.get("above") is not None:
+            mask |= x > bounds["above"]
+        count = int(mask.sum())
+        out[level] = {**bounds, "count": count, "rate": _r(count / len(x)) if len(x) else 0.0,
+                      "longest_run": _longest_run(mask)}
+    return out
+
+
+def series_stats(x, pack: Dict[str, Any]) -> Dict[str, Any]:
+    """Distribution, tail, jitter and threshold statistics for one series (vectorized)."""
+    x = np.asarray(x, dtype=float)
+    x = x[np.isfinite(x)]
+    if not len(x):
+        return {"n": 0}
+    pct = np.percentile(x, PERCENTILES)
+    steps = np.abs(np.diff(x))
+    stats = {
+        "n": int(len(x)),
+        "mean": _r(x.mean()),
+        "std": _r(x.std()),
+        "min": _r(x.min()),
+        "max": _r(x.max()),
+        **{f"p{p}": _r(v) for p, v in zip(PERCENTILES, pct)},
+        # Sample-to-sample variation: mean and p99 of |x[i+1] - x[i]|
+        "jitter": _r(steps.mean()) if len(steps) else 0.0,
+        "jitter_p99": _r(np.percentile(steps, 99)) if len(steps) else 0.0,
+    }
+    if pack.get("frame_rate"):
+        fps = x[x > 0]
+        if len(fps):
+            ft = 1000.0 / fps
+            k = max(1, int(len(fps) * 0.01))
+            stats.update({
+                "frame_time_mean_ms": _r(ft.mean()),
+                "frame_time_var_ms2": _r(ft.var()),
+                "frame_time_p99_ms": _r(np.percentile(ft, 99)),
+                "one_percent_low": _r(np.partition(fps, k - 1)[:k].mean()),
+            })
+    stats["violations"] = violations(x, pack.get("thresholds"))
+    levels = stats["violations"]
+    stats["status"] = ("fail" if levels.get("fail", {}).get("count") else
+                       "warn" if levels.get("warn", {}).get("count") else "pass")
+    return stats
+
+
+def chart_spec(pack: Dict[str, Any], kind: str) -> Dict[str, Any]:
+    return {"title": f"{pack['title']} ({kind})", "x_label": pack["x_label"], "y_label": pack["y_label"]}
+
+
+def save_series(path: Path, x) -> None:
+    """Write the series as a little-endian float64 .npy (atomically), so readers can mmap it."""
+    tmp = path.with_suffix(".npy.tmp")
+    with open(tmp, "wb") as fh:
+        np.save(fh, np.ascontiguousarray(x, dtype=SERIES_DTYPE))
+    tmp.replace(path)
+
+
+def load_series(path: Path, mmap: bool = True):
+    """
+    Series for a pack artifact (its .json summary, .png chart or .npy file),
+    memory-mapped read-only by default. Falls back to the inline list of older
+    JSON artifacts.
+    """
+    path = Path(path)
+    npy = path.with_suffix(".npy")
+    if npy.exists():
+        return np.load(npy, mmap_mode="r" if mmap else None, allow_pickle=False)
+    data = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+    return np.asarray(data["series"], dtype=float)
+
+
+def load_chart_source(img_path: Path):
+    """(series, chart spec) for a pack chart, read from the artifacts written next to it."""
+    try:
+        data = json.loads(Path(img_path).with_suffix(".json").read_text(encoding="utf-8"))
+        return load_series(img_path), data["chart"]
+    except Exception:
+        return None
+
+
+def _legacy_summary(pack: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+    keys = pack.get("summary_keys", {})
+    out = {}
+    if "avg" in keys:
+        out[keys["avg"]] = stats["mean"]
+    if "std" in keys:
+        out[keys["std"]] = stats["std"]
+    if "count" in keys:
+        out[keys["count"]] = stats["n"]
+    return out
+
+
+def run(domain: str, project_path: str, out_dir: Path, series: Optional[Sequence[float]] = None,
+        source: Optional[Dict[str, Any]] = None, render: str = "background") -> Dict[str, Any]:
+    """
+    Run the `domain` pack over `series` (measured, e.g. harness samples) or a
+    simulated series. Writes the series as .npy plus a small stats JSON and
+    requests its chart (see charts.request for `render`); the summary carries
+    tail percentiles, jitter and threshold violations.
+    """
+    pack = PACK_DEFS[domain]
+    if np is None:
+        return {"error": "numpy not installed", "artifacts": [], "summary": {}}
+    measured = series is not None and len(series) > 0
+    x = np.asarray(series, dtype=float) if measured else simulate_series(pack)
+    kind = "measured" if measured else "simulated"
+    stats = series_stats(x, pack)
+    if not stats["n"]:
+        return {"error": "series has no finite values", "artifacts": [], "summary": {}}
+
+    ts = int(time.time())
+    data_path = out_dir / f"{pack['artifact']}_{ts}.json"
+    spec = chart_spec(pack, kind)
+    series_path = data_path.with_suffix(".npy")
+    save_series(series_path, x)
+    data = {"metric": pack["metric"], "unit": pack["unit"], "source": kind, "series_file": series_path.name,
+            "series_len": int(len(x)), "series_dtype": SERIES_DTYPE, "stats": stats, "avg": stats["mean"],
+            "chart": spec}
+    if source:
+        data["origin"] = source
+    data_path.write_text(json.dumps(data, indent=2))
+
+    artifacts = [str(data_path), str(series_path)]
+    chart = charts.request(x, spec, out_dir / f"{pack['artifact']}_{ts}.png", render)
+    if chart["status"] != "skipped":
+        artifacts.append(chart["path"])
+
+    summary = {
+        **_legacy_summary(pack, stats),
+        "metric": pack["metric"],
+        "unit": pack["unit"],
+        "lower_is_better": pack["lower_is_better"],
+        "source": kind,
+        **{k: v for k, v in stats.items() if k not in ("n",)},
+    }
+    return {"artifacts": artifacts, "summary": summary, "charts": [chart]}
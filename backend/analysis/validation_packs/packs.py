@@ -0,0 +1,94 @@
+# Validation pack definitions consumed by engine.py.
+#
+# Each pack declares its metric and direction, how to simulate a series when no
+# measured one is supplied, chart labels, and thresholds. A threshold level maps
+# to {"below": x} and/or {"above": x}; samples outside count as violations.
+# `summary_keys` keeps the legacy summary field names ("avg_fps", "frames", ...).
+
+PACK_DEFS = {
+    "gaming": {
+        "metric": "fps",
+        "unit": "fps",
+        "lower_is_better": False,
+        "frame_rate": True,
+        "artifact": "gaming_fps",
+        "title": "Gaming FPS",
+        "x_label": "Frame",
+        "y_label": "FPS",
+        "simulate": {"n": 120, "base": (45.0, 60.0), "noise": 3.0, "decimals": 2},
+        "thresholds": {"warn": {"below": 50.0}, "fail": {"below": 30.0}},
+        "summary_keys": {"avg": "avg_fps", "count": "frames"},
+    },
+    "hpc": {
+        "metric": "linpack_gflops",
+        "unit": "GFLOPS",
+        "lower_is_better": False,
+        "artifact": "hpc_linpack",
+        "title": "HPC LINPACK GFLOPS",
+        "x_label": "Trial",
+        "y_label": "GFLOPS",
+        "simulate": {"n": 60, "base": (20.0, 80.0), "noise": 5.0, "decimals": 2},
+        "thresholds": {"warn": {"below": 30.0}, "fail": {"below": 20.0}},
+        "summary_keys": {"avg": "avg_gflops", "count": "trials"},
+    },
+    "satellite": {
+        "metric": "telemetry_signal",
+        "unit": None,
+        "lower_is_better": None,
+        "artifact": "satellite_telemetry",
+        "title": "Satellite Telemetry Simulation",
+        "x_label": "Tick",
+        "y_label": "Signal",
+        "simulate": {"n": 200, "base": (0.0, 1.0), "noise": 0.2, "decimals": 3},
+        "thresholds": {"warn": {"below": -0.1, "above": 1.1}, "fail": {"below": -0.2, "above": 1.2}},
+        "summary_keys": {"std": "std", "count": "samples"},
+    },
+    "sustainability": {
+        "metric": "pipeline_throughput_mb_s",
+        "unit": "MB/s",
+        "lower_is_better": False,
+        "artifact": "sustainability_throughput",
+        "title": "Sustainability Pipeline Throughput",
+        "x_label": "Time window",
+        "y_label": "MB/s",
+        "simulate": {"n": 120, "base": (60.0, 120.0), "noise": 10.0, "decimals": 2},
+        "thresholds": {"warn": {"below": 60.0}, "fail": {"below": 40.0}},
+        "summary_keys": {"avg": "avg_throughput_mb_s", "count": "windows"},
+    },
+    "speech_therapy": {
+        "metric": "inference_latency_ms",
+        "unit": "ms",
+        "lower_is_better": True,
+        "artifact": "speech_therapy_latency",
+        "title": "Speech Therapy Inference Latency",
+        "x_label": "Frame",
+        "y_label": "Latency (ms)",
+        "simulate": {"n": 120, "base": (80.0, 150.0), "noise": 15.0, "decimals": 1},
+        "thresholds": {"warn": {"above": 150.0}, "fail": {"above": 200.0}},
+        "summary_keys": {"avg": "avg_inference_latency_ms", "count": "frames"},
+    },
+    "medical": {
+        "metric": "samples_per_min",
+        "unit": "samples/min",
+        "lower_is_better": False,
+        "artifact": "medical_throughput",
+        "title": "Medical Diagnostic Throughput",
+        "x_label": "Time window",
+        "y_label": "Samples/min",
+        "simulate": {"n": 120, "base": (20.0, 60.0), "noise": 5.0, "decimals": 2},
+        "thresholds": {"warn": {"below": 25.0}, "fail": {"below": 15.0}},
+        "summary_keys": {"avg": "avg_samples_per_min", "count": "windows"},
+    },
+    "robotics": {
+        "metric": "slam_ate_m",
+        "unit": "m",
+        "lower_is_better": True,
+        "artifact": "robotics_slam_ate",
+        "title": "Robotics SLAM ATE",
+        "x_label": "Frame",
+        "y_label": "ATE (m)",
+        "simulate": {"n": 120, "base": (0.3, 0.8), "noise": 0.1, "decimals": 3, "floor": 0.05},
+        "thresholds": {"warn": {"above": 0.8}, "fail": {"above": 1.0}},
+        "summary_keys": {"avg": "avg_slam_ate_m", "count": "frames"},
+    },
+}
@@ -1,28 +1,107 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any
-from . import gaming, hpc, satellite
-from . import sustainability, speech_therapy, medical
+from typing import Dict, Any, List, Optional, Sequence
+from . import charts, engine
+from .packs import PACK_DEFS
+
 try:
-    from . import robotics
+    from .. import sandbox
 except Exception:
-    robotics = None
+    sandbox = None
+
+WORKER = Path(__file__).resolve().parent / "worker.py"
+DEFAULT_PACK_TIMEOUT_SEC = 60.0
+# numpy/BLAS reserve a lot of address space up front; keep the rlimit generous
+PACK_MEM_MB = 2048
 
-PACKS = {
-    "gaming": gaming.run,
-    "hpc": hpc.run,
-    "satellite": satellite.run,
-    "sustainability": sustainability.run,
-    "speech_therapy": speech_therapy.run,
-    "medical": medical.run,
-}
-if robotics is not None:
-    PACKS["robotics"] = robotics.run
+# domain -> run(project_path, out_dir, series=None, source=None, render="background")
+PACKS = {domain: partial(engine.run, domain) for domain in PACK_DEFS}
 
 
-def run_validation_pack(domain: str, project_path: str, out_dir: Path) -> Dict[str, Any]:
+def run_validation_pack(domain: str, project_path: str, out_dir: Path, series: Optional[Sequence[float]] = None,
+                        source: Optional[Dict[str, Any]] = None, render: str = "background") -> Dict[str, Any]:
     domain = (domain or "").lower()
     fn = PACKS.get(domain)
     if not fn:
         return {"error": f"unsupported domain: {domain}", "artifacts": [], "summary": {}}
     out_dir.mkdir(parents=True, exist_ok=True)
-    return fn(project_path, out_dir)
+    return fn(project_path, out_dir, series=series, source=source, render=render)
+
+
+def _run_in_child(domain: str, project_path: str, out_dir: Path, series, timeout: float) -> Dict[str, Any]:
+    payload = {"domain": domain, "project_path": project_path, "out_dir": str(out_dir), "series": series,
+               "chart_cache": str(charts.get_cache_dir() or "") or None}
+    t0 = time.perf_counter()
+    res = sandbox.run_json_child(WORKER, payload, timeout=timeout, mem_mb=PACK_MEM_MB)
+    wall = round(time.perf_counter() - t0, 4)
+    err = res.get("error")
+    status = "ok" if not err else ("timeout" if str(err).startswith("timeout") else "error")
+    entry = {"status": status, "timing": {"wall_sec": wall, "compute_sec": res.get("compute_sec")}}
+    if err:
+        entry["error"] = err
+        if res.get("stderr"):
+            entry["stderr"] = res["stderr"][-1000:]
+    else:
+        entry.update({k: res.get(k) for k in ("artifacts", "summary", "charts")})
+    return entry
+
+
+def run_validation_packs(project_path: str, out_dir: Path, domains: Optional[List[str]] = None,
+                         timeout: float = DEFAULT_PACK_TIMEOUT_SEC, max_workers: Optional[int] = None,
+                         series: Optional[Dict[str, Sequence[float]]] = None,
+                         render: str = "background") -> Dict[str, Any]:
+    """
+    Run several packs (default: all PACKS) concurrently, each in its own sandboxed
+    interpreter with a per-pack timeout, writing into one `out_dir`. Returns the
+    merged index (also written to out_dir/index.json) with per-pack timings.
+    """
+    domains = [d.lower() for d in (domains or list(PACKS))]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    series = series or {}
+    packs: Dict[str, Dict[str, Any]] = {}
+    runnable = []
+    for d in dict.fromkeys(domains):
+        if d not in PACKS:
+            packs[d] = {"status": "error", "error": f"unsupported domain: {d}"}
+        else:
+            runnable.append(d)
+    if runnable and sandbox is None:
+        for d in runnable:
+            packs[d] = {"status": "error", "error": "sandbox unavailable"}
+        runnable = []
+
+    t0 = time.perf_counter()
+    workers = max(1, min(len(runnable) or 1, max_workers or os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="validation-pack") as ex:
+        futures = {d: ex.submit(_run_in_child, d, project_path, out_dir, series.get(d), timeout) for d in runnable}
+        for d, fut in futures.items():
+            packs[d] = fut.result()
+    wall = round(time.perf_counter() - t0, 4)
+
+    # Children leave charts deferred; hand them to this process' renderer
+    for entry in packs.values():
+        for i, chart in enumerate(entry.get("charts") or []):
+            if chart.get("status") == "deferred" and render != "lazy":
+                src = engine.load_chart_source(Path(chart["path"]))
+                if src:
+                    entry["charts"][i] = charts.request(src[0], src[1], Path(chart["path"]), render)
+
+    index = {
+        "out_dir": str(out_dir),
+        "domains": list(packs),
+        "packs": {d: packs[d] for d in dict.fromkeys(domains)},
+        "artifacts": [a for e in packs.values() for a in (e.get("artifacts") or [])],
+        "timings": {
+            "wall_sec": wall,
+            "sum_pack_sec": round(sum((e.get("timing") or {}).get("wall_sec") or 0.0 for e in packs.values()), 4),
+            "workers": workers,
+            "timeout_sec": timeout,
+        },
+        "status": "ok" if all(e["status"] == "ok" for e in packs.values()) else "partial",
+    }
+    (out_dir / "index.json").write_text(json.dumps(index, indent=2))
+    return index
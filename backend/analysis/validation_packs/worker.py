@@ -0,0 +1,35 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+# Run as a script under `python -P`: make the backend root importable for the package
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from analysis.validation_packs import charts, runner  # noqa: E402
+
+
+def _child_main() -> None:
+    """Subprocess entry point: run one pack from the JSON payload on stdin, print the result line."""
+    payload = json.loads(sys.stdin.read() or "{}")
+    real_stdout = sys.stdout
+    sys.stdout = sys.stderr
+    t0 = time.perf_counter()
+    try:
+        if payload.get("chart_cache"):
+            charts.set_cache_dir(Path(payload["chart_cache"]))
+        # Charts are rendered by the parent; a child-side background render would die with the child
+        result = runner.run_validation_pack(payload["domain"], payload.get("project_path") or "",
+                                            Path(payload["out_dir"]), series=payload.get("series"),
+                                            render="lazy")
+    except BaseException as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        sys.stdout = real_stdout
+    result["compute_sec"] = round(time.perf_counter() - t0, 4)
+    real_stdout.write(json.dumps(result) + "\n")
+    real_stdout.flush()
+
+
+if __name__ == "__main__":
+    _child_main()
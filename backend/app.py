@@ -1,16 +1,21 @@
 from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect, Body
-from fastapi.responses import HTMLResponse, JSONResponse
-import os, json, time
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse, FileResponse
+import os, json, time, asyncio
 from pathlib import Path
 
 # import analysis modules
 from analysis.analyzer import analyze_project
 from analysis.suggestion import generate_suggestion_patch, generate_suggestions
-from analysis.profiler import run_profile_on_example
-from analysis.benchmark import run_benchmark, compare_results, record_result
+from analysis.profiler import run_profile_on_example, start_profile_job, capture_for_diff
+from analysis import jobs as jobs_mod
+from analysis import profile_data as profile_data_mod
+from analysis.benchmark import run_benchmark, compare_results, DEFAULT_MIN_EFFECT, DEFAULT_ALPHA, METRIC_META
+from analysis import bench_store as bench_store_mod
+from analysis import bench_scheduler as bench_scheduler_mod
 from analysis.feedback import store_feedback
 from analysis.compliance import check_compliance
 from analysis.validation_packs import runner as validation_runner
+from analysis.validation_packs import charts as charts_mod, engine as pack_engine
 try:
     from analysis.openai_integration import _configure_gemini, call_ai as call_ai_provider
 except Exception:
@@ -21,7 +26,11 @@ try:
 except Exception:
     detect_domain = None
 from analysis import timeline as timeline_mod
+from analysis import timeline_verify as timeline_verify_mod
 from analysis import tuning as tuning_mod
+from analysis import costmodel as costmodel_mod
+from analysis.event_writer import EventWriter
+from analysis.event_buffer import EventBuffer
 
 # --------------------------------------------------
 # Initialize app FIRST
@@ -32,11 +41,18 @@ EVENT_LOG = BASE / "events.log"
 DATA_DIR = BASE / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
+charts_mod.set_cache_dir(DATA_DIR / "charts")
+
 if not EVENT_LOG.exists():
     EVENT_LOG.write_text("")
 
-events = []
+events = EventBuffer()
 clients = set()
+event_writer = EventWriter(EVENT_LOG)
+
+@app.on_event("shutdown")
+async def _close_event_writer():
+    await event_writer.close()
 
 # --------------------------------------------------
 # Event endpoint
@@ -45,11 +61,43 @@ clients = set()
 async def receive_event(request: Request):
     payload = await request.json()
     payload["_received_at"] = time.time()
-    events.append(payload)
-    with open(EVENT_LOG, "a", encoding="utf-8") as fh:
-        fh.write(json.dumps(payload) + "\n")
+    res = events.add(payload)
+    if res["resync"]:
+        return JSONResponse({"status": "resync", "uri": payload.get("uri"), "reason": res["resync"]})
+    await event_writer.submit(json.dumps(payload))
     return JSONResponse({"status": "ok"})
 
+@app.post("/events/batch")
+async def receive_events_batch(request: Request):
+    """Debounced batch from the extension; edit deltas the mirror cannot apply come back in `resync`."""
+    body = await request.json()
+    now = time.time()
+    lines, resync = [], {}
+    for payload in body.get("events") or []:
+        if not isinstance(payload, dict):
+            continue
+        payload["_received_at"] = now
+        res = events.add(payload)
+        if res["resync"]:
+            resync[payload.get("uri")] = res["resync"]
+            continue
+        lines.append(json.dumps(payload))
+    if lines:
+        await event_writer.submit(lines)
+    return JSONResponse({"status": "ok", "accepted": len(lines), "resync": list(resync), "reasons": resync})
+
+@app.get("/event/metrics")
+async def event_metrics():
+    return JSONResponse({"status": "ok", "writer": event_writer.metrics(), "buffer": events.stats()})
+
+@app.get("/events")
+async def recent_events(since: int = None, limit: int = 100, type: str = None, uri: str = None):
+    return JSONResponse({"status": "ok", **events.query(since, limit, type, uri), "buffer": events.stats()})
+
+@app.get("/events/state")
+async def events_state(uri: str = None, text: bool = False):
+    return JSONResponse({"status": "ok", "state": events.state(uri, text)})
+
 # --------------------------------------------------
 # WebSocket
 # --------------------------------------------------
@@ -60,8 +108,20 @@ async def websocket_endpoint(ws: WebSocket):
     try:
         while True:
             data = await ws.receive_text()
-            with open(EVENT_LOG, "a", encoding="utf-8") as fh:
-                fh.write(data + "\n")
+            try:
+                payload = json.loads(data)
+            except ValueError:
+                payload = None
+            if isinstance(payload, dict):
+                payload.setdefault("_received_at", time.time())
+                res = events.add(payload)
+                if res["resync"]:
+                    # Rejected delta: not logged; the client resends the full text
+                    await ws.send_text(json.dumps({"status": "resync", "uri": payload.get("uri"),
+                                                   "reason": res["resync"]}))
+                    continue
+                data = json.dumps(payload)
+            await event_writer.submit(data)
     except WebSocketDisconnect:
         clients.remove(ws)
 
@@ -70,13 +130,11 @@ async def websocket_endpoint(ws: WebSocket):
 # --------------------------------------------------
 @app.get("/", response_class=HTMLResponse)
 async def index():
-    lines = []
-    if EVENT_LOG.exists():
-        lines = EVENT_LOG.read_text().splitlines()[-50:]
-    items = "".join(f"<li><pre>{line}</pre></li>" for line in lines[::-1])
+    recent = events.query(limit=50)["events"]
+    items = "".join(f"<li><pre>{json.dumps(ev)}</pre></li>" for ev in recent[::-1])
     return HTMLResponse(f"""
     <h1>AI Refactor Backend</h1>
-    <p>Endpoints: /event, /analyze, /suggest, /feedback, /profile, /ws</p>
+    <p>Endpoints: /event, /events, /analyze, /suggest, /feedback, /profile, /ws</p>
     <ul>{items}</ul>
     """)
 
@@ -107,6 +165,8 @@ async def suggest(req: Request):
     path = body.get("path")
     targets = body.get("targets")
     compliance_targets = body.get("complianceTargets") or []
+    profile_execute = bool(body.get("profileExecute", False))
+    profile_samples = body.get("profileSamples") or {}
     if not file or not text:
         raise HTTPException(status_code=400, detail="Provide 'file' and 'text'")
     # Auto-detect domain if not provided
@@ -120,7 +180,10 @@ async def suggest(req: Request):
         except Exception:
             detected = None
     try:
-        suggestions = generate_suggestions(file, text, domain=domain, path=path, targets=targets, compliance_targets=compliance_targets)
+        # profileExecute runs a sandboxed micro-benchmark and calibrates the cost model
+        suggestions = await asyncio.to_thread(generate_suggestions, file, text, domain=domain, path=path, targets=targets,
+                                              compliance_targets=compliance_targets, profile_execute=profile_execute,
+                                              profile_samples=profile_samples, data_dir=DATA_DIR)
     except Exception as e:
         return JSONResponse({"status": "error", "detail": str(e)}, status_code=500)
 
@@ -210,6 +273,14 @@ async def apply_patch(req: Request):
 
     before_text = Path(file).read_text(encoding="utf-8") if Path(file).exists() else ""
 
+    # Optional before/after profiles so a metric change can be attributed to functions
+    profile_diff = bool(body.get("profileDiff", False))
+    # alloc (tracemalloc) multiplies run time several-fold, so it is opt-in
+    profile_modes = body.get("profileModes") or ["cprofile"]
+    profile_before = None
+    if profile_diff and isinstance(new_text, str):
+        profile_before = await asyncio.to_thread(capture_for_diff, project_path, profile_modes)
+
     # Apply (MVP: overwrite with newText if provided)
     backup_path = DATA_DIR / "backups" / (Path(file).name + ".bak")
     backup_path.parent.mkdir(parents=True, exist_ok=True)
@@ -219,7 +290,7 @@ async def apply_patch(req: Request):
 
     # Post-apply: benchmark and compliance (guarded)
     try:
-        bench_after = run_benchmark((domain or "gaming"), project_path)
+        bench_after = await asyncio.to_thread(run_benchmark, (domain or "gaming"), project_path, data_dir=DATA_DIR)
     except Exception as e:
         return JSONResponse({"status": "error", "stage": "benchmark", "detail": str(e)}, status_code=500)
     try:
@@ -227,6 +298,13 @@ async def apply_patch(req: Request):
     except Exception as e:
         return JSONResponse({"status": "error", "stage": "compliance", "detail": str(e)}, status_code=500)
 
+    prof_diff = None
+    if profile_before is not None:
+        profile_after = await asyncio.to_thread(capture_for_diff, project_path, profile_modes)
+        errors = {f"{when}.{m}": p["error"] for when, caps in (("before", profile_before), ("after", profile_after))
+                  for m, p in caps.items() if isinstance(p, dict) and p.get("error") and not p.get("functions") and not p.get("alloc")}
+        prof_diff = {"error": errors} if errors else profile_data_mod.diff_profiles(profile_before, profile_after, top=10)
+
     # Timeline
     try:
         event = timeline_mod.append_event(DATA_DIR, project_path, {
@@ -236,6 +314,7 @@ async def apply_patch(req: Request):
             "message": patch_note or "",
             "cues": {"arch": arch},
             "result": {"benchmark": bench_after, "compliance": comp},
+            "profile_diff": prof_diff,
             "backup": str(backup_path)
         })
     except Exception as e:
@@ -244,8 +323,29 @@ async def apply_patch(req: Request):
     return JSONResponse({"status": "ok", "event": event})
 
 @app.get("/timeline")
-async def timeline(project_path: str):
-    return JSONResponse({"status": "ok", **timeline_mod.list_events(DATA_DIR, project_path)})
+async def timeline(project_path: str, limit: int = timeline_mod.DEFAULT_PAGE, cursor: int = None, type: str = None,
+                   file: str = None, since: float = None, until: float = None, summary: bool = False):
+    page = await asyncio.to_thread(timeline_mod.list_events, DATA_DIR, project_path, limit, cursor, type, file,
+                                   since, until, summary)
+    return JSONResponse({"status": "ok", **page})
+
+@app.api_route("/timeline/verify", methods=["GET", "POST"])
+async def timeline_verify(project_path: str, full: bool = False):
+    result = await asyncio.to_thread(timeline_verify_mod.verify, DATA_DIR, project_path, full)
+    return JSONResponse({"status": "ok" if result["ok"] else "failed", **result})
+
+@app.get("/timeline/proof")
+async def timeline_proof(project_path: str, seq: int):
+    proof = await asyncio.to_thread(timeline_verify_mod.inclusion_proof, DATA_DIR, project_path, seq)
+    if "error" in proof:
+        return JSONResponse({"status": "error", **proof}, status_code=404)
+    return JSONResponse({"status": "ok", **proof})
+
+@app.post("/timeline/rotate")
+async def timeline_rotate(project_path: str, force: bool = False):
+    result = await asyncio.to_thread(timeline_mod.rotate, DATA_DIR, project_path, force)
+    return JSONResponse({"status": "ok", "sealed": result["sealed"],
+                         "storage": timeline_mod.segment_stats(DATA_DIR, project_path)})
 
 @app.post("/flag_step")
 async def flag_step(req: Request):
@@ -295,6 +395,25 @@ async def tuning_reset(req: Request):
     pid = hashlib.sha256(project_path.encode('utf-8')).hexdigest()[:16]
     return JSONResponse({"status": "ok", "state": tuning_mod.reset(DATA_DIR, pid)})
 
+# --------------------------------------------------
+# Cost model (microprofiler calibration)
+# --------------------------------------------------
+@app.get("/cost_model")
+async def cost_model(project_path: str):
+    pid = costmodel_mod.project_id(project_path)
+    return JSONResponse({"status": "ok", "model": costmodel_mod.load_model(DATA_DIR, pid)})
+
+@app.post("/cost_model/fit")
+async def cost_model_fit(req: Request):
+    body = await req.json()
+    project_path = body.get("projectPath")
+    if not project_path:
+        raise HTTPException(status_code=400, detail="Provide 'projectPath'")
+    model = costmodel_mod.fit(DATA_DIR, costmodel_mod.project_id(project_path))
+    if "error" in model:
+        return JSONResponse({"status": "error", "detail": model["error"]}, status_code=400)
+    return JSONResponse({"status": "ok", "model": model})
+
 # --------------------------------------------------
 # CI analyze
 # --------------------------------------------------
@@ -304,15 +423,16 @@ async def ci_analyze(req: Request):
     path = body.get("path") or str(BASE.parent)
     domain = body.get("domain") or "gaming"
     comp_targets = body.get("complianceTargets") or []
+    force = bool(body.get("force"))
     # Orchestrate
     analysis = analyze_project(path)
-    before = run_benchmark(domain, path)
+    before = await asyncio.to_thread(run_benchmark, domain, path, data_dir=DATA_DIR, force=force)
     comp = check_compliance(domain, path)
     # Placeholder: we do not auto-apply; run validation pack
     out_dir = DATA_DIR / "ci" / str(int(time.time()))
     out_dir.mkdir(parents=True, exist_ok=True)
-    val = validation_runner.run_validation_pack(domain, path, out_dir)
-    after = run_benchmark(domain, path)
+    val = await asyncio.to_thread(validation_runner.run_validation_pack, domain, path, out_dir)
+    after = await asyncio.to_thread(run_benchmark, domain, path, data_dir=DATA_DIR)
     cmp = compare_results(before, after)
     report = {"analysis": analysis, "benchmark": {"before": before, "after": after, "compare": cmp}, "compliance": comp, "validation": val}
     (out_dir / "report.json").write_text(json.dumps(report, indent=2))
@@ -354,10 +474,80 @@ async def feedback(req: Request):
 async def profile(req: Request):
     body = await req.json()
     target = body.get("path") or str(BASE.parent / "example_repo")
-    res = run_profile_on_example(target)
-    out = DATA_DIR / "last_profile.json"
-    out.write_text(json.dumps(res, indent=2))
-    return JSONResponse({"status": "ok", "profile": res})
+    timeout = float(body.get("timeout", 60))
+    mem_mb = body.get("memMb", 1024)
+    # Wait this long for a quick result before handing back a job id
+    wait = float(body.get("wait", 5))
+    mode = body.get("mode") or "cprofile"
+    hz = float(body.get("hz", 100))
+    line_top_n = int(body.get("lineTopN", 5))
+    first_pass = body.get("firstPass") or "cprofile"
+    snapshot_sec = float(body.get("snapshotSec", 1.0))
+
+    def persist(res):
+        res["history"] = profile_data_mod.save_history(DATA_DIR, target, res, kind=mode)
+        (DATA_DIR / "last_profile.json").write_text(json.dumps(res, indent=2))
+
+    job, err = start_profile_job(target, timeout=timeout, mem_mb=mem_mb, on_result=persist, mode=mode, hz=hz,
+                                 line_top_n=line_top_n, first_pass=first_pass, snapshot_sec=snapshot_sec)
+    if err:
+        return JSONResponse({"status": "error", "profile": err}, status_code=400)
+    await asyncio.to_thread(job.done.wait, wait)
+    if not job.done.is_set():
+        return JSONResponse({"status": "running", "job_id": job.id, "progress": job.to_dict()["progress"]}, status_code=202)
+    return JSONResponse({"status": "ok", "job_id": job.id, "profile": job.result})
+
+@app.get("/profile/history")
+async def profile_history(project_path: str, top: int = 5):
+    return JSONResponse({"status": "ok", "history": profile_data_mod.list_history(DATA_DIR, project_path, top)})
+
+@app.get("/profile/history/{entry_id}")
+async def profile_history_entry(entry_id: str, project_path: str):
+    rec = profile_data_mod.load_history(DATA_DIR, project_path, entry_id)
+    if rec is None:
+        raise HTTPException(status_code=404, detail="unknown profile")
+    return JSONResponse({"status": "ok", "entry": rec})
+
+@app.get("/profile/flamegraph", response_class=PlainTextResponse)
+async def profile_flamegraph(project_path: str, id: str = None):
+    """Collapsed stacks (flamegraph.pl / speedscope input) for a stored profile, newest by default."""
+    rec = await asyncio.to_thread(profile_data_mod.load_history, DATA_DIR, project_path, id)
+    if rec is None:
+        raise HTTPException(status_code=404, detail="unknown profile")
+    lines = await asyncio.to_thread(profile_data_mod.collapsed_stacks, rec.get("profile") or {})
+    return PlainTextResponse("\n".join(lines) + "\n")
+
+@app.get("/profile/jobs/{job_id}")
+async def profile_job(job_id: str, events: bool = False):
+    job = jobs_mod.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    return JSONResponse({"status": "ok", "job": job.to_dict(with_events=events)})
+
+@app.post("/profile/jobs/{job_id}/cancel")
+async def profile_job_cancel(job_id: str):
+    job = jobs_mod.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    return JSONResponse({"status": "ok", "job": job.to_dict()})
+
+@app.get("/profile/jobs/{job_id}/stream")
+async def profile_job_stream(job_id: str):
+    job = jobs_mod.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+
+    async def gen():
+        seq = 0
+        while True:
+            for seq, ev in job.events_since(seq):
+                yield json.dumps(ev) + "\n"
+            if job.done.is_set() and not job.events_since(seq):
+                yield json.dumps({"event": "result", "status": job.status, "result": job.result}) + "\n"
+                return
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
 
 # --------------------------------------------------
 # Benchmarking
@@ -372,24 +562,97 @@ async def benchmark(req: Request):
         raise HTTPException(status_code=400, detail="Provide 'domain' (gaming|hpc|robotics)")
 
     try:
-        after = run_benchmark(domain, project_path, baseline_path)
+        after = await asyncio.to_thread(run_benchmark, domain, project_path, baseline_path, config=body.get("config"),
+                                      data_dir=DATA_DIR, force=bool(body.get("force")))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    rec_path = DATA_DIR / "benchmarks.jsonl"
-    record = {"timestamp": time.time(), "domain": domain, "path": project_path, "result": after}
-    record_result(rec_path, record)
+    # Cache hits are not new measurements; keep them out of the history
+    if not (after.get("cache") or {}).get("hit"):
+        _import_legacy_benchmarks()
+        record = {"timestamp": time.time(), "domain": domain, "path": project_path, "result": after}
+        bench_store_mod.record(DATA_DIR, record)
 
     cmp = None
     before = body.get("before")
     if isinstance(before, dict):
-        cmp = compare_results(before, after)
+        cmp = compare_results(before, after,
+                              min_effect=float(body.get("minEffect", DEFAULT_MIN_EFFECT)),
+                              alpha=float(body.get("alpha", DEFAULT_ALPHA)))
 
     return JSONResponse({"status": "ok", "benchmark": after, "compare": cmp})
 
+LEGACY_BENCHMARKS = DATA_DIR / "benchmarks.jsonl"
+
+def _import_legacy_benchmarks():
+    # Incremental (offset-tracked), so this is a cheap no-op once the JSONL is loaded
+    if LEGACY_BENCHMARKS.exists():
+        bench_store_mod.import_jsonl(DATA_DIR, LEGACY_BENCHMARKS)
+
+@app.get("/benchmarks/history")
+async def benchmarks_history(project_path: str, domain: str = None, metric: str = None, since: float = None,
+                             until: float = None, bucket_sec: float = None, limit: int = bench_store_mod.MAX_HISTORY_POINTS,
+                             include_simulated: bool = True):
+    await asyncio.to_thread(_import_legacy_benchmarks)
+    hist = await asyncio.to_thread(bench_store_mod.history, DATA_DIR, project_path, domain, metric, since, until,
+                                   bucket_sec, limit, include_simulated)
+    return JSONResponse({"status": "ok", **hist})
+
+@app.get("/benchmarks/regressions")
+async def benchmarks_regressions(project_path: str, domain: str = None, metric: str = None,
+                                 window: int = bench_store_mod.DEFAULT_WINDOW,
+                                 min_step: float = bench_store_mod.DEFAULT_MIN_STEP, include_simulated: bool = False):
+    await asyncio.to_thread(_import_legacy_benchmarks)
+    directions = {m: meta["lower_is_better"] for m, meta in METRIC_META.items()}
+    res = await asyncio.to_thread(bench_store_mod.regressions, DATA_DIR, project_path, domain, metric, window,
+                                  min_step, include_simulated, directions)
+    return JSONResponse({"status": "ok", **res})
+
+@app.post("/benchmarks/run")
+async def benchmarks_run(req: Request):
+    body = await req.json()
+    project_path = body.get("path") or str(BASE.parent / "example_repo")
+    runs = body.get("runs") or [{"domain": d} for d in (body.get("domains") or [])]
+    if not runs or not all(isinstance(r, dict) and r.get("domain") for r in runs):
+        raise HTTPException(status_code=400, detail="Provide 'runs' [{domain, config?, exclusive?}] or 'domains'")
+    report = await asyncio.to_thread(bench_scheduler_mod.run_scheduled, runs, project_path, DATA_DIR,
+                                     body.get("maxParallel"), body.get("cpusPerRun"), bool(body.get("force")))
+    _import_legacy_benchmarks()
+    for run in report["runs"]:
+        bench = run.get("benchmark")
+        if run["status"] == "ok" and not (bench.get("cache") or {}).get("hit"):
+            bench_store_mod.record(DATA_DIR, {"timestamp": time.time(), "domain": run["domain"],
+                                              "path": project_path, "result": bench})
+    return JSONResponse({"status": "ok", **report})
+
+@app.post("/benchmarks/import")
+async def benchmarks_import(req: Request):
+    try:
+        body = await req.json()
+    except Exception:
+        body = {}
+    path = Path(body.get("path") or LEGACY_BENCHMARKS)
+    res = await asyncio.to_thread(bench_store_mod.import_jsonl, DATA_DIR, path)
+    return JSONResponse({"status": "ok", "path": str(path), **res})
+
 # --------------------------------------------------
 # Validation packs
 # --------------------------------------------------
+def _measured_series(body, domain, project_path):
+    """Series for a validation pack: explicit `series`, or harness samples when `useBenchmark` is set."""
+    if isinstance(body.get("series"), list):
+        return body["series"], {"kind": "request"}
+    if body.get("useBenchmark"):
+        try:
+            bench = run_benchmark(domain, project_path, data_dir=DATA_DIR, force=bool(body.get("force")))
+        except ValueError:
+            return None, None
+        res = bench.get("result") or {}
+        if not (res.get("details") or {}).get("simulated") and res.get("samples"):
+            return res["samples"], {"kind": "benchmark", "metric": res.get("metric"),
+                                    "cache_key": (bench.get("cache") or {}).get("key")}
+    return None, None
+
 @app.post("/validate_pack")
 async def validate_pack(req: Request):
     body = await req.json()
@@ -400,16 +663,67 @@ async def validate_pack(req: Request):
         raise HTTPException(status_code=400, detail="Provide 'domain'")
     out_dir = DATA_DIR / "validation" / series_id
     out_dir.mkdir(parents=True, exist_ok=True)
-    result = validation_runner.run_validation_pack(domain, project_path, out_dir)
+    series, source = await asyncio.to_thread(_measured_series, body, domain, project_path)
+    render = body.get("render") or "background"
+    if render not in charts_mod.RENDER_MODES:
+        raise HTTPException(status_code=400, detail=f"render must be one of {', '.join(charts_mod.RENDER_MODES)}")
+    result = await asyncio.to_thread(validation_runner.run_validation_pack, domain, project_path, out_dir,
+                                     series=series, source=source, render=render)
     index = {
         "seriesId": series_id,
         "artifacts": result.get("artifacts", []),
         "summary": result.get("summary", {}),
+        "charts": result.get("charts", []),
         "out_dir": str(out_dir)
     }
     (out_dir / "index.json").write_text(json.dumps(index, indent=2))
     return JSONResponse({"status": "ok", "index": index})
 
+@app.post("/validate_packs")
+async def validate_packs(req: Request):
+    body = await req.json()
+    project_path = body.get("path") or str(BASE.parent)
+    series_id = body.get("seriesId") or str(int(time.time()))
+    render = body.get("render") or "background"
+    if render not in charts_mod.RENDER_MODES:
+        raise HTTPException(status_code=400, detail=f"render must be one of {', '.join(charts_mod.RENDER_MODES)}")
+    out_dir = DATA_DIR / "validation" / series_id
+    index = await asyncio.to_thread(
+        validation_runner.run_validation_packs, project_path, out_dir, body.get("domains"),
+        float(body.get("timeout", validation_runner.DEFAULT_PACK_TIMEOUT_SEC)), body.get("maxWorkers"),
+        body.get("series") if isinstance(body.get("series"), dict) else None, render)
+    return JSONResponse({"status": "ok", "index": dict(index, seriesId=series_id)})
+
+@app.get("/validation/series")
+async def validation_series(path: str, start: int = 0, stop: int = None, max_points: int = 2000):
+    target = Path(path).resolve()
+    if DATA_DIR.resolve() not in target.parents or target.suffix not in (".json", ".npy", ".png"):
+        raise HTTPException(status_code=400, detail="path must be a validation artifact under the data directory")
+    try:
+        series = pack_engine.load_series(target)
+    except Exception:
+        raise HTTPException(status_code=404, detail="series not found")
+    window = series[start:stop]
+    # Strided view of the memmap: only the pages holding returned points are read
+    step = max(1, -(-len(window) // max(1, max_points)))
+    return JSONResponse({"status": "ok", "length": int(len(series)), "start": start, "step": step,
+                         "values": window[::step].tolist()})
+
+@app.get("/validation/chart")
+async def validation_chart(path: str, timeout: float = 30.0):
+    target = Path(path).resolve()
+    if DATA_DIR.resolve() not in target.parents or target.suffix != ".png":
+        raise HTTPException(status_code=400, detail="path must be a .png artifact under the data directory")
+    try:
+        img = await asyncio.to_thread(charts_mod.ensure, target, lambda: pack_engine.load_chart_source(target), timeout)
+    except TimeoutError:
+        # The render keeps running on the pool; the client polls this URL again
+        return JSONResponse({"status": "rendering", "path": str(target)}, status_code=202,
+                            headers={"Retry-After": "2"})
+    if img is None:
+        raise HTTPException(status_code=404, detail="chart not available")
+    return FileResponse(str(img), media_type="image/png")
+
 # --------------------------------------------------
 # Compliance
 # --------------------------------------------------
@@ -435,27 +749,29 @@ async def workspace_analysis(req: Request):
         path = body.get("path") or str(BASE.parent)
         domain = body.get("domain")
         benchmark_domain = body.get("benchmarkDomain") or domain or "gaming"
+        force = bool(body.get("force"))
 
         # 1) Analyze
         analysis = analyze_project(path)
 
         # 2) Profile (example) — use example_repo to ensure a stable target
         profile_target = str(BASE.parent / "example_repo")
-        profile_res = run_profile_on_example(profile_target)
+        profile_res = await asyncio.to_thread(run_profile_on_example, profile_target)
 
         # 3) Compliance
         compliance_res = check_compliance(benchmark_domain, path)
 
         # 4) Benchmark BEFORE
-        before = run_benchmark(benchmark_domain, path)
+        before = await asyncio.to_thread(run_benchmark, benchmark_domain, path, data_dir=DATA_DIR, force=force)
 
         # 5) Suggestions (sample: use a simple file from example or provided)
         sample_file = str(BASE.parent / "example_repo" / "main.py")
         sample_text = Path(sample_file).read_text(encoding="utf-8") if Path(sample_file).exists() else ""
-        suggestions = generate_suggestions(sample_file, sample_text, domain=benchmark_domain) if sample_text else []
+        suggestions = (await asyncio.to_thread(generate_suggestions, sample_file, sample_text, domain=benchmark_domain)
+                       if sample_text else [])
 
         # 6) Benchmark AFTER (no automatic patch application here; placeholder)
-        after = run_benchmark(benchmark_domain, path)
+        after = await asyncio.to_thread(run_benchmark, benchmark_domain, path, data_dir=DATA_DIR)
         comparison = compare_results(before, after)
 
         report = {
@@ -482,6 +798,10 @@ async def workspace_analysis(req: Request):
             "benchmark_metric": cmp.get("metric"),
             "benchmark_delta": cmp.get("delta"),
             "benchmark_improved": cmp.get("improved"),
+            "hotspots": [
+                {k: h.get(k) for k in ("label", "file", "line", "ncalls", "tottime", "cumtime")}
+                for h in (profile_res.get("hotspots") or [])[:5]
+            ] if isinstance(profile_res, dict) else [],
         }
         return JSONResponse({"status": "ok", "report_path": str(report_path), "summary": summary})
     except Exception as e:
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark timeline.append_event latency as history grows.
+
+Between measurement windows the log is bulk-extended with valid chained events
+(written directly, then the head sidecar is refreshed by one real append), so
+reaching 1M events takes seconds rather than hours. Each window times
+`--window` real appends; constant per-append time across sizes shows the O(1)
+head lookup.
+
+Usage:
+  python3 scripts/bench_timeline_append.py [--events 1000000] [--window 2000]
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from analysis import timeline  # noqa: E402
+
+PROJECT = "/bench/project"
+EVENT = {"type": "APPLIED", "file": "src/main.py", "domain": "gaming", "cues": ["loop"],
+         "result": {"benchmark": {"metric": "fps", "value": 58.2}, "compliance": {"summary": {"warn": 0}}}}
+FILES = 50
+
+
+def _event(i: int):
+    # Varied messages and a rotating set of files, as in real histories
+    return dict(EVENT, file=f"src/mod_{i % FILES}.py", message=f"applied suggestion #{i}: unroll loop")
+
+
+def _bulk_extend(data_dir: Path, n: int) -> None:
+    pid = timeline._project_id(PROJECT)
+    tdir = data_dir / "timeline"
+    log = tdir / f"{pid}.jsonl"
+    head = timeline._read_head(tdir, pid, log)
+    prev = head["chain_hash"]
+    with log.open("ab") as fh:
+        for i in range(n):
+            ev = dict(_event(i), timestamp=time.time())
+            ev["chain_hash"] = prev = timeline._chain_hash(prev, ev)
+            fh.write((json.dumps(ev) + "\n").encode("utf-8"))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=1_000_000)
+    ap.add_argument("--window", type=int, default=2000)
+    args = ap.parse_args()
+
+    # Measure the append path itself; sealing a bulk-extended multi-GB active log is not representative
+    timeline.SEGMENT_MAX_BYTES = 1 << 62
+    sizes = [s for s in (0, 10_000, 100_000, 1_000_000, 10_000_000) if s <= args.events]
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        timeline.append_event(data_dir, PROJECT, _event(0))
+        have = 1
+        print(f"{'history':>10} {'mean_us':>9} {'p50_us':>9} {'p99_us':>9}")
+        for size in sizes:
+            if size > have:
+                _bulk_extend(data_dir, size - have)
+                timeline.append_event(data_dir, PROJECT, _event(have))  # rebuilds the head sidecar once
+                have = size + 1
+            lat = []
+            for i in range(args.window):
+                ev = _event(have + i)
+                t0 = time.perf_counter()
+                timeline.append_event(data_dir, PROJECT, ev)
+                lat.append((time.perf_counter() - t0) * 1e6)
+            have += args.window
+            lat.sort()
+            print(f"{size:>10} {statistics.fmean(lat):>9.1f} {lat[len(lat) // 2]:>9.1f} "
+                  f"{lat[int(len(lat) * 0.99)]:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
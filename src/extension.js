@@ -72,34 +72,32 @@ function activate(context) {
   });
   context.subscriptions.push(suggestCmd);
 
-  // Auto-send on text changes
+  // Auto-send text changes as contentChanges deltas, batched per flush interval
   const changeDisposable = vscode.workspace.onDidChangeTextDocument((event) => {
-    if (!started) return;
-    const payload = {
-      type: 'edit',
-      uri: event.document.uri.toString(),
-      text: event.document.getText(),
-      timestamp: new Date().toISOString()
-    };
-    sendEvent(payload);
+    if (!started || !event.contentChanges.length) return;
+    queueEdit(event);
   });
   context.subscriptions.push(changeDisposable);
 
-  // Auto-send on cursor/selection changes
+  // Auto-send cursor/selection changes (only the latest selection per document per batch)
   const selDisposable = vscode.window.onDidChangeTextEditorSelection((event) => {
     if (!started) return;
-    const payload = {
+    const uri = event.textEditor.document.uri.toString();
+    pendingCursors.set(uri, {
       type: 'cursor',
-      uri: event.textEditor.document.uri.toString(),
+      uri,
       selections: event.selections.map(s => ({
         start: s.start,
         end: s.end
       })),
       timestamp: new Date().toISOString()
-    };
-    sendEvent(payload);
+    });
+    scheduleFlush();
   });
   context.subscriptions.push(selDisposable);
+  context.subscriptions.push(vscode.workspace.onDidCloseTextDocument((doc) => {
+    syncedVersions.delete(doc.uri.toString());
+  }));
 
   // Command: Workspace-wide analysis orchestration
   let wsCmd = vscode.commands.registerCommand('extension.workspaceAnalyze', async () => {
@@ -122,8 +120,11 @@ function activate(context) {
       }
       if (!res.ok) throw new Error(`Server returned ${res.status}`);
       const data = await res.json();
-      vscode.window.showInformationMessage('Workspace analysis complete. Report written on backend.');
+      const hotspots = (data && data.summary && data.summary.hotspots) ? data.summary.hotspots : [];
+      const top = hotspots.length ? ` Top hotspot: ${hotspots[0].label} (${(hotspots[0].tottime * 1000).toFixed(1)} ms self).` : '';
+      vscode.window.showInformationMessage(`Workspace analysis complete. Report written on backend.${top}`);
       console.log('Workspace report:', data.report ? Object.keys(data.report) : data);
+      if (hotspots.length) console.log('Profile hotspots:', hotspots);
     } catch (err) {
       vscode.window.showErrorMessage(`Workspace analysis failed: ${err.message}`);
     }
@@ -214,8 +215,10 @@ function activate(context) {
     const panel = vscode.window.createWebviewPanel('aiTimeline', 'AI Timeline', vscode.ViewColumn.Beside, { enableScripts: true });
 
     async function fetchTimeline() {
-      const url1 = `http://${host}:${portPrimary}/timeline?project_path=${encodeURIComponent(projectPath)}`;
-      const url2 = `http://${host}:${portFallback}/timeline?project_path=${encodeURIComponent(projectPath)}`;
+      // Newest-first page; older events stay on the server until asked for
+      const query = `project_path=${encodeURIComponent(projectPath)}&limit=200`;
+      const url1 = `http://${host}:${portPrimary}/timeline?${query}`;
+      const url2 = `http://${host}:${portFallback}/timeline?${query}`;
       let res;
       try { res = await fetch(url1); } catch { res = await fetch(url2); }
       if (!res.ok) throw new Error(`Server ${res.status}`);
@@ -234,7 +237,7 @@ function activate(context) {
             ? `<button onclick="revert(${idx})">Revert</button>`
             : '';
           return '<tr>'+
-            `<td>${idx+1}</td>`+
+            `<td>${(e.seq !== undefined ? e.seq : idx)+1}</td>`+
             `<td>${e.type||''}</td>`+
             `<td>${e.file||''}</td>`+
             `<td>${e.domain||''}</td>`+
@@ -251,6 +254,7 @@ function activate(context) {
           '<style>body{font-family:sans-serif}table{width:100%;border-collapse:collapse}th,td{border:1px solid #ccc;padding:6px;font-size:12px}th{background:#f6f6f6}button{font-size:12px}</style>'+
           '</head><body>'+`
           <h3>AI Timeline — ${projectPath}</h3>
+          <p>Showing latest ${events.length} of ${data.total || events.length} events.</p>
           <table><thead><tr><th>#</th><th>Type</th><th>File</th><th>Domain</th><th>Message</th><th>Cues</th><th>Metric</th><th>Hash</th><th>Actions</th></tr></thead>`+
           `<tbody>${rows||''}</tbody></table>`+
           '<script>\n'+
@@ -334,44 +338,123 @@ function activate(context) {
   context.subscriptions.push(resetTuningCmd);
 }
 
-function sendEvent(payload) {
-  try {
-    const cfg = vscode.workspace.getConfiguration('myAiRefactor');
-    const host = cfg.get('backend.host') || '127.0.0.1';
-    const portPrimary = cfg.get('backend.port') || 8000;
-    const portFallback = (portPrimary === 8000) ? 8001 : 8000;
-    const data = JSON.stringify(payload);
-    const trySend = (port) => new Promise((resolve, reject) => {
-      const opts = {
-        hostname: host,
-        port,
-        path: '/event',
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Content-Length': Buffer.byteLength(data)
-        },
-        timeout: 3000
-      };
-      const req = http.request(opts, (res) => {
-        res.on('data', () => {});
-        res.on('end', () => resolve(res.statusCode));
+// Edit/cursor batching: per-document pending deltas, flushed as one /events/batch request
+const pendingEdits = new Map();   // uri -> {document, baseVersion, version, changes, full}
+const pendingCursors = new Map(); // uri -> latest cursor payload
+const syncedVersions = new Map(); // uri -> document version the backend mirrors (after the in-flight batch)
+let flushTimer = null;
+
+function queueEdit(event) {
+  const doc = event.document;
+  const uri = doc.uri.toString();
+  let pending = pendingEdits.get(uri);
+  if (!pending) {
+    const base = syncedVersions.get(uri);
+    // Deltas only when the backend holds the version these changes apply to
+    pending = { document: doc, baseVersion: base, version: base, changes: [], full: base === undefined };
+    pendingEdits.set(uri, pending);
+  }
+  if (pending.version !== doc.version - 1) pending.full = true; // missed a change event
+  pending.version = doc.version;
+  if (!pending.full) {
+    for (const c of event.contentChanges) {
+      pending.changes.push({ rangeOffset: c.rangeOffset, rangeLength: c.rangeLength, text: c.text });
+    }
+  }
+  scheduleFlush();
+}
+
+function scheduleFlush() {
+  if (flushTimer) return;
+  const cfg = vscode.workspace.getConfiguration('myAiRefactor');
+  const flushMs = cfg.get('events.flushMs') || 500;
+  flushTimer = setTimeout(flushEvents, flushMs);
+}
+
+function documentLength(doc) {
+  // UTF-16 length without materializing the text
+  return doc.offsetAt(doc.lineAt(doc.lineCount - 1).range.end);
+}
+
+function flushEvents() {
+  flushTimer = null;
+  const timestamp = new Date().toISOString();
+  const batch = [];
+  for (const [uri, pending] of pendingEdits) {
+    const doc = pending.document;
+    if (pending.full) {
+      batch.push({ type: 'edit', uri, version: doc.version, text: doc.getText(), timestamp });
+    } else {
+      batch.push({
+        type: 'edit', uri, baseVersion: pending.baseVersion, version: doc.version,
+        changes: pending.changes, length: documentLength(doc), timestamp
       });
-      req.on('error', reject);
-      req.on('timeout', () => { req.destroy(new Error('timeout')); });
-      req.write(data);
-      req.end();
-    });
+    }
+    syncedVersions.set(uri, doc.version);
+  }
+  pendingEdits.clear();
+  for (const payload of pendingCursors.values()) batch.push(payload);
+  pendingCursors.clear();
+  if (!batch.length) return;
+
+  const editUris = batch.filter(e => e.type === 'edit').map(e => e.uri);
+  postEvents('/events/batch', { events: batch }).then((res) => {
+    for (const uri of (res && res.resync) || []) requestResync(uri);
+  }).catch((err) => {
+    // The backend may have missed these versions: next change sends full text
+    for (const uri of editUris) syncedVersions.delete(uri);
+    console.error('Failed to send events:', err && err.message ? err.message : err);
+  });
+}
 
-    trySend(portPrimary).catch(() => trySend(portFallback)).catch((err) => {
-      console.error('Failed to send event:', err && err.message ? err.message : err);
+function requestResync(uri) {
+  syncedVersions.delete(uri);
+  const doc = vscode.workspace.textDocuments.find(d => d.uri.toString() === uri);
+  if (!doc) return;
+  pendingEdits.set(uri, { document: doc, baseVersion: undefined, version: doc.version, changes: [], full: true });
+  scheduleFlush();
+}
+
+function postEvents(path, payload) {
+  const cfg = vscode.workspace.getConfiguration('myAiRefactor');
+  const host = cfg.get('backend.host') || '127.0.0.1';
+  const portPrimary = cfg.get('backend.port') || 8000;
+  const portFallback = (portPrimary === 8000) ? 8001 : 8000;
+  const data = JSON.stringify(payload);
+  const trySend = (port) => new Promise((resolve, reject) => {
+    const opts = {
+      hostname: host,
+      port,
+      path,
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Content-Length': Buffer.byteLength(data)
+      },
+      timeout: 3000
+    };
+    const req = http.request(opts, (res) => {
+      let body = '';
+      res.on('data', (chunk) => { body += chunk; });
+      res.on('end', () => {
+        if (res.statusCode >= 400) return reject(new Error(`HTTP ${res.statusCode}`));
+        try { resolve(JSON.parse(body)); } catch (e) { resolve(null); }
+      });
     });
-  } catch (err) {
-    console.error('sendEvent exception:', err);
-  }
+    req.on('error', reject);
+    req.on('timeout', () => { req.destroy(new Error('timeout')); });
+    req.write(data);
+    req.end();
+  });
+  return trySend(portPrimary).catch(() => trySend(portFallback));
 }
 
-function deactivate() {}
+function deactivate() {
+  if (flushTimer) {
+    clearTimeout(flushTimer);
+    flushEvents();
+  }
+}
 
 module.exports = {
   activate,